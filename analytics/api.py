@@ -0,0 +1,31 @@
+from datetime import date
+from typing import List, Literal, Optional
+
+from django.conf import settings
+from ninja import Query, Router
+
+from utils import AnalyticsErrorCode, APIError, ErrorSchema, SecurityErrorCode
+
+from .schemas import PerformanceOut
+from .services import RollupService
+
+router = Router(tags=["analytics"])
+
+
+@router.get(
+    "/performance",
+    response={200: PerformanceOut, 400: ErrorSchema, 403: ErrorSchema},
+)
+def performance(
+    request,
+    start: date,
+    end: date,
+    granularity: Literal["day", "week", "month"] = "month",
+    property_id: Optional[List[int]] = Query(None),
+):
+    """Occupancy, ADR and RevPAR of the owner's properties in [start, end)."""
+    if not request.user.is_staff:
+        raise APIError("Access denied", SecurityErrorCode.ACCESS_DENIED, 403)
+    if start >= end or (end - start).days > settings.ANALYTICS_MAX_RANGE_DAYS:
+        raise APIError("Invalid date range", AnalyticsErrorCode.INVALID_RANGE)
+    return RollupService.performance(request.user, start, end, property_id, granularity)
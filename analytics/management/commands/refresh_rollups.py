@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from analytics.services import RollupService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily revenue/occupancy rollups from the reservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--property",
+            type=int,
+            action="append",
+            dest="properties",
+            help="Only this property (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        refreshed = RollupService.refresh_all(options["properties"])
+        self.stdout.write(f"Resúmenes recalculados para {refreshed} propiedades")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='rooms_available',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
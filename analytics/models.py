@@ -0,0 +1,43 @@
+from django.db import models
+
+
+class DailyRollup(models.Model):
+    """Rooms sold, rooms left and revenue of a property's room type on one night.
+
+    Derived from confirmed reservations and ``Availability`` by
+    ``RollupService.refresh``; never edited by hand.
+    """
+
+    property = models.ForeignKey(
+        "properties.Property",
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+    )
+    room_type = models.ForeignKey(
+        "properties.RoomType",
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+        null=True,
+        blank=True,
+    )
+    date = models.DateField()
+    rooms_sold = models.PositiveIntegerField(default=0)
+    # Unsold rooms (``Availability.availability``); inventory is sold + available
+    rooms_available = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "analytics_daily_rollups"
+        verbose_name = "Resumen diario"
+        verbose_name_plural = "Resúmenes diarios"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["property", "room_type", "date"],
+                name="analytics_rollup_property_room_type_date",
+            )
+        ]
+        indexes = [models.Index(fields=["property", "date"])]
+
+    def __str__(self):
+        return f"{self.property_id} {self.room_type_id} {self.date}"
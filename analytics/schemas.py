@@ -0,0 +1,22 @@
+from datetime import date
+from typing import List
+
+from ninja import Schema
+
+
+class PerformanceMetrics(Schema):
+    rooms_sold: int
+    rooms_available: int
+    revenue: float
+    occupancy: float
+    adr: float
+    revpar: float
+
+
+class PerformancePeriod(PerformanceMetrics):
+    period: date
+
+
+class PerformanceOut(Schema):
+    periods: List[PerformancePeriod]
+    total: PerformanceMetrics
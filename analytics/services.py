@@ -0,0 +1,329 @@
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import DateField, DecimalField, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Trunc
+
+from properties.models import Availability, Property
+from reservations.models import Reservation, ReservationRoom
+from utils.metrics import record_cache
+
+from .models import DailyRollup
+
+# One row per (property, room type, night) in [start, end) with sales or
+# availability. The room price covers the whole stay, so each night gets an
+# equal share of it.
+REFRESH_SQL = f"""
+WITH sold AS (
+    SELECT rr.room_type_id,
+           night::date AS date,
+           COUNT(*) AS rooms_sold,
+           ROUND(
+               SUM(COALESCE(rr.price, 0)::numeric / (r.check_out - r.check_in)), 2
+           ) AS revenue
+    FROM {ReservationRoom._meta.db_table} rr
+    JOIN {Reservation._meta.db_table} r ON r.id = rr.reservation_id
+    CROSS JOIN LATERAL generate_series(
+        GREATEST(r.check_in, %(start)s)::timestamp,
+        (LEAST(r.check_out, %(end)s) - 1)::timestamp,
+        interval '1 day'
+    ) AS night
+    WHERE r.property_id = %(property_id)s
+      AND r.status = ANY(%(statuses)s)
+      AND r.check_in < %(end)s
+      AND r.check_out > %(start)s
+      AND r.check_out > r.check_in
+    GROUP BY rr.room_type_id, night::date
+), available AS (
+    SELECT room_type_id, date, GREATEST(availability, 0) AS rooms_available
+    FROM {Availability._meta.db_table}
+    WHERE property_id = %(property_id)s
+      AND date >= %(start)s
+      AND date < %(end)s
+)
+INSERT INTO {DailyRollup._meta.db_table}
+    (property_id, room_type_id, date, rooms_sold, rooms_available, revenue,
+     updated_at)
+SELECT %(property_id)s,
+       COALESCE(s.room_type_id, a.room_type_id),
+       COALESCE(s.date, a.date),
+       COALESCE(s.rooms_sold, 0),
+       COALESCE(a.rooms_available, 0),
+       COALESCE(s.revenue, 0),
+       NOW()
+FROM sold s
+FULL OUTER JOIN available a
+    ON a.room_type_id = s.room_type_id AND a.date = s.date
+"""
+
+
+# Refresh ranges waiting for the current transaction to commit, per thread.
+# Ranges left by a rolled back transaction only widen the next refresh.
+_pending = threading.local()
+
+
+class RollupService:
+    """Maintain and query ``DailyRollup``."""
+
+    #: Reservations that count as sold
+    COUNTED_STATUSES = (Reservation.CONFIRMED, Reservation.OK)
+
+    @classmethod
+    def refresh(cls, property_id: int, start: date, end: date):
+        """Rebuild the rollups of ``property_id`` for the nights in [start, end)."""
+        with transaction.atomic():
+            # Serializes refreshes of the same property
+            owner_id = (
+                Property.objects.select_for_update()
+                .filter(id=property_id)
+                .values_list("owner_id", flat=True)
+                .first()
+            )
+            DailyRollup.objects.filter(
+                property_id=property_id, date__gte=start, date__lt=end
+            ).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    REFRESH_SQL,
+                    {
+                        "property_id": property_id,
+                        "start": start,
+                        "end": end,
+                        "statuses": list(cls.COUNTED_STATUSES),
+                    },
+                )
+        if owner_id:
+            cls.invalidate_owner(owner_id)
+
+    @classmethod
+    def refresh_all(
+        cls,
+        property_ids: Optional[Iterable[int]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> int:
+        """Rebuild every (or the given) property, clipped to [start, end).
+
+        Without dates the whole history of reservations and availability is
+        rebuilt.
+        """
+        reservations = Reservation.objects.filter(
+            check_in__isnull=False, check_out__isnull=False, property__isnull=False
+        )
+        availability = Availability.objects.all()
+        if property_ids is not None:
+            reservations = reservations.filter(property_id__in=property_ids)
+            availability = availability.filter(property_id__in=property_ids)
+        ranges = {}
+        for row in reservations.values("property_id").annotate(
+            first=Min("check_in"), last=Max("check_out")
+        ):
+            ranges[row["property_id"]] = (row["first"], row["last"])
+        for row in availability.values("property_id").annotate(
+            first=Min("date"), last=Max("date")
+        ):
+            window = (row["first"], row["last"] + timedelta(days=1))
+            if row["property_id"] in ranges:
+                first, last = ranges[row["property_id"]]
+                window = (min(first, window[0]), max(last, window[1]))
+            ranges[row["property_id"]] = window
+
+        refreshed = 0
+        for property_id, (first, last) in sorted(ranges.items()):
+            first = max(first, start) if start else first
+            last = min(last, end) if end else last
+            if first < last:
+                cls.refresh(property_id, first, last)
+                refreshed += 1
+        return refreshed
+
+    @classmethod
+    def schedule_refresh(cls, property_id, start, end):
+        """Refresh the rollups in a Celery task once the transaction commits.
+
+        Ranges scheduled for the same property in one transaction are merged
+        into a single task.
+        """
+        if not (property_id and start and end and start < end):
+            return
+        pending = cls._pending_ranges()
+        if property_id in pending:
+            first, last = pending[property_id]
+            start, end = min(first, start), max(last, end)
+        pending[property_id] = (start, end)
+        transaction.on_commit(lambda: cls._dispatch_refresh(property_id))
+
+    @staticmethod
+    def _pending_ranges() -> dict:
+        if not hasattr(_pending, "ranges"):
+            _pending.ranges = {}
+        return _pending.ranges
+
+    @classmethod
+    def _dispatch_refresh(cls, property_id):
+        window = cls._pending_ranges().pop(property_id, None)
+        if window is None:
+            # Already sent by an earlier callback of the same commit
+            return
+        from .tasks import refresh_daily_rollups
+
+        start, end = window
+        refresh_daily_rollups.delay(property_id, start.isoformat(), end.isoformat())
+
+    @classmethod
+    def schedule_refresh_for(cls, reservations):
+        """:meth:`schedule_refresh` for the stays of a reservation queryset."""
+        ranges = (
+            reservations.values("property_id")
+            .annotate(start=Min("check_in"), end=Max("check_out"))
+            .order_by("property_id")
+        )
+        for row in ranges:
+            cls.schedule_refresh(row["property_id"], row["start"], row["end"])
+
+    # ------------------------------------------------------------------ cache
+
+    @staticmethod
+    def _owner_version_key(owner_id) -> str:
+        return f"analytics:owner:{owner_id}:version"
+
+    @classmethod
+    def invalidate_owner(cls, owner_id):
+        """Drop every cached result of ``owner_id`` (by bumping its version)."""
+        key = cls._owner_version_key(owner_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, None)
+
+    @classmethod
+    def _cached(cls, owner_id, name, params, compute):
+        version = cache.get_or_set(cls._owner_version_key(owner_id), 1, None)
+        key = f"analytics:owner:{owner_id}:v{version}:{name}:{params}"
+        result = cache.get(key)
+        record_cache("analytics", result is not None)
+        if result is None:
+            result = compute()
+            cache.set(key, result, settings.ANALYTICS_CACHE_TTL)
+        return result
+
+    # ---------------------------------------------------------------- queries
+
+    @staticmethod
+    def rollups_for(owner, start: date, end: date, property_ids=None):
+        rollups = DailyRollup.objects.filter(
+            property__owner=owner, date__gte=start, date__lt=end
+        )
+        if property_ids:
+            rollups = rollups.filter(property_id__in=property_ids)
+        return rollups
+
+    @classmethod
+    def revenue_by_room_type(cls, owner, start: date, end: date, property_ids=None):
+        """Revenue pivot: one dataset per room type, one value per property.
+
+        The pivot is done by the database with one filtered ``SUM`` per
+        property. Cached per owner until one of its rollups changes.
+        """
+        property_ids = sorted(property_ids or [])
+
+        def compute():
+            rollups = cls.rollups_for(owner, start, end, property_ids)
+            properties = list(
+                rollups.values_list("property_id", "property__name")
+                .distinct()
+                .order_by("property__name", "property_id")
+            )
+            if not properties:
+                return {"labels": [], "datasets": []}
+            zero = Value(Decimal("0"), output_field=DecimalField())
+            rows = (
+                rollups.values("room_type__name")
+                .annotate(
+                    **{
+                        f"p{property_id}": Coalesce(
+                            Sum("revenue", filter=Q(property_id=property_id)), zero
+                        )
+                        for property_id, _ in properties
+                    }
+                )
+                .order_by("room_type__name")
+            )
+            return {
+                "labels": [name for _, name in properties],
+                "datasets": [
+                    {
+                        "label": row["room_type__name"] or "N/A",
+                        "data": [
+                            float(row[f"p{property_id}"])
+                            for property_id, _ in properties
+                        ],
+                    }
+                    for row in rows
+                ],
+            }
+
+        params = f"{start}:{end}:{','.join(map(str, property_ids))}"
+        return cls._cached(owner.id, "revenue_by_room_type", params, compute)
+
+    @staticmethod
+    def _metrics(rooms_sold, rooms_available, revenue) -> dict:
+        inventory = rooms_sold + rooms_available
+        revenue = float(revenue)
+        return {
+            "rooms_sold": rooms_sold,
+            "rooms_available": rooms_available,
+            "revenue": round(revenue, 2),
+            "occupancy": round(rooms_sold / inventory, 4) if inventory else 0.0,
+            "adr": round(revenue / rooms_sold, 2) if rooms_sold else 0.0,
+            "revpar": round(revenue / inventory, 2) if inventory else 0.0,
+        }
+
+    @classmethod
+    def performance(
+        cls, owner, start: date, end: date, property_ids=None, granularity="month"
+    ):
+        """Occupancy, ADR and RevPAR of the owner's properties per period.
+
+        ``granularity`` is ``day``, ``week`` or ``month``. Occupancy is rooms
+        sold over inventory (sold + unsold), ADR revenue per room sold and
+        RevPAR revenue per room in inventory.
+        """
+        property_ids = sorted(property_ids or [])
+
+        def compute():
+            rows = list(
+                cls.rollups_for(owner, start, end, property_ids)
+                .annotate(period=Trunc("date", granularity, output_field=DateField()))
+                .values("period")
+                .annotate(
+                    rooms_sold=Sum("rooms_sold"),
+                    rooms_available=Sum("rooms_available"),
+                    revenue=Sum("revenue"),
+                )
+                .order_by("period")
+            )
+            return {
+                "periods": [
+                    {
+                        "period": row["period"],
+                        **cls._metrics(
+                            row["rooms_sold"], row["rooms_available"], row["revenue"]
+                        ),
+                    }
+                    for row in rows
+                ],
+                "total": cls._metrics(
+                    sum(row["rooms_sold"] for row in rows),
+                    sum(row["rooms_available"] for row in rows),
+                    sum(row["revenue"] for row in rows),
+                ),
+            }
+
+        params = f"{start}:{end}:{granularity}:{','.join(map(str, property_ids))}"
+        return cls._cached(owner.id, "performance", params, compute)
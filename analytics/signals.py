@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.db.models.signals import post_delete, post_save
+
+from properties.models import Availability
+from reservations.models import Reservation, ReservationRoom
+
+from .services import RollupService
+
+
+def reservation_changed(sender, instance, **kwargs):
+    RollupService.schedule_refresh(
+        instance.property_id, instance.check_in, instance.check_out
+    )
+
+
+def reservation_room_changed(sender, instance, **kwargs):
+    reservation = instance.reservation
+    RollupService.schedule_refresh(
+        reservation.property_id, reservation.check_in, reservation.check_out
+    )
+
+
+def availability_changed(sender, instance, **kwargs):
+    RollupService.schedule_refresh(
+        instance.property_id, instance.date, instance.date + timedelta(days=1)
+    )
+
+
+def connect():
+    # Bulk writes (bulk_create, update) skip these; their callers schedule the
+    # refresh themselves
+    post_save.connect(
+        reservation_changed, sender=Reservation, dispatch_uid="rollup_reservation_save"
+    )
+    post_delete.connect(
+        reservation_changed,
+        sender=Reservation,
+        dispatch_uid="rollup_reservation_delete",
+    )
+    post_save.connect(
+        reservation_room_changed,
+        sender=ReservationRoom,
+        dispatch_uid="rollup_reservation_room_save",
+    )
+    post_delete.connect(
+        reservation_room_changed,
+        sender=ReservationRoom,
+        dispatch_uid="rollup_reservation_room_delete",
+    )
+    post_save.connect(
+        availability_changed,
+        sender=Availability,
+        dispatch_uid="rollup_availability_save",
+    )
+    post_delete.connect(
+        availability_changed,
+        sender=Availability,
+        dispatch_uid="rollup_availability_delete",
+    )
@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .services import RollupService
+
+
+@shared_task
+def refresh_daily_rollups(property_id: int, start: str, end: str):
+    """Rebuild the rollups of a property for the nights in [start, end)."""
+    RollupService.refresh(
+        property_id, date.fromisoformat(start), date.fromisoformat(end)
+    )
+
+
+@shared_task
+def reconcile_daily_rollups():
+    """Nightly rebuild of the recent past and the sellable horizon.
+
+    Catches changes the incremental refreshes missed (bulk updates, lost
+    tasks, raw SQL).
+    """
+    today = timezone.localdate()
+    refreshed = RollupService.refresh_all(
+        start=today - timedelta(days=settings.ANALYTICS_RECONCILE_DAYS_BACK),
+        end=today + timedelta(days=settings.ANALYTICS_RECONCILE_DAYS_AHEAD),
+    )
+    print(f"Resúmenes diarios conciliados para {refreshed} propiedades")
+    return refreshed
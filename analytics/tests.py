@@ -0,0 +1,178 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from properties.models import Availability, Property, RoomType
+from reservations.models import Reservation, ReservationRoom
+
+from .models import DailyRollup
+from .services import RollupService
+
+User = get_user_model()
+
+
+class RollupServiceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(username="owner", password="pass")
+        self.property = Property.objects.create(
+            owner=self.owner,
+            name="Hotel A",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+        )
+        self.other = Property.objects.create(
+            owner=self.owner,
+            name="Hotel B",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+        )
+        self.suite = RoomType.objects.create(property=self.property, name="Suite")
+        self.double = RoomType.objects.create(property=self.other, name="Double")
+
+    def _reservation(self, prop, room_type, check_in, check_out, price, status):
+        reservation = Reservation.objects.create(
+            property=prop, check_in=check_in, check_out=check_out, status=status
+        )
+        ReservationRoom.objects.create(
+            reservation=reservation, room_type=room_type, price=price
+        )
+        return reservation
+
+    def test_refresh_splits_revenue_per_night(self):
+        self._reservation(
+            self.property,
+            self.suite,
+            date(2030, 1, 1),
+            date(2030, 1, 4),
+            300,
+            Reservation.CONFIRMED,
+        )
+        self._reservation(
+            self.property,
+            self.suite,
+            date(2030, 1, 2),
+            date(2030, 1, 3),
+            500,
+            Reservation.PENDING,
+        )
+
+        RollupService.refresh(self.property.id, date(2030, 1, 1), date(2030, 2, 1))
+
+        rollups = DailyRollup.objects.filter(property=self.property).order_by("date")
+        self.assertEqual(
+            [(r.date.day, r.rooms_sold, r.revenue) for r in rollups],
+            [(day, 1, Decimal("100.00")) for day in (1, 2, 3)],
+        )
+
+    def test_revenue_pivot_is_cached_until_refresh(self):
+        self._reservation(
+            self.property,
+            self.suite,
+            date(2030, 1, 1),
+            date(2030, 1, 3),
+            200,
+            Reservation.CONFIRMED,
+        )
+        self._reservation(
+            self.other,
+            self.double,
+            date(2030, 1, 1),
+            date(2030, 1, 2),
+            80,
+            Reservation.OK,
+        )
+        RollupService.refresh_all()
+        start, end = date(2030, 1, 1), date(2031, 1, 1)
+
+        data = RollupService.revenue_by_room_type(self.owner, start, end)
+        self.assertEqual(data["labels"], ["Hotel A", "Hotel B"])
+        self.assertEqual(
+            data["datasets"],
+            [
+                {"label": "Double", "data": [0.0, 80.0]},
+                {"label": "Suite", "data": [200.0, 0.0]},
+            ],
+        )
+
+        # Cached until the rollups of the owner change
+        self._reservation(
+            self.other,
+            self.double,
+            date(2030, 1, 5),
+            date(2030, 1, 6),
+            20,
+            Reservation.CONFIRMED,
+        )
+        self.assertEqual(
+            RollupService.revenue_by_room_type(self.owner, start, end), data
+        )
+
+        RollupService.refresh(self.other.id, date(2030, 1, 5), date(2030, 1, 6))
+        data = RollupService.revenue_by_room_type(self.owner, start, end)
+        self.assertEqual(data["datasets"][0]["data"], [0.0, 100.0])
+
+    def test_performance_metrics(self):
+        self._reservation(
+            self.property,
+            self.suite,
+            date(2030, 1, 1),
+            date(2030, 1, 3),
+            200,
+            Reservation.CONFIRMED,
+        )
+        for day in (1, 2):
+            Availability.objects.create(
+                property=self.property,
+                room_type=self.suite,
+                date=date(2030, 1, day),
+                availability=3,
+            )
+        Availability.objects.create(
+            property=self.property,
+            room_type=self.suite,
+            date=date(2030, 2, 1),
+            availability=4,
+        )
+        RollupService.refresh(self.property.id, date(2030, 1, 1), date(2030, 3, 1))
+
+        data = RollupService.performance(self.owner, date(2030, 1, 1), date(2030, 3, 1))
+        january, february = data["periods"]
+        self.assertEqual(january["period"], date(2030, 1, 1))
+        self.assertEqual((january["rooms_sold"], january["rooms_available"]), (2, 6))
+        self.assertEqual(january["occupancy"], 0.25)
+        self.assertEqual(january["adr"], 100.0)
+        self.assertEqual(january["revpar"], 25.0)
+        self.assertEqual((february["rooms_sold"], february["occupancy"]), (0, 0.0))
+        self.assertEqual(data["total"]["revpar"], 16.67)
+
+
+class PerformanceApiTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(
+            username="staff", password="pass", is_staff=True
+        )
+        token = AccessToken.for_user(self.owner)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+    def test_performance(self):
+        response = self.client.get(
+            "/api/analytics/performance",
+            {"start": "2030-01-01", "end": "2031-01-01", "granularity": "week"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["periods"], [])
+
+    def test_invalid_range(self):
+        response = self.client.get(
+            "/api/analytics/performance",
+            {"start": "2030-01-01", "end": "2030-01-01"},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], 800)
@@ -0,0 +1,10 @@
+"""Performance benchmarks for the booking hot paths.
+
+Run them against the synthetic dataset::
+
+    python manage.py seed_synthetic --properties 1000 --reset
+    python manage.py run_benchmarks --output results.json
+
+Every case reports wall time, SQL query count and peak Python memory, and
+is compared against ``benchmarks/baseline.json``.
+"""
@@ -0,0 +1,252 @@
+"""Benchmark cases.
+
+Each case is a factory that prepares its inputs from the current database
+(normally filled with ``seed_synthetic``) and returns the callable to time.
+Cases that write data roll their transaction back after every call.
+"""
+
+import json
+import weakref
+from datetime import timedelta
+from unittest.mock import patch
+
+import psycopg
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from django.test import Client
+from psycopg_pool import ConnectionPool
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pms.utils import xml_backend
+from properties.models import Availability, Property
+from properties.schemas import AvailabilityRequest, PropertyOut
+from properties.services import PropertyService
+
+from . import fns_corpus
+from .runner import SkipCase
+
+CASES = {}
+
+
+def case(name):
+    def decorator(factory):
+        CASES[name] = factory
+        return factory
+
+    return decorator
+
+
+def _stay(nights):
+    """Property and check-in with availability rows for ``nights`` nights."""
+    first = (
+        Availability.objects.values("property_id")
+        .annotate(first_date=Min("date"), days=Count("date", distinct=True))
+        .filter(days__gte=nights + 1)
+        .order_by("property_id")
+        .first()
+    )
+    if first is None:
+        raise SkipCase(f"No property with {nights} nights of availability")
+    check_in = first["first_date"]
+    return first["property_id"], check_in, check_in + timedelta(days=nights)
+
+
+def _api_client(user=None):
+    client = Client(HTTP_X_APP_KEY=settings.PUBLIC_API_KEY)
+    if user is not None:
+        token = AccessToken.for_user(user)
+        client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+def _availability_case(nights, single_property):
+    def factory():
+        property_id, check_in, check_out = _stay(nights)
+        data = AvailabilityRequest(
+            property_id=property_id if single_property else None,
+            check_in=check_in,
+            check_out=check_out,
+            guests=1,
+        )
+        return lambda: PropertyService.get_availability(data)
+
+    return factory
+
+
+for _nights in (1, 7, 30):
+    case(f"availability_single_property_{_nights}n")(
+        _availability_case(_nights, single_property=True)
+    )
+    case(f"availability_all_properties_{_nights}n")(
+        _availability_case(_nights, single_property=False)
+    )
+
+
+def _reservation_batch_case(size):
+    def factory():
+        property_id, check_in, check_out = _stay(2)
+        room_type_ids = list(
+            Availability.objects.filter(
+                property_id=property_id,
+                date__gte=check_in,
+                date__lt=check_out,
+                availability__gte=size,
+            )
+            .values("room_type_id")
+            .annotate(nights=Count("id"))
+            .filter(nights=(check_out - check_in).days)
+            .values_list("room_type_id", flat=True)
+        )
+        if not room_type_ids:
+            raise SkipCase(f"No room type with {size} rooms free")
+        user, _ = get_user_model().objects.get_or_create(username="benchmark")
+        client = _api_client(user)
+        payload = {
+            "reservations": [
+                {
+                    "property_id": property_id,
+                    "channel": "web",
+                    "pax_count": 1,
+                    "currency": "EUR",
+                    "room_type": "benchmark",
+                    "room_type_id": room_type_ids[0],
+                    "rate_id": 1,
+                    "total_price": 100,
+                    "check_in": check_in.isoformat(),
+                    "check_out": check_out.isoformat(),
+                    "guest_name": "Benchmark",
+                    "guest_email": "benchmark@example.com",
+                }
+                for _ in range(size)
+            ]
+        }
+        body = json.dumps(payload)
+
+        def run():
+            with transaction.atomic():
+                response = client.post(
+                    "/api/reservations/", data=body, content_type="application/json"
+                )
+                transaction.set_rollback(True)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.content}")
+
+        return run
+
+    return factory
+
+
+for _size in (1, 5):
+    case(f"create_reservation_batch_{_size}")(_reservation_batch_case(_size))
+
+
+@case("property_out_list_100")
+def property_out_list():
+    if not Property.objects.exists():
+        raise SkipCase("No properties")
+
+    def run():
+        return [
+            PropertyOut.from_orm(prop).dict()
+            for prop in Property.objects.filter(active=True)[:100]
+        ]
+
+    return run
+
+
+@case("zones_listing")
+def zones_listing():
+    client = _api_client()
+
+    def run():
+        response = client.get("/api/zones/")
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    return run
+
+
+def _raw_connection_params():
+    if connection.vendor != "postgresql":
+        raise SkipCase("Needs PostgreSQL")
+    params = connection.get_connection_params()
+    params["autocommit"] = True
+    return params
+
+
+# What a request pays to get a connection and run a trivial query: a new
+# connection every time (DB_POOL_MODE=off), a checkout from a pool with its
+# health check (native) and an already open connection (persistent).
+@case("db_connection_per_request")
+def db_connection_per_request():
+    params = _raw_connection_params()
+
+    def run():
+        with psycopg.connect(**params) as conn:
+            conn.execute("SELECT 1")
+
+    return run
+
+
+@case("db_connection_pooled")
+def db_connection_pooled():
+    params = _raw_connection_params()
+    pool = ConnectionPool(
+        kwargs=params,
+        min_size=1,
+        max_size=1,
+        check=ConnectionPool.check_connection,
+        open=True,
+    )
+
+    def run():
+        with pool.connection() as conn:
+            conn.execute("SELECT 1")
+
+    weakref.finalize(run, pool.close)
+    return run
+
+
+@case("db_connection_persistent")
+def db_connection_persistent():
+    params = _raw_connection_params()
+    conn = psycopg.connect(**params)
+
+    def run():
+        conn.execute("SELECT 1")
+
+    weakref.finalize(run, conn.close)
+    return run
+
+
+def _parser_case(parser, size, backend):
+    def factory():
+        if backend not in xml_backend.available_backends():
+            raise SkipCase(f"XML backend {backend} is not installed")
+        payload = fns_corpus.corpus(size)[parser]
+        fromstring = xml_backend.get_backend(backend)
+
+        def run():
+            # Cheaper than override_settings, which would dominate small inputs
+            with patch.object(xml_backend, "fromstring", fromstring):
+                return fns_corpus.parse(parser, payload)
+
+        run.records = fns_corpus.record_count(parser, run())
+        return run
+
+    return factory
+
+
+for _parser in fns_corpus.PARSERS:
+    for _size in ("small", *fns_corpus.SIZES):
+        if _parser == "reservations":
+            case(f"fns_parse_{_parser}_{_size}")(
+                _parser_case(_parser, _size, xml_backend.STDLIB)
+            )
+            continue
+        for _backend in (xml_backend.STDLIB, xml_backend.LXML):
+            case(f"fns_parse_{_parser}_{_size}_{_backend}")(
+                _parser_case(_parser, _size, _backend)
+            )
@@ -0,0 +1,93 @@
+"""Payload corpus for the FNS parser benchmarks.
+
+``small`` is the hand-written fixture set in ``fixtures/fns`` (it covers the
+odd cases: empty rates, fallback client fields, rooms with
+``arrayHabitacion``). The larger sizes are generated deterministically with
+the PMS simulator payloads; ``year`` is a full year for a 200-room hotel.
+The fixture directory can also be served with ``run_fns_simulator
+--fixtures-dir``.
+"""
+
+import json
+import random
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+
+from pms.simulator import payloads
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "fns"
+START_DATE = date(2030, 1, 1)
+
+#: Generated sizes: days covered, room types, rooms per type, arrivals per day
+SIZES = {
+    "month": {"days": 30, "room_types": 4, "rooms_per_type": 10, "bookings": 5},
+    "year": {"days": 365, "room_types": 20, "rooms_per_type": 10, "bookings": 45},
+}
+
+PARSERS = (
+    "room_list",
+    "property_details",
+    "reservations",
+    "availability",
+    "rates_and_availability",
+)
+
+#: Stand-in for the property argument of ``_parse_reservations``
+PROPERTY = SimpleNamespace(id=1, name="Corpus")
+
+
+def _fixture(name):
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def corpus(size: str) -> dict:
+    """Return ``{parser: payload}`` for ``size`` (``small``, ``month``, ``year``)."""
+    if size == "small":
+        return {
+            "room_list": _fixture("getRoomList.xml"),
+            "property_details": _fixture("getProperties.xml"),
+            "reservations": json.loads(_fixture("getHotelBookingsJSON.json")),
+            "availability": _fixture("getAvailabilityRevenue.xml"),
+            "rates_and_availability": _fixture("getRates.xml"),
+        }
+
+    spec = SIZES[size]
+    rng = random.Random(f"fns-corpus-{size}")
+    end = START_DATE + timedelta(days=spec["days"] - 1)
+    room_types, rooms_per_type = spec["room_types"], spec["rooms_per_type"]
+    return {
+        "room_list": payloads.room_list_xml(rng, room_types, rooms_per_type),
+        "property_details": payloads.property_details_xml(rng, "corpus"),
+        "reservations": payloads.bookings(
+            rng, START_DATE, end, room_types, spec["bookings"]
+        ),
+        "availability": payloads.availability_revenue_xml(
+            rng, START_DATE, end, room_types, rooms_per_type
+        ),
+        "rates_and_availability": payloads.rates_xml(
+            rng, START_DATE, end, room_types, rooms_per_type
+        ),
+    }
+
+
+def parse(parser: str, payload):
+    """Run ``parser`` on ``payload`` and return its result."""
+    from pms.utils.helpers.FnsPropertyHelper import FnsPropertyHelper
+
+    if parser == "reservations":
+        return FnsPropertyHelper._parse_reservations(
+            payload, START_DATE, START_DATE, PROPERTY
+        )
+    return getattr(FnsPropertyHelper, f"_parse_{parser}")(payload)
+
+
+def record_count(parser: str, result) -> int:
+    """Number of records produced by ``parser`` (used for records/second)."""
+    if parser == "property_details":
+        return 1 if result else 0
+    if parser in ("room_list", "availability"):
+        return sum(len(items) for items in result.values())
+    return len(result)
@@ -0,0 +1,77 @@
+"""Concurrent HTTP load against a running server.
+
+Used to compare the WSGI and ASGI deployments: start the server in one mode
+(``SERVER_MODE=wsgi|asgi bin/production.sh`` or ``gunicorn``/``uvicorn``
+directly), point the PMS at the FNS simulator with some latency, and run the
+same load against each::
+
+    python manage.py run_fns_simulator --latency-ms 300
+    python manage.py run_http_load http://localhost:8000/api/properties/availability/ \\
+        --method POST --body '{"check_in": "2030-01-01", "check_out": "2030-01-03"}' \\
+        --concurrency 50 --requests 500 --label asgi
+"""
+
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def run_load(
+    url: str,
+    method: str = "GET",
+    body: str = None,
+    headers: dict = None,
+    concurrency: int = 10,
+    total_requests: int = 100,
+    timeout: float = 30,
+):
+    """Send ``total_requests`` requests with ``concurrency`` clients."""
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            local.session.headers.update(headers or {})
+        return local.session
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            response = session().request(method, url, data=body, timeout=timeout)
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        return status, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for _, ms in results]
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "url": url,
+        "method": method,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total_requests / elapsed, 1),
+        "latency_ms_p50": round(statistics.median(latencies), 1),
+        "latency_ms_p95": round(_percentile(latencies, 95), 1),
+        "latency_ms_max": round(max(latencies), 1),
+        "statuses": statuses,
+    }
@@ -0,0 +1,121 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+class SkipCase(Exception):
+    """Raised by a case setup when the dataset cannot support it."""
+
+
+def measure(func, repeat: int = 5, warmup: int = 1):
+    """Run ``func`` and return wall time, query count and peak memory.
+
+    When ``func`` has a ``records`` attribute (records handled per call) the
+    throughput is reported as ``records_per_second`` too.
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    queries = 0
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        _, iteration_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        timings.append(elapsed * 1000)
+        queries = len(captured.captured_queries)
+        peak = max(peak, iteration_peak)
+
+    result = {
+        "wall_ms_median": round(statistics.median(timings), 3),
+        "wall_ms_min": round(min(timings), 3),
+        "wall_ms_max": round(max(timings), 3),
+        "queries": queries,
+        "peak_memory_kib": round(peak / 1024, 1),
+        "repeat": repeat,
+    }
+    records = getattr(func, "records", None)
+    if records is not None:
+        result["records"] = records
+        result["records_per_second"] = round(
+            records / max(statistics.median(timings) / 1000, 1e-9), 1
+        )
+    return result
+
+
+def run(cases, repeat: int = 5, warmup: int = 1, only=None):
+    """Run the registered ``cases`` (optionally filtered by name prefix)."""
+    results = {}
+    for name, factory in cases.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        try:
+            func = factory()
+        except SkipCase as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        try:
+            results[name] = measure(func, repeat=repeat, warmup=warmup)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+        },
+        "results": results,
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with path.open() as f:
+        return json.load(f).get("results", {})
+
+
+def compare(results, baseline, tolerance: float = 0.2):
+    """Compare ``results`` with ``baseline``.
+
+    A case regresses when it issues more queries than the baseline or, if
+    the baseline has timings, when its median wall time grows more than
+    ``tolerance``. The committed baseline only keeps query counts, which do
+    not depend on the machine.
+    """
+    comparison = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if "queries" not in result or not base or "queries" not in base:
+            comparison[name] = {"status": "no_baseline"}
+            continue
+        regressions = []
+        ratio = None
+        if "wall_ms_median" in base:
+            ratio = round(result["wall_ms_median"] / base["wall_ms_median"], 3)
+            if ratio > 1 + tolerance:
+                regressions.append("wall_time")
+        if result["queries"] > base["queries"]:
+            regressions.append("queries")
+        comparison[name] = {
+            "status": "regression" if regressions else "ok",
+            "regressions": regressions,
+            "wall_ratio": ratio,
+            "queries_delta": result["queries"] - base["queries"],
+        }
+    return comparison
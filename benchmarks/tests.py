@@ -0,0 +1,72 @@
+from django.test import SimpleTestCase, TestCase
+
+from . import cases, runner
+
+
+class CompareTest(SimpleTestCase):
+    def test_regressions(self):
+        baseline = {
+            "fast": {"wall_ms_median": 10, "queries": 3},
+            "slow": {"wall_ms_median": 10, "queries": 3},
+        }
+        results = {
+            "fast": {"wall_ms_median": 11, "queries": 3},
+            "slow": {"wall_ms_median": 20, "queries": 5},
+            "new": {"wall_ms_median": 1, "queries": 1},
+        }
+        comparison = runner.compare(results, baseline, tolerance=0.2)
+        self.assertEqual(comparison["fast"]["status"], "ok")
+        self.assertEqual(comparison["slow"]["regressions"], ["wall_time", "queries"])
+        self.assertEqual(comparison["new"]["status"], "no_baseline")
+
+    def test_query_only_baseline(self):
+        baseline = {"case": {"queries": 3}}
+        comparison = runner.compare(
+            {"case": {"wall_ms_median": 500, "queries": 3}}, baseline
+        )
+        self.assertEqual(comparison["case"]["status"], "ok")
+        self.assertIsNone(comparison["case"]["wall_ratio"])
+        comparison = runner.compare(
+            {"case": {"wall_ms_median": 1, "queries": 4}}, baseline
+        )
+        self.assertEqual(comparison["case"]["regressions"], ["queries"])
+
+    def test_committed_baseline_covers_every_case(self):
+        baseline = runner.load_baseline()
+        self.assertEqual(set(baseline), set(cases.CASES))
+        for name, entry in baseline.items():
+            self.assertIsInstance(entry["queries"], int, name)
+
+
+class RunTest(TestCase):
+    def test_run_reports_measurements_and_skips(self):
+        def skipped():
+            raise runner.SkipCase("no data")
+
+        report = runner.run(
+            {"noop": lambda: (lambda: None), "skipped": skipped}, repeat=2, warmup=0
+        )
+        self.assertEqual(report["results"]["noop"]["queries"], 0)
+        self.assertIn("wall_ms_median", report["results"]["noop"])
+        self.assertEqual(report["results"]["skipped"], {"skipped": "no data"})
+
+
+class ParserCaseTest(TestCase):
+    def test_parser_case_reports_throughput(self):
+        func = cases.CASES["fns_parse_rates_and_availability_small_stdlib"]()
+        self.assertEqual(func.records, 3)
+        result = runner.measure(func, repeat=2, warmup=0)
+        self.assertEqual(result["records"], 3)
+        self.assertGreater(result["records_per_second"], 0)
+
+
+class ConnectionCaseTest(TestCase):
+    def test_connection_cases_run(self):
+        for name in (
+            "db_connection_per_request",
+            "db_connection_pooled",
+            "db_connection_persistent",
+        ):
+            with self.subTest(name):
+                result = runner.measure(cases.CASES[name](), repeat=2, warmup=0)
+                self.assertIn("wall_ms_median", result)
@@ -26,5 +26,18 @@ else:
     print("El superusuario ya existe.")
 EOF
 
-echo "Levantando servidor..."
-gunicorn core.wsgi:application --bind 0.0.0.0:8000 --workers 3
+# Métricas de Prometheus compartidas entre los workers de gunicorn
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# SERVER_MODE=asgi sirve las vistas async con workers de uvicorn: un worker
+# atiende muchas búsquedas concurrentes mientras espera al PMS o a la BD.
+echo "Levantando servidor (${SERVER_MODE:=wsgi})..."
+if [ "$SERVER_MODE" = "asgi" ]; then
+  gunicorn core.asgi:application --bind 0.0.0.0:8000 --workers "${WEB_WORKERS:-3}" \
+    --worker-class uvicorn.workers.UvicornWorker --config core/gunicorn_conf.py
+else
+  gunicorn core.wsgi:application --bind 0.0.0.0:8000 --workers "${WEB_WORKERS:-3}" \
+    --config core/gunicorn_conf.py
+fi
@@ -12,3 +12,7 @@ app = Celery("core")
 
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+from utils.metrics import connect_celery_signals  # noqa: E402
+
+connect_celery_signals()
@@ -0,0 +1,7 @@
+# gunicorn configuration used by bin/production.sh
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of dead workers from the Prometheus metrics
+    multiprocess.mark_process_dead(worker.pid)
@@ -10,10 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import copy
 import os
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 GDAL_LIBRARY_PATH = os.getenv("GDAL_LIBRARY_PATH", "/opt/homebrew/lib/libgdal.dylib")
@@ -49,11 +52,14 @@ LOCAL_APPS = [
     "pms",
     "customers",
     "vouchers",
+    "analytics",
 ]
 
 INSTALLED_APPS += LOCAL_APPS
 
 MIDDLEWARE = [
+    "utils.middleware.MetricsMiddleware",
+    "utils.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -107,6 +113,78 @@ DATABASES = {
     }
 }
 
+# Database connections, tuned per process type. DJANGO_PROCESS_TYPE is "web"
+# (gunicorn) or "worker" (Celery worker and beat). DB_POOL_MODE chooses how
+# connections are reused:
+#   native      psycopg pool per process; requests borrow a connection from it
+#   persistent  one connection per thread, kept for DB_CONN_MAX_AGE seconds
+#   pgbouncer   DB_HOST is a pgbouncer in transaction mode: no server-side
+#               cursors (Django already disables prepared statements)
+#   off         a new connection for every request or task
+# Celery prefork children run one task at a time, so a persistent connection
+# is all they need; web workers (threads under ASGI) share a pool.
+DJANGO_PROCESS_TYPE = os.getenv("DJANGO_PROCESS_TYPE", "web")
+_DB_PROCESS_DEFAULTS = {
+    "web": {"mode": "native", "min_size": "2", "max_size": "10"},
+    "worker": {"mode": "persistent", "min_size": "1", "max_size": "2"},
+}[DJANGO_PROCESS_TYPE]
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", _DB_PROCESS_DEFAULTS["mode"])
+if DB_POOL_MODE not in ("native", "persistent", "pgbouncer", "off"):
+    raise ValueError(f"Unknown DB_POOL_MODE: {DB_POOL_MODE}")
+
+# Broken connections are detected before use (the pool checks on checkout)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if DB_POOL_MODE == "native":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(
+                os.getenv("DB_POOL_MIN_SIZE", _DB_PROCESS_DEFAULTS["min_size"])
+            ),
+            "max_size": int(
+                os.getenv("DB_POOL_MAX_SIZE", _DB_PROCESS_DEFAULTS["max_size"])
+            ),
+            # Seconds a request waits for a free connection before failing
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            # Idle connections above min_size are closed after this many seconds
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        }
+    }
+elif DB_POOL_MODE in ("persistent", "pgbouncer"):
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+if DB_POOL_MODE == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# Read replicas for the public read endpoints (comma-separated host[:port],
+# same credentials as the primary). See utils.db_router.
+DATABASE_REPLICAS = []
+for _index, _replica in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(","))
+):
+    _host, _, _port = _replica.strip().partition(":")
+    _alias = f"replica_{_index + 1}"
+    DATABASES[_alias] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        # Tests only create the primary; replicas read from it
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(_alias)
+DATABASE_ROUTERS = ["utils.db_router.ReplicaRouter"]
+
+# Cache shared by all workers when CACHE_URL points at Redis
+# (e.g. redis://redis:6379/1); per-process memory otherwise.
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+        if os.getenv("CACHE_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -223,6 +301,94 @@ CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:63
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers.DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {
+    "pms-sync-due-windows": {
+        "task": "pms.tasks.sync_due_windows",
+        "schedule": 60.0,
+    },
+    "properties-release-expired-holds": {
+        "task": "properties.tasks.release_expired_holds",
+        "schedule": 60.0,
+    },
+    "analytics-reconcile-rollups": {
+        "task": "analytics.tasks.reconcile_daily_rollups",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
+
+# Seconds the owner analytics (admin dashboard) stay cached; any rollup change
+# of the owner's properties invalidates them earlier.
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+# Days before and after today rebuilt by the nightly rollup reconciliation
+ANALYTICS_RECONCILE_DAYS_BACK = int(os.getenv("ANALYTICS_RECONCILE_DAYS_BACK", "90"))
+ANALYTICS_RECONCILE_DAYS_AHEAD = int(os.getenv("ANALYTICS_RECONCILE_DAYS_AHEAD", "365"))
+# Longest range (days) accepted by the owner analytics API
+ANALYTICS_MAX_RANGE_DAYS = int(os.getenv("ANALYTICS_MAX_RANGE_DAYS", "731"))
+
+# Seconds a pending reservation holds its inventory while waiting for the
+# payment; expired holds are released by properties.tasks.release_expired_holds
+INVENTORY_HOLD_TTL = int(os.getenv("INVENTORY_HOLD_TTL", "900"))
+
+# Seconds a voucher/coupon code lookup stays cached; redemptions and edits of
+# the code invalidate it earlier
+PROMO_CODE_CACHE_TTL = int(os.getenv("PROMO_CODE_CACHE_TTL", "30"))
+
+# Admin lists above this many rows show the planner's estimated count instead
+# of running COUNT(*) (utils.paginator.EstimatedCountPaginator)
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
+# Slow-request / query-budget logging (utils.middleware.QueryBudgetMiddleware)
+QUERY_BUDGET_SAMPLE_RATE = float(os.getenv("QUERY_BUDGET_SAMPLE_RATE", "0.01"))
+QUERY_BUDGET_SLOW_MS = int(os.getenv("QUERY_BUDGET_SLOW_MS", "1000"))
+# Requests running more queries than this are logged as over budget
+QUERY_BUDGET_MAX_QUERIES = int(os.getenv("QUERY_BUDGET_MAX_QUERIES", "50"))
+QUERY_BUDGET_DUPLICATE_THRESHOLD = 5
+QUERY_BUDGET_TOP_STATEMENTS = 5
+QUERY_BUDGET_MAX_RECORDED_QUERIES = 1000
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+        "structured": {"class": "logging.StreamHandler", "formatter": "message"},
+    },
+    "root": {"handlers": ["console"], "level": "WARNING"},
+    "loggers": {
+        "query_budget": {
+            "handlers": ["structured"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+# PMS sync horizon. Each tier covers the stay dates in
+# [today + start_days, today + end_days) and is refreshed every
+# ``interval_minutes``.
+PMS_SYNC_TIERS = [
+    {"name": "near", "start_days": 0, "end_days": 14, "interval_minutes": 5},
+    {"name": "mid", "start_days": 14, "end_days": 90, "interval_minutes": 60},
+    {"name": "far", "start_days": 90, "end_days": 365, "interval_minutes": 60 * 24},
+]
+# Minutes before a tier whose last sync failed is tried again (never later
+# than its regular interval).
+PMS_SYNC_RETRY_MINUTES = int(os.getenv("PMS_SYNC_RETRY_MINUTES", "5"))
+CELERY_METRICS_QUEUES = ["celery"]
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "0"))
+
+# Bearer token for the Prometheus scrape endpoint (/metrics). Without it the
+# endpoint answers 403 unless DEBUG is on.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+PMS_SYNC_DEFAULT_HORIZON_DAYS = int(os.getenv("PMS_SYNC_DEFAULT_HORIZON_DAYS", "90"))
+
+# XML parser used for PMS payloads: "stdlib" (xml.etree) or "lxml" when the
+# optional lxml package is installed.
+PMS_XML_BACKEND = os.getenv("PMS_XML_BACKEND", "stdlib")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -238,8 +404,29 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Rate limits (utils.throttling). Without THROTTLE_REDIS_URL every process
+# keeps its own counters. A PMS sync triggered by an availability search
+# costs THROTTLE_PMS_SYNC_COST requests.
+THROTTLE_REDIS_URL = os.getenv("THROTTLE_REDIS_URL", "")
+THROTTLE_PMS_SYNC_COST = int(os.getenv("THROTTLE_PMS_SYNC_COST", "5"))
+
+# Concurrent PMS refreshes of an async availability search over all properties
+PMS_SYNC_CONCURRENCY = int(os.getenv("PMS_SYNC_CONCURRENCY", "4"))
+
+# Seconds a user resolved from a JWT stays cached (0 disables the cache).
+# Off without a shared CACHE_URL: a per-process cache could not be invalidated
+# from the process that changes the user.
+AUTH_USER_CACHE_TTL = (
+    int(os.getenv("AUTH_USER_CACHE_TTL", "60")) if os.getenv("CACHE_URL") else 0
+)
+
 PUBLIC_API_KEY = os.getenv("PUBLIC_API_KEY", "clave-larga-y-unica")
 
+# Page size of the cursor-paginated list endpoints (clients may ask for up to
+# the maximum with ?page_size=)
+NINJA_PAGINATION_PER_PAGE = int(os.getenv("API_PAGE_SIZE", "20"))
+NINJA_MAX_PER_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "100"))
+
 # EMAIL
 EMAIL_BACKEND = os.getenv(
     "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
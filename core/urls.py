@@ -18,15 +18,19 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from ninja import NinjaAPI
+from ninja.errors import Throttled
 
+from analytics.api import router as analytics_router
 from customers.api import customer_router
 from pms.api import router as pms_router
 from properties.api import router as properties_router
 from reservations.api import router as reservation_router
 from utils.auth_bearer import AuthBearer
 from utils.error_codes import APIError
+from utils.metrics import metrics_view, operation_name, record_throttle
 from utils.schemas import ErrorSchema
 from utils.security import PublicAPIKey
+from utils.throttling import retry_after_header
 from vouchers.api import router as voucher_router
 from zones.api import router as zones_router
 
@@ -42,8 +46,20 @@ def api_exception_handler(request, exc: APIError):
     )
 
 
+def throttled_exception_handler(request, exc: Throttled):
+    record_throttle(operation_name(request))
+    response = api.create_response(
+        request, {"detail": str(exc)}, status=exc.status_code
+    )
+    retry_after = retry_after_header(exc.wait)
+    if retry_after:
+        response["Retry-After"] = retry_after
+    return response
+
+
 api = NinjaAPI()
 api.add_exception_handler(APIError, api_exception_handler)
+api.add_exception_handler(Throttled, throttled_exception_handler)
 
 api.add_router(
     "/customers/",
@@ -76,8 +92,14 @@ api.add_router(
     pms_router,
     auth=public_auth,
 )
+api.add_router(
+    "/analytics/",
+    analytics_router,
+    auth=auth_bearer,
+)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", api.urls),
+    path("metrics", metrics_view, name="metrics_view"),
 ]
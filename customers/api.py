@@ -2,13 +2,13 @@ from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.core.signing import BadSignature, SignatureExpired
 from ninja import Router
-from ninja.throttling import UserRateThrottle
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 
 from customers.schemas import LoginIn, ProfileOut, RefreshTokenIn, TokenOut
 from utils import APIError, CustomerErrorCode, ErrorSchema, SuccessSchema
 from utils.auth_bearer import AuthBearer
 from utils.email_service import EmailService
+from utils.throttling import GCRAThrottle
 from utils.tokens import generate_activation_token, verify_activation_token
 
 UserModel = get_user_model()
@@ -18,7 +18,7 @@ customer_router = Router(tags=["customers"])
 @customer_router.post(
     "/signup",
     response={200: ProfileOut, 400: ErrorSchema},
-    throttle=[UserRateThrottle("5/m")],
+    throttle=[GCRAThrottle("5/m", scope="signup", key="ip")],
     auth=None,
 )
 def signup(request, data: LoginIn):
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+
+from utils.auth_bearer import invalidate_cached_user
+
+
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Drop the cached user used by ``AuthBearer`` after any change."""
+    invalidate_cached_user(instance.pk)
+
+
+def connect():
+    User = get_user_model()
+    post_save.connect(
+        invalidate_user_cache, sender=User, dispatch_uid="auth_user_cache_save"
+    )
+    post_delete.connect(
+        invalidate_user_cache, sender=User, dispatch_uid="auth_user_cache_delete"
+    )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import PMS
+from .models import PMS, PmsPendingChange, PmsSyncJob, PmsSyncRun, PmsSyncWindow
 
 
 @admin.register(PMS)
@@ -10,3 +10,74 @@ class PMSAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     ordering = ("-created_at",)
     list_per_page = 20
+
+
+@admin.register(PmsPendingChange)
+class PmsPendingChangeAdmin(admin.ModelAdmin):
+    list_display = ("property", "date", "reservations_changed", "updated_at")
+    list_filter = ("reservations_changed",)
+    list_select_related = ("property",)
+    search_fields = ("property__name",)
+    ordering = ("date",)
+    list_per_page = 20
+
+
+@admin.register(PmsSyncWindow)
+class PmsSyncWindowAdmin(admin.ModelAdmin):
+    list_display = ("property", "tier", "last_synced_at", "next_sync_at", "last_error")
+    list_filter = ("tier",)
+    list_select_related = ("property",)
+    search_fields = ("property__name",)
+    ordering = ("property", "tier")
+    list_per_page = 20
+
+
+@admin.register(PmsSyncRun)
+class PmsSyncRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "property",
+        "data_type",
+        "started_at",
+        "duration_ms",
+        "download_ms",
+        "parse_ms",
+        "diff_ms",
+        "write_ms",
+        "fetched",
+        "created",
+        "updated",
+        "skipped",
+        "payload_bytes",
+        "success",
+        "error_class",
+    )
+    list_filter = ("data_type", "success", "error_class")
+    list_select_related = ("property",)
+    search_fields = ("property__name",)
+    date_hierarchy = "started_at"
+    ordering = ("-started_at",)
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PmsSyncJob)
+class PmsSyncJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "property",
+        "status",
+        "current_stage",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    list_select_related = ("property", "requested_by")
+    search_fields = ("property__name",)
+    readonly_fields = ("stages", "error")
+    ordering = ("-created_at",)
+    list_per_page = 50
@@ -1,9 +1,14 @@
-from typing import List
+from typing import List, Optional
 
 from ninja import Router
 
+from utils import APIError, ErrorSchema, PmsErrorCode, SecurityErrorCode
+from utils.auth_bearer import AuthBearer
+from utils.security import PmsWebhookKey
+
 from .models import PMS
-from .schemas import PMSOut
+from .schemas import PmsNotificationIn, PmsNotificationOut, PMSOut, PmsSyncMetricsOut
+from .services import PmsChangeService, PmsSyncMetricsService
 
 router = Router(tags=["pms"])
 
@@ -12,3 +17,41 @@ router = Router(tags=["pms"])
 def list_pms(request):
     """Return all PMS with integration enabled"""
     return list(PMS.objects.filter(active=True, has_integration=True))
+
+
+@router.post(
+    "/{pms_key}/notifications/",
+    response={
+        202: PmsNotificationOut,
+        400: ErrorSchema,
+        403: ErrorSchema,
+        404: ErrorSchema,
+    },
+    auth=PmsWebhookKey(),
+)
+def pms_notifications(request, pms_key: str, payload: PmsNotificationIn):
+    """Queue availability, rate and reservation changes pushed by a PMS"""
+    if not PMS.objects.filter(pms_key=pms_key, active=True).exists():
+        raise APIError("PMS not found", PmsErrorCode.PMS_NOT_FOUND, 404)
+    prop = PmsChangeService.get_property(pms_key, payload.hotel_id)
+    queued = PmsChangeService.enqueue(prop, payload.changes)
+    return 202, {"queued_dates": queued}
+
+
+@router.get(
+    "/sync-runs/metrics/",
+    response={200: PmsSyncMetricsOut, 403: ErrorSchema},
+    auth=AuthBearer(),
+)
+def sync_run_metrics(
+    request,
+    hours: int = 24,
+    data_type: Optional[str] = None,
+    property_id: Optional[int] = None,
+):
+    """Aggregated timings and counters of recent PMS sync runs (staff only)"""
+    if not request.user.is_staff:
+        raise APIError("Access denied", SecurityErrorCode.ACCESS_DENIED, 403)
+    return PmsSyncMetricsService.summary(
+        hours=hours, data_type=data_type, property_id=property_id
+    )
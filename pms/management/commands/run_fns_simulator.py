@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+
+from pms.simulator import FnsSimulator, SimulatorConfig, serve
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local FNS Rooms simulator. Point PmsDataProperty.base_url at it "
+        "to sync or benchmark without the real PMS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--latency-ms", type=float, default=0)
+        parser.add_argument("--jitter-ms", type=float, default=0)
+        parser.add_argument(
+            "--error-rate", type=float, default=0, help="Fraction of 503 responses."
+        )
+        parser.add_argument(
+            "--rate-limit-rate",
+            type=float,
+            default=0,
+            help="Fraction of 429 responses.",
+        )
+        parser.add_argument("--retry-after", type=int, default=1)
+        parser.add_argument("--room-types", type=int, default=4)
+        parser.add_argument("--rooms-per-type", type=int, default=10)
+        parser.add_argument("--bookings-per-day", type=float, default=2)
+        parser.add_argument(
+            "--scale", type=float, default=1, help="Payload size multiplier."
+        )
+        parser.add_argument(
+            "--fixtures-dir",
+            default=None,
+            help="Serve recorded responses (e.g. getRates.xml) from this directory.",
+        )
+        parser.add_argument("--verbose-requests", action="store_true")
+
+    def handle(self, *args, **options):
+        config = SimulatorConfig(
+            seed=options["seed"],
+            latency_ms=options["latency_ms"],
+            latency_jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+            rate_limit_rate=options["rate_limit_rate"],
+            retry_after=options["retry_after"],
+            room_types=options["room_types"],
+            rooms_per_type=options["rooms_per_type"],
+            bookings_per_day=options["bookings_per_day"],
+            scale=options["scale"],
+            fixtures_dir=options["fixtures_dir"],
+        )
+        server = serve(
+            FnsSimulator(config),
+            host=options["host"],
+            port=options["port"],
+            quiet=not options["verbose_requests"],
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(
+            self.style.SUCCESS(f"Simulador FNS escuchando en http://{host}:{port}")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
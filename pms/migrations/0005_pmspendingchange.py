@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0004_set_pms_key_default'),
+        ('properties', '0015_room_services'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PmsPendingChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('room_types', models.JSONField(blank=True, default=dict)),
+                ('reservations_changed', models.BooleanField(default=False)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pms_pending_changes', to='properties.property')),
+            ],
+            options={
+                'verbose_name': 'PMS Pending Change',
+                'verbose_name_plural': 'PMS Pending Changes',
+                'db_table': 'pms_pending_change',
+                'ordering': ['property', 'date'],
+                'unique_together': {('property', 'date')},
+            },
+        ),
+    ]
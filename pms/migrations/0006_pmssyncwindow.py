@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0005_pmspendingchange'),
+        ('properties', '0015_room_services'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PmsSyncWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tier', models.CharField(max_length=50)),
+                ('next_sync_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pms_sync_windows', to='properties.property')),
+            ],
+            options={
+                'verbose_name': 'PMS Sync Window',
+                'verbose_name_plural': 'PMS Sync Windows',
+                'db_table': 'pms_sync_window',
+                'ordering': ['property', 'tier'],
+                'unique_together': {('property', 'tier')},
+            },
+        ),
+    ]
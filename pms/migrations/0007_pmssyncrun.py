@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0006_pmssyncwindow'),
+        ('properties', '0015_room_services'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PmsSyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_type', models.CharField(choices=[('rates_and_availability', 'Rates and availability'), ('reservations', 'Reservations'), ('rooms', 'Rooms'), ('property_detail', 'Property detail'), ('push', 'Push notifications')], max_length=50)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('download_ms', models.PositiveIntegerField(default=0)),
+                ('parse_ms', models.PositiveIntegerField(default=0)),
+                ('diff_ms', models.PositiveIntegerField(default=0)),
+                ('write_ms', models.PositiveIntegerField(default=0)),
+                ('fetched', models.PositiveIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('http_requests', models.PositiveIntegerField(default=0)),
+                ('payload_bytes', models.PositiveBigIntegerField(default=0)),
+                ('success', models.BooleanField(default=True)),
+                ('error_class', models.CharField(blank=True, default='', max_length=255)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pms_sync_runs', to='properties.property')),
+            ],
+            options={
+                'verbose_name': 'PMS Sync Run',
+                'verbose_name_plural': 'PMS Sync Runs',
+                'db_table': 'pms_sync_run',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['data_type', '-started_at'], name='pms_sync_ru_data_ty_e69df4_idx'), models.Index(fields=['property', '-started_at'], name='pms_sync_ru_propert_f8b879_idx')],
+            },
+        ),
+    ]
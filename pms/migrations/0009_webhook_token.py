@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pms", "0008_sync_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pms",
+            name="webhook_token",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
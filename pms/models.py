@@ -1,6 +1,9 @@
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
 
+User = get_user_model()
+
 
 class PMS(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -10,6 +13,9 @@ class PMS(models.Model):
         max_length=255, unique=True, blank=True, null=True
     )
     has_integration = models.BooleanField(default=False)
+    # Secret this PMS sends in X-PMS-TOKEN with its change notifications;
+    # notifications are rejected while it is empty
+    webhook_token = models.CharField(max_length=255, blank=True, default="")
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -57,3 +63,161 @@ class PMSDataResponse(models.Model):
 
     def __str__(self):
         return f"PMS Data Response for {self.pms.name} at {self.created_at}"
+
+
+class PmsPendingChange(models.Model):
+    """Coalesced PMS push notifications waiting to be applied.
+
+    There is a single row per property and date; later notifications for the
+    same day overwrite the values of earlier ones so the worker only applies
+    the latest known state.
+    """
+
+    property = models.ForeignKey(
+        "properties.Property",
+        on_delete=models.CASCADE,
+        related_name="pms_pending_changes",
+    )
+    date = models.DateField()
+    room_types = models.JSONField(default=dict, blank=True)
+    reservations_changed = models.BooleanField(default=False)
+    received_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "pms_pending_change"
+        verbose_name = "PMS Pending Change"
+        verbose_name_plural = "PMS Pending Changes"
+        ordering = ["property", "date"]
+        unique_together = ("property", "date")
+
+    def __str__(self):
+        return f"Pending PMS change for {self.property_id} on {self.date}"
+
+
+class PmsSyncWindow(models.Model):
+    """Last sync of a horizon tier (see ``settings.PMS_SYNC_TIERS``)."""
+
+    property = models.ForeignKey(
+        "properties.Property",
+        on_delete=models.CASCADE,
+        related_name="pms_sync_windows",
+    )
+    tier = models.CharField(max_length=50)
+    next_sync_at = models.DateTimeField(null=True, blank=True, default=None)
+    last_synced_at = models.DateTimeField(null=True, blank=True, default=None)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "pms_sync_window"
+        verbose_name = "PMS Sync Window"
+        verbose_name_plural = "PMS Sync Windows"
+        ordering = ["property", "tier"]
+        unique_together = ("property", "tier")
+
+    def __str__(self):
+        return f"{self.tier} sync window for {self.property_id}"
+
+
+class PmsSyncRun(models.Model):
+    """Timings and counters of a single PMS sync call."""
+
+    RATES_AND_AVAILABILITY = "rates_and_availability"
+    RESERVATIONS = "reservations"
+    ROOMS = "rooms"
+    PROPERTY_DETAIL = "property_detail"
+    PUSH = "push"
+
+    DATA_TYPE_CHOICES = [
+        (RATES_AND_AVAILABILITY, "Rates and availability"),
+        (RESERVATIONS, "Reservations"),
+        (ROOMS, "Rooms"),
+        (PROPERTY_DETAIL, "Property detail"),
+        (PUSH, "Push notifications"),
+    ]
+
+    property = models.ForeignKey(
+        "properties.Property",
+        on_delete=models.CASCADE,
+        related_name="pms_sync_runs",
+    )
+    data_type = models.CharField(max_length=50, choices=DATA_TYPE_CHOICES)
+    started_at = models.DateTimeField(auto_now_add=True)
+    duration_ms = models.PositiveIntegerField(default=0)
+    download_ms = models.PositiveIntegerField(default=0)
+    parse_ms = models.PositiveIntegerField(default=0)
+    diff_ms = models.PositiveIntegerField(default=0)
+    write_ms = models.PositiveIntegerField(default=0)
+    fetched = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    http_requests = models.PositiveIntegerField(default=0)
+    payload_bytes = models.PositiveBigIntegerField(default=0)
+    success = models.BooleanField(default=True)
+    error_class = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        db_table = "pms_sync_run"
+        verbose_name = "PMS Sync Run"
+        verbose_name_plural = "PMS Sync Runs"
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["data_type", "-started_at"]),
+            models.Index(fields=["property", "-started_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.data_type} sync of {self.property_id} at {self.started_at}"
+
+
+class PmsSyncJob(models.Model):
+    """A full PMS sync of a property requested from the admin.
+
+    Runs in a Celery task; ``stages`` holds the status and counters of each
+    stage so the admin can poll the progress.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    property = models.ForeignKey(
+        "properties.Property",
+        on_delete=models.CASCADE,
+        related_name="pms_sync_jobs",
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="pms_sync_jobs",
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    current_stage = models.CharField(max_length=50, blank=True, default="")
+    stages = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, default=None)
+    finished_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    class Meta:
+        db_table = "pms_sync_job"
+        verbose_name = "PMS Sync Job"
+        verbose_name_plural = "PMS Sync Jobs"
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["property", "-created_at"])]
+
+    def __str__(self):
+        return f"Sync job {self.pk} of {self.property_id} ({self.status})"
@@ -1,6 +1,7 @@
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 
-from ninja import Schema
+from ninja import Field, Schema
 
 
 class PMSOut(Schema):
@@ -12,3 +13,34 @@ class PMSOut(Schema):
     pms_external_id: Optional[str] = None
     has_integration: bool
     description: Optional[str] = None
+
+
+class PmsChangeIn(Schema):
+    """Single change pushed by a PMS.
+
+    ``date``/``end_date`` define an inclusive range of stay dates. Availability
+    and rate changes must include the PMS ``room_type`` identifier.
+    """
+
+    type: Literal["availability", "rates", "reservation"]
+    date: date
+    end_date: Optional[date] = None
+    room_type: Optional[str] = None
+    availability: Optional[int] = Field(default=None, ge=0)
+    rates: Optional[List[dict]] = None
+
+
+class PmsNotificationIn(Schema):
+    hotel_id: str
+    changes: List[PmsChangeIn] = Field(..., min_length=1)
+
+
+class PmsNotificationOut(Schema):
+    queued_dates: int
+
+
+class PmsSyncMetricsOut(Schema):
+    since: datetime
+    by_data_type: List[dict]
+    errors: List[dict]
+    slowest_properties: List[dict]
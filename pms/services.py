@@ -0,0 +1,423 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils import timezone
+
+from properties.models import PmsDataProperty, Property
+from properties.sync_service import SyncService
+from utils import APIError, PmsErrorCode, split_in_months
+
+from .models import PmsPendingChange, PmsSyncJob, PmsSyncRun, PmsSyncWindow
+from .utils.instrumentation import sync_run
+
+
+class PmsChangeService:
+    """Queue and apply changes pushed by PMS webhooks."""
+
+    MAX_RANGE_DAYS = 366
+
+    @staticmethod
+    def get_property(pms_key: str, hotel_id: str) -> Property:
+        prop = (
+            Property.objects.select_related("pms", "pms_data")
+            .filter(pms__pms_key=pms_key, pms_data__pms_hotel_identifier=hotel_id)
+            .first()
+        )
+        if prop is None:
+            raise APIError(
+                "No property linked to this hotel",
+                PmsErrorCode.PROPERTY_NOT_LINKED,
+                404,
+            )
+        return prop
+
+    @classmethod
+    def _expand(cls, changes):
+        """Group the incoming changes by stay date."""
+        by_date = {}
+        for change in changes:
+            end_date = change.end_date or change.date
+            if end_date < change.date:
+                raise APIError(
+                    "end_date cannot be before date",
+                    PmsErrorCode.INVALID_NOTIFICATION,
+                )
+            if (end_date - change.date).days >= cls.MAX_RANGE_DAYS:
+                raise APIError(
+                    "Change range is too large",
+                    PmsErrorCode.INVALID_NOTIFICATION,
+                )
+            if change.type != "reservation" and not change.room_type:
+                raise APIError(
+                    "room_type is required for availability and rate changes",
+                    PmsErrorCode.INVALID_NOTIFICATION,
+                )
+            if change.type == "availability" and change.availability is None:
+                raise APIError(
+                    "availability is required for availability changes",
+                    PmsErrorCode.INVALID_NOTIFICATION,
+                )
+            if change.type == "rates" and change.rates is None:
+                raise APIError(
+                    "rates are required for rate changes",
+                    PmsErrorCode.INVALID_NOTIFICATION,
+                )
+
+            day = change.date
+            while day <= end_date:
+                by_date.setdefault(day, []).append(change)
+                day += timedelta(days=1)
+        return by_date
+
+    @staticmethod
+    def _merge(row: PmsPendingChange, changes):
+        for change in changes:
+            if change.type == "reservation":
+                row.reservations_changed = True
+                continue
+            entry = row.room_types.setdefault(change.room_type, {})
+            if change.type == "availability":
+                entry["availability"] = change.availability
+            else:
+                entry["rates"] = change.rates
+
+    @classmethod
+    def enqueue(cls, prop: Property, changes) -> int:
+        """Merge ``changes`` into the pending rows of ``prop``.
+
+        Returns the number of distinct dates touched. The apply task is
+        scheduled once the rows are committed.
+        """
+        from .tasks import apply_pms_changes
+
+        by_date = cls._expand(changes)
+        with transaction.atomic():
+            for day, day_changes in sorted(by_date.items()):
+                row, _ = PmsPendingChange.objects.select_for_update().get_or_create(
+                    property=prop, date=day
+                )
+                cls._merge(row, day_changes)
+                row.save(
+                    update_fields=["room_types", "reservations_changed", "updated_at"]
+                )
+            transaction.on_commit(lambda: apply_pms_changes.delay(prop.id))
+        return len(by_date)
+
+    @classmethod
+    def apply_pending(cls, prop: Property, helper=None) -> int:
+        """Apply every pending change of ``prop`` and clear the queue.
+
+        Rows are deleted only if they were not updated while being applied,
+        so a notification arriving mid-run is picked up by the next run.
+        """
+        snapshot = list(PmsPendingChange.objects.filter(property=prop))
+        if not snapshot:
+            return 0
+
+        with sync_run(prop, PmsSyncRun.PUSH):
+            cls._apply_snapshot(prop, snapshot, helper)
+        return len(snapshot)
+
+    @staticmethod
+    def _apply_snapshot(prop: Property, snapshot, helper):
+        reservation_dates = [row.date for row in snapshot if row.reservations_changed]
+        # Without a helper the reservations cannot be fetched: their rows are
+        # kept so a later run retries them
+        keep_reservation_rows = bool(reservation_dates) and helper is None
+        if reservation_dates and helper is not None:
+            SyncService.sync_reservations(
+                prop,
+                helper,
+                checkin=min(reservation_dates),
+                checkout=max(reservation_dates),
+            )
+
+        rows = []
+        for pending in snapshot:
+            for room_type, values in pending.room_types.items():
+                rows.append(
+                    {
+                        "room_type": room_type,
+                        "date": pending.date.isoformat(),
+                        **values,
+                    }
+                )
+        if rows:
+            SyncService.upsert_rates_and_availability(prop, rows)
+
+        for pending in snapshot:
+            if keep_reservation_rows and pending.reservations_changed:
+                continue
+            PmsPendingChange.objects.filter(
+                pk=pending.pk, updated_at=pending.updated_at
+            ).delete()
+
+
+class PmsSyncScheduler:
+    """Keep each horizon tier of every PMS property fresh.
+
+    Tiers are read from ``settings.PMS_SYNC_TIERS``; dates close to today are
+    refreshed more often than the far future and the past is never fetched.
+    """
+
+    @staticmethod
+    def tiers():
+        return {tier["name"]: tier for tier in settings.PMS_SYNC_TIERS}
+
+    @staticmethod
+    def tier_range(tier, today=None):
+        """Return the inclusive ``(start, end)`` stay dates covered by ``tier``."""
+        today = today or timezone.localdate()
+        start = today + timedelta(days=tier["start_days"])
+        end = today + timedelta(days=tier["end_days"] - 1)
+        return start, end
+
+    @staticmethod
+    def syncable_properties():
+        """Properties with an active PMS and complete credentials."""
+        qs = Property.objects.filter(pms__isnull=False, pms__active=True)
+        for field in PmsDataProperty.SYNC_REQUIRED_FIELDS:
+            qs = qs.filter(~Q(**{f"pms_data__{field}": ""})).filter(
+                **{f"pms_data__{field}__isnull": False}
+            )
+        return qs
+
+    @classmethod
+    def ensure_windows(cls):
+        property_ids = cls.syncable_properties().values_list("id", flat=True)
+        PmsSyncWindow.objects.bulk_create(
+            [
+                PmsSyncWindow(property_id=property_id, tier=name)
+                for property_id in property_ids
+                for name in cls.tiers()
+            ],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def claim_due_windows(cls, now=None):
+        """Reserve the windows whose sync is due and return their ids.
+
+        The next due time is pushed forward with a conditional update so two
+        overlapping beat runs never dispatch the same window twice.
+        """
+        now = now or timezone.now()
+        tiers = cls.tiers()
+        cls.ensure_windows()
+        due = PmsSyncWindow.objects.filter(
+            tier__in=list(tiers),
+            property__in=cls.syncable_properties(),
+        ).filter(Q(next_sync_at__isnull=True) | Q(next_sync_at__lte=now))
+
+        claimed = []
+        for window in due:
+            interval = timedelta(minutes=tiers[window.tier]["interval_minutes"])
+            updated = PmsSyncWindow.objects.filter(
+                pk=window.pk, next_sync_at=window.next_sync_at
+            ).update(next_sync_at=now + interval)
+            if updated:
+                claimed.append(window.pk)
+        return claimed
+
+    @classmethod
+    def sync_window(cls, window: PmsSyncWindow, helper):
+        """Download rates and availability of ``window`` one month at a time.
+
+        ``last_synced_at`` only moves forward when every month was
+        downloaded; otherwise the failed months are kept in ``last_error``
+        and the window is retried after ``PMS_SYNC_RETRY_MINUTES``.
+        """
+        tier = cls.tiers()[window.tier]
+        start, end = cls.tier_range(tier)
+        failed = []
+        with sync_run(window.property, PmsSyncRun.RATES_AND_AVAILABILITY) as run:
+            for first_day, last_day in split_in_months(start, end):
+                synced = SyncService.sync_rates_and_availability(
+                    window.property, helper, checkin=first_day, checkout=last_day
+                )
+                if not synced:
+                    failed.append(first_day.strftime("%Y-%m"))
+
+        now = timezone.now()
+        if failed or not run.success:
+            window.last_error = (
+                "Sin datos de tarifas y disponibilidad para " f"{', '.join(failed)}"
+                if failed
+                else f"Error en la sincronización: {run.error_class}"
+            )
+            retry_at = now + timedelta(minutes=settings.PMS_SYNC_RETRY_MINUTES)
+            if window.next_sync_at is None or window.next_sync_at > retry_at:
+                window.next_sync_at = retry_at
+            window.save(update_fields=["last_error", "next_sync_at", "updated_at"])
+            return False
+
+        window.last_synced_at = now
+        window.last_error = ""
+        window.save(update_fields=["last_synced_at", "last_error", "updated_at"])
+        return True
+
+
+class PmsSyncJobService:
+    """Full PMS syncs requested from the admin, run as Celery jobs."""
+
+    #: (stage, SyncService method) in the order they run
+    STAGES = (
+        (PmsSyncRun.PROPERTY_DETAIL, "sync_property_detail"),
+        (PmsSyncRun.ROOMS, "sync_rooms"),
+        (PmsSyncRun.RESERVATIONS, "sync_reservations"),
+        (PmsSyncRun.RATES_AND_AVAILABILITY, "sync_rates_and_availability"),
+    )
+
+    @staticmethod
+    def sync_problem(prop: Property):
+        """Why ``prop`` cannot be synced, or ``None`` if it can."""
+        if not prop.pms_id:
+            return "La propiedad no tiene un PMS asociado."
+        pms_data = getattr(prop, "pms_data", None)
+        if pms_data is None:
+            return "La propiedad no tiene datos de PMS asociados."
+        missing = pms_data.missing_sync_fields()
+        if missing:
+            return (
+                f"Falta el campo {missing[0]} para sincronizar con pms {prop.pms.name}."
+            )
+        return None
+
+    @classmethod
+    def enqueue(cls, properties, user=None):
+        """Create a queued job per property and start them after commit."""
+        from .tasks import run_pms_sync_job
+
+        with transaction.atomic():
+            jobs = [
+                PmsSyncJob.objects.create(
+                    property=prop,
+                    requested_by=user,
+                    stages={stage: {"status": "pending"} for stage, _ in cls.STAGES},
+                )
+                for prop in properties
+            ]
+            job_ids = [job.id for job in jobs]
+
+            def start():
+                for job_id in job_ids:
+                    run_pms_sync_job.delay(job_id)
+
+            transaction.on_commit(start)
+        return jobs
+
+    @staticmethod
+    def _save(job: PmsSyncJob, *fields):
+        job.save(update_fields=list(fields))
+
+    @classmethod
+    def run(cls, job: PmsSyncJob, helper):
+        """Run every stage of ``job``, saving the progress after each step.
+
+        A missing property detail or an exception fails the job; other
+        stages without data are reported and the job goes on.
+        """
+        prop = job.property
+        job.status = PmsSyncJob.RUNNING
+        job.started_at = timezone.now()
+        cls._save(job, "status", "started_at")
+
+        for stage_name, method in cls.STAGES:
+            job.current_stage = stage_name
+            job.stages[stage_name] = {"status": "running"}
+            cls._save(job, "current_stage", "stages")
+
+            kwargs = {}
+            if stage_name == PmsSyncRun.RESERVATIONS:
+                kwargs["user"] = job.requested_by
+            try:
+                with sync_run(prop, stage_name) as run:
+                    synced = getattr(SyncService, method)(prop, helper, **kwargs)
+            except Exception as e:
+                job.stages[stage_name] = {"status": "failed", **run.counts}
+                job.status = PmsSyncJob.FAILED
+                job.error = f"{type(e).__name__}: {e}"
+                job.finished_at = timezone.now()
+                cls._save(job, "stages", "status", "error", "finished_at")
+                return job
+
+            job.stages[stage_name] = {
+                "status": "done" if synced else "empty",
+                **run.counts,
+            }
+            if not synced and stage_name == PmsSyncRun.PROPERTY_DETAIL:
+                job.status = PmsSyncJob.FAILED
+                job.error = f"No se encontraron detalles para la propiedad {prop.name}."
+                job.finished_at = timezone.now()
+                cls._save(job, "stages", "status", "error", "finished_at")
+                return job
+            cls._save(job, "stages")
+
+        if prop.pms_data.first_sync:
+            prop.pms_data.first_sync = False
+            prop.pms_data.save(update_fields=["first_sync"])
+
+        job.status = PmsSyncJob.SUCCEEDED
+        job.current_stage = ""
+        job.finished_at = timezone.now()
+        cls._save(job, "status", "current_stage", "finished_at")
+        return job
+
+    @staticmethod
+    def progress(job: PmsSyncJob) -> dict:
+        return {
+            "id": job.id,
+            "property": job.property.name,
+            "status": job.status,
+            "current_stage": job.current_stage,
+            "stages": job.stages,
+            "error": job.error,
+            "finished": job.status in (PmsSyncJob.SUCCEEDED, PmsSyncJob.FAILED),
+        }
+
+
+class PmsSyncMetricsService:
+    """Aggregations over ``PmsSyncRun`` used by the staff metrics endpoint."""
+
+    STAGE_FIELDS = ("duration_ms", "download_ms", "parse_ms", "diff_ms", "write_ms")
+    COUNT_FIELDS = ("fetched", "created", "updated", "skipped", "payload_bytes")
+
+    @classmethod
+    def summary(cls, hours: int = 24, data_type=None, property_id=None):
+        since = timezone.now() - timedelta(hours=hours)
+        runs = PmsSyncRun.objects.filter(started_at__gte=since)
+        if data_type:
+            runs = runs.filter(data_type=data_type)
+        if property_id:
+            runs = runs.filter(property_id=property_id)
+
+        aggregates = {
+            "runs": Count("id"),
+            "failures": Count("id", filter=Q(success=False)),
+        }
+        for field in cls.STAGE_FIELDS:
+            aggregates[f"avg_{field}"] = Avg(field)
+            aggregates[f"max_{field}"] = Max(field)
+        for field in cls.COUNT_FIELDS:
+            aggregates[f"total_{field}"] = Sum(field)
+
+        by_type = runs.values("data_type").annotate(**aggregates).order_by("data_type")
+        errors = (
+            runs.exclude(error_class="")
+            .values("data_type", "error_class")
+            .annotate(count=Count("id"))
+            .order_by("-count")
+        )
+        slowest = (
+            runs.values("property_id", "property__name", "data_type")
+            .annotate(avg_duration_ms=Avg("duration_ms"), runs=Count("id"))
+            .order_by("-avg_duration_ms")[:10]
+        )
+        return {
+            "since": since,
+            "by_data_type": list(by_type),
+            "errors": list(errors),
+            "slowest_properties": list(slowest),
+        }
@@ -0,0 +1,10 @@
+"""Local stand-in for the FNS Rooms PMS API.
+
+Serves generated (or recorded) payloads for the endpoints used by
+``FnsPropertyHelper`` with configurable latency, errors and rate limiting,
+so syncs can be tested and benchmarked without the real host.
+"""
+
+from .server import FnsSimulator, SimulatorConfig, serve
+
+__all__ = ["FnsSimulator", "SimulatorConfig", "serve"]
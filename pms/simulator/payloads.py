@@ -0,0 +1,183 @@
+"""Payload generators shaped like the FNS Rooms responses."""
+
+import json
+import random
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+ROOM_TYPE_NAMES = ["Doble", "Individual", "Triple", "Suite", "Familiar", "Estudio"]
+CHANNELS = ["Booking.com", "Expedia", "Web", "Teléfono"]
+
+
+def _days(start: date, end: date):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def room_list_xml(rng: random.Random, room_types: int, rooms_per_type: int) -> str:
+    rooms = []
+    for type_id in range(1, room_types + 1):
+        type_name = f"{ROOM_TYPE_NAMES[(type_id - 1) % len(ROOM_TYPE_NAMES)]} {type_id}"
+        for number in range(1, rooms_per_type + 1):
+            rooms.append(
+                "<room>"
+                f"<id>{type_id * 1000 + number}</id>"
+                f"<nombre>Habitación {type_id}{number:02d}</nombre>"
+                f"<tipo_habitacion_id>{type_id}</tipo_habitacion_id>"
+                f"<tipo_habitacion_nombre>{escape(type_name)}</tipo_habitacion_nombre>"
+                "</room>"
+            )
+    return f"<?xml version='1.0' encoding='UTF-8'?><rooms>{''.join(rooms)}</rooms>"
+
+
+def property_details_xml(rng: random.Random, hotel_id: str) -> str:
+    latitude = round(rng.uniform(36.0, 43.5), 6)
+    longitude = round(rng.uniform(-9.0, 3.0), 6)
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?><properties><property>"
+        f"<id>{rng.randint(1, 99999)}</id>"
+        f"<name> Hotel {escape(hotel_id)} </name>"
+        "<address>"
+        f"<component name='addr1'> Calle Mayor {rng.randint(1, 200)} </component>"
+        "<component name='city'> Madrid </component>"
+        "<component name='province'> Madrid </component>"
+        f"<component name='postal_code'> 28{rng.randint(0, 999):03d} </component>"
+        "</address>"
+        "<country>ES</country>"
+        f"<latitude>{latitude}</latitude><longitude>{longitude}</longitude>"
+        f"<phone>+34 91{rng.randint(1000000, 9999999)}</phone>"
+        "<category> Hotel </category>"
+        "</property></properties>"
+    )
+
+
+def rates_xml(
+    rng: random.Random,
+    start: date,
+    end: date,
+    room_types: int,
+    rooms_per_type: int,
+    rates_per_type: int = 2,
+    max_occupancy: int = 3,
+) -> str:
+    days = []
+    for day in _days(start, end):
+        for type_id in range(1, room_types + 1):
+            rates = []
+            for rate_id in range(1, rates_per_type + 1):
+                base = rng.uniform(50, 250) * (0.9 if rate_id > 1 else 1)
+                prices = "".join(
+                    "<priceOccupancy>"
+                    f"<occupancy>{occupancy}</occupancy>"
+                    f"<price>{base * (1 + 0.15 * (occupancy - 1)):.2f}</price>"
+                    "</priceOccupancy>"
+                    for occupancy in range(1, max_occupancy + 1)
+                )
+                rates.append(
+                    f"<rate><rate_id>{rate_id}</rate_id><prices>{prices}</prices>"
+                    "<restrictions>"
+                    f"<minStay>{rng.choice([1, 1, 1, 2, 3])}</minStay>"
+                    f"<closed>{int(rng.random() < 0.05)}</closed>"
+                    "</restrictions></rate>"
+                )
+            days.append(
+                "<dayAvailibityRoomType>"
+                f"<roomType>{type_id}</roomType>"
+                f"<availability>{rng.randint(0, rooms_per_type)}</availability>"
+                f"<date>{day.isoformat()}</date>"
+                f"<rates>{''.join(rates)}</rates>"
+                "</dayAvailibityRoomType>"
+            )
+    return f"<?xml version='1.0' encoding='UTF-8'?><rates>{''.join(days)}</rates>"
+
+
+def availability_revenue_xml(
+    rng: random.Random, start: date, end: date, room_types: int, rooms_per_type: int
+) -> str:
+    cells = []
+    for day in _days(start, end):
+        total_free = 0
+        for type_id in range(1, room_types + 1):
+            occupancy = rng.randint(0, rooms_per_type)
+            total_free += rooms_per_type - occupancy
+            cells.append(
+                "<th>"
+                f"<roomTypeID>{type_id}</roomTypeID><day>{day:%d/%m/%Y}</day>"
+                f"<totalRooms>{rooms_per_type}</totalRooms>"
+                f"<occupancy>{occupancy}</occupancy>"
+                "</th>"
+            )
+        total_rooms = room_types * rooms_per_type
+        cells.append(
+            "<th>"
+            f"<roomTypeID>0</roomTypeID><day>{day:%d/%m/%Y}</day>"
+            f"<totalRooms>{total_rooms}</totalRooms>"
+            f"<occupancy>{total_rooms - total_free}</occupancy>"
+            "</th>"
+        )
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?><root><hotelRevenues><revenue>"
+        f"{''.join(cells)}"
+        "</revenue></hotelRevenues></root>"
+    )
+
+
+def bookings(
+    rng: random.Random,
+    start: date,
+    end: date,
+    room_types: int,
+    bookings_per_day: float,
+) -> dict:
+    items = []
+    number_of_days = (end - start).days + 1
+    for i in range(int(number_of_days * bookings_per_day)):
+        arrival = start + timedelta(days=rng.randrange(number_of_days))
+        nights = rng.randint(1, 7)
+        occupancy = rng.randint(1, 3)
+        total = round(rng.uniform(60, 250) * nights, 2)
+        paid = round(total * rng.choice([0, 0.2, 1]), 2)
+        items.append(
+            {
+                "reservation_id": str(100000 + i),
+                "alojamiento_id": "1",
+                "localizador": f"SIM{rng.randint(100000, 999999)}",
+                "channel": rng.choice(CHANNELS),
+                "channel_id": rng.randint(1, 20),
+                "status": "confirmed",
+                "date_arrival": arrival.isoformat(),
+                "date_departure": (arrival + timedelta(days=nights)).isoformat(),
+                "creation_date": start.isoformat(),
+                "cancellation_date": "",
+                "modification_date": "0000-00-00 00:00:00",
+                "currency": "EUR",
+                "paid_online": str(paid),
+                "pay_on_arrival": str(round(total - paid, 2)),
+                "total_price": str(total),
+                "client_corporate": "",
+                "client_name": f"Huésped {i}",
+                "client_email": f"guest{i}@example.com",
+                "client_telephone": f"6{rng.randint(10000000, 99999999)}",
+                "client_address": "Calle Falsa 123",
+                "client_city": "Madrid",
+                "client_region": "Madrid",
+                "client_country": "España",
+                "client_countryiso": "ES",
+                "client_cp": "28001",
+                "client_remarks": "",
+                "rooms": [
+                    {
+                        "room_type_id": str(rng.randint(1, room_types)),
+                        "rate_id": "1",
+                        "occupancy": str(occupancy),
+                    }
+                ],
+            }
+        )
+    return {"bookings": {"booking": items}}
+
+
+def bookings_json(*args, **kwargs) -> str:
+    return json.dumps(bookings(*args, **kwargs))
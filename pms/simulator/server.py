@@ -0,0 +1,202 @@
+import hashlib
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import date, timedelta
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from . import payloads
+
+XML = "text/xml; charset=utf-8"
+JSON = "application/json"
+
+
+class SimulatorConfig:
+    """Behaviour of the simulated FNS host.
+
+    ``scale`` multiplies the number of room types and bookings so payload
+    sizes can be dialled up without touching every option.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency_ms: float = 0,
+        latency_jitter_ms: float = 0,
+        error_rate: float = 0,
+        rate_limit_rate: float = 0,
+        retry_after: int = 1,
+        room_types: int = 4,
+        rooms_per_type: int = 10,
+        bookings_per_day: float = 2,
+        scale: float = 1,
+        fixtures_dir=None,
+    ):
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.room_types = max(1, round(room_types * scale))
+        self.rooms_per_type = rooms_per_type
+        self.bookings_per_day = bookings_per_day * scale
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir else None
+
+
+def _parse_date(value, default):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class FnsSimulator:
+    """WSGI application mimicking the FNS endpoints used by the helper.
+
+    Payloads depend only on the seed and the request parameters, so the
+    same request always gets the same body. Latency, 5xx errors and 429
+    responses are drawn from a separate seeded sequence.
+
+    Only the last ``MAX_RECORDED_REQUESTS`` requests are kept in
+    ``requests``; ``request_counts`` counts every request per path.
+    """
+
+    MAX_RECORDED_REQUESTS = 1000
+
+    def __init__(self, config: SimulatorConfig = None):
+        self.config = config or SimulatorConfig()
+        self._fault_rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.requests = deque(maxlen=self.MAX_RECORDED_REQUESTS)
+        self.request_counts = Counter()
+        self.routes = {
+            "/getRoomList.php": self.room_list,
+            "/getProperties.php": self.property_details,
+            "/getHotelBookingsJSON.php": self.bookings,
+            "/getRates.php": self.rates,
+            "/getAvailabilityRevenue.php": self.availability_revenue,
+        }
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        params = {
+            key: values[0]
+            for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()
+        }
+        with self._lock:
+            self.requests.append((path, params))
+            self.request_counts[path] += 1
+            latency = self.config.latency_ms + self._fault_rng.uniform(
+                0, self.config.latency_jitter_ms
+            )
+            fault = self._fault_rng.random()
+
+        if latency:
+            time.sleep(latency / 1000)
+
+        handler = self.routes.get(path)
+        if handler is None:
+            return self._respond(start_response, "404 Not Found", JSON, '{"error": 1}')
+        if fault < self.config.rate_limit_rate:
+            return self._respond(
+                start_response,
+                "429 Too Many Requests",
+                JSON,
+                '{"error": "rate limited", "message": "Too many requests"}',
+                [("Retry-After", str(self.config.retry_after))],
+            )
+        if fault < self.config.rate_limit_rate + self.config.error_rate:
+            return self._respond(
+                start_response,
+                "503 Service Unavailable",
+                JSON,
+                '{"error": "unavailable", "message": "Simulated failure"}',
+            )
+
+        recorded = self._recorded(path)
+        if recorded is not None:
+            content_type, body = recorded
+        else:
+            content_type, body = handler(self._rng(path, params), params)
+        return self._respond(start_response, "200 OK", content_type, body)
+
+    def _rng(self, path, params):
+        key = f"{self.config.seed}|{path}|{sorted(params.items())}"
+        return random.Random(int(hashlib.sha256(key.encode()).hexdigest()[:16], 16))
+
+    def _recorded(self, path):
+        if self.config.fixtures_dir is None:
+            return None
+        name = path.strip("/").removesuffix(".php")
+        for suffix, content_type in ((".xml", XML), (".json", JSON)):
+            candidate = self.config.fixtures_dir / f"{name}{suffix}"
+            if candidate.exists():
+                return content_type, candidate.read_text()
+        return None
+
+    @staticmethod
+    def _respond(start_response, status, content_type, body, headers=()):
+        data = body.encode("utf-8")
+        start_response(
+            status,
+            [("Content-Type", content_type), ("Content-Length", str(len(data)))]
+            + list(headers),
+        )
+        return [data]
+
+    def _range(self, params, start_key, end_key):
+        today = date.today()
+        start = _parse_date(params.get(start_key), today)
+        end = _parse_date(params.get(end_key), start + timedelta(days=30))
+        return start, end
+
+    def room_list(self, rng, params):
+        return XML, payloads.room_list_xml(
+            rng, self.config.room_types, self.config.rooms_per_type
+        )
+
+    def property_details(self, rng, params):
+        return XML, payloads.property_details_xml(rng, params.get("hotel_pms_id", "1"))
+
+    def bookings(self, rng, params):
+        start, end = self._range(params, "date_start", "date_end")
+        return JSON, payloads.bookings_json(
+            rng, start, end, self.config.room_types, self.config.bookings_per_day
+        )
+
+    def rates(self, rng, params):
+        start, end = self._range(params, "start_date", "end_date")
+        return XML, payloads.rates_xml(
+            rng, start, end, self.config.room_types, self.config.rooms_per_type
+        )
+
+    def availability_revenue(self, rng, params):
+        start, end = self._range(params, "start_date", "end_date")
+        return XML, payloads.availability_revenue_xml(
+            rng, start, end, self.config.room_types, self.config.rooms_per_type
+        )
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(app: FnsSimulator, host: str = "127.0.0.1", port: int = 0, quiet=True):
+    """Create a threaded server for ``app``; ``port=0`` picks a free port."""
+    return make_server(
+        host,
+        port,
+        app,
+        server_class=ThreadingWSGIServer,
+        handler_class=QuietHandler if quiet else WSGIRequestHandler,
+    )
@@ -9,25 +9,22 @@ from properties.sync_service import SyncService
 
 @shared_task
 def sync_fns_data():
-    props = Property.objects.all()
+    """Sync reservations of every PMS property.
+
+    Rates and availability are refreshed by ``sync_due_windows``.
+    """
+    props = Property.objects.select_related("pms", "pms_data").filter(pms__isnull=False)
     for prop in props:
         try:
-            _continue = True
-            necesary_fields = [
-                "pms_token",
-                "pms_hotel_identifier",
-                "pms_username",
-                "pms_password",
-                "email",
-                "phone_number",
-                "base_url",
-            ]
-            for field in necesary_fields:
-                if not getattr(prop.pms_data, field):
-                    print(f"Falta el campo {field} en la propiedad {prop.name}")
-                    _continue = False
-
-            if not _continue:
+            pms_data = getattr(prop, "pms_data", None)
+            if pms_data is None:
+                print(f"La propiedad {prop.name} no tiene datos del PMS")
+                continue
+
+            missing = pms_data.missing_sync_fields()
+            for field in missing:
+                print(f"Falta el campo {field} en la propiedad {prop.name}")
+            if missing:
                 continue
 
             print(f"Descargando info de {prop.name}...")
@@ -40,17 +37,104 @@ def sync_fns_data():
             # Procesar reservas
             SyncService.sync_reservations(prop, helper)
 
-            # Procesar tarifas y disponibilidad
-            SyncService.sync_rates_and_availability(prop, helper)
-
-            if prop.pms_data.first_sync:
-                prop.pms_data.first_sync = False
-                prop.pms_data.save()
+            if pms_data.first_sync:
+                pms_data.first_sync = False
+                pms_data.save()
 
             print(f"Información de {prop.name} descargada correctamente.")
-            return None
 
         except Exception as e:
             print(f"Error procesando propiedad {prop.name}: {e}")
-            return None
     return None
+
+
+@shared_task
+def apply_pms_changes(property_id):
+    """Apply the coalesced PMS push notifications of a property."""
+    from pms.services import PmsChangeService
+
+    prop = (
+        Property.objects.select_related("pms", "pms_data")
+        .filter(id=property_id)
+        .first()
+    )
+    if prop is None:
+        return 0
+
+    helper = None
+    if prop.pms is not None:
+        try:
+            helper = PMSHelperFactory().get_helper(prop)
+        except ValueError as e:
+            print(f"No se encontró un helper para la propiedad {prop.name}: {e}")
+
+    applied = PmsChangeService.apply_pending(prop, helper)
+    print(f"Aplicados {applied} cambios del PMS en {prop.name}")
+    return applied
+
+
+@shared_task
+def sync_due_windows():
+    """Dispatch the PMS sync windows whose refresh interval has elapsed."""
+    from pms.services import PmsSyncScheduler
+
+    window_ids = PmsSyncScheduler.claim_due_windows()
+    for window_id in window_ids:
+        sync_pms_window.delay(window_id)
+    return len(window_ids)
+
+
+@shared_task
+def sync_pms_window(window_id):
+    """Download rates and availability for one property horizon tier."""
+    from pms.models import PmsSyncWindow
+    from pms.services import PmsSyncScheduler
+
+    window = (
+        PmsSyncWindow.objects.select_related(
+            "property", "property__pms", "property__pms_data"
+        )
+        .filter(id=window_id)
+        .first()
+    )
+    if window is None:
+        return None
+
+    prop = window.property
+    try:
+        helper = PMSHelperFactory().get_helper(prop)
+        PmsSyncScheduler.sync_window(window, helper)
+    except Exception as e:
+        print(f"Error sincronizando {window.tier} de {prop.name}: {e}")
+        window.last_error = str(e)
+        window.save(update_fields=["last_error", "updated_at"])
+    return None
+
+
+@shared_task
+def run_pms_sync_job(job_id):
+    """Run a full PMS sync requested from the admin (``PmsSyncJob``)."""
+    from pms.models import PmsSyncJob
+    from pms.services import PmsSyncJobService
+
+    job = (
+        PmsSyncJob.objects.select_related(
+            "property", "property__pms", "property__pms_data", "requested_by"
+        )
+        .filter(id=job_id, status=PmsSyncJob.QUEUED)
+        .first()
+    )
+    if job is None:
+        return None
+
+    try:
+        helper = PMSHelperFactory().get_helper(job.property)
+    except ValueError as e:
+        job.status = PmsSyncJob.FAILED
+        job.error = str(e)
+        job.save(update_fields=["status", "error"])
+        return job.status
+
+    job = PmsSyncJobService.run(job, helper)
+    print(f"Sincronización {job.id} de {job.property.name}: {job.status}")
+    return job.status
@@ -1,9 +1,29 @@
+import json
+import threading
+from datetime import date, timedelta
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
 
-from properties.models import Property
+from benchmarks import fns_corpus
+from properties.models import Availability, PmsDataProperty, Property, RoomType
+from properties.sync_service import SyncService
 
-from .models import PMS, PMSDataResponse
+from .models import (
+    PMS,
+    PMSDataResponse,
+    PmsPendingChange,
+    PmsSyncJob,
+    PmsSyncRun,
+    PmsSyncWindow,
+)
+from .services import PmsChangeService, PmsSyncJobService, PmsSyncScheduler
+from .simulator import FnsSimulator, SimulatorConfig, serve
+from .utils import xml_backend
 
 User = get_user_model()
 
@@ -84,3 +104,513 @@ class PMSAPITest(TestCase):
         data = response.json()
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["name"], "Integrated PMS")
+
+
+class PmsNotificationAPITest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="owner3", password="pass")
+        self.pms = PMS.objects.create(
+            name="Push PMS",
+            pms_key="fnsrooms",
+            has_integration=True,
+            webhook_token="pms-secret",
+        )
+        self.property = Property.objects.create(
+            owner=self.user,
+            name="Push Property",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+            pms=self.pms,
+        )
+        PmsDataProperty.objects.create(
+            property=self.property, pms_hotel_identifier="H1"
+        )
+        self.room_type = RoomType.objects.create(
+            property=self.property, name="Double", external_id="RT1"
+        )
+        self.url = "/api/pms/fnsrooms/notifications/"
+
+    def _post(self, payload, token="pms-secret"):
+        return self.client.post(
+            self.url,
+            data=json.dumps(payload),
+            content_type="application/json",
+            HTTP_X_PMS_TOKEN=token,
+        )
+
+    def test_invalid_token(self):
+        response = self._post({"hotel_id": "H1", "changes": []}, token="wrong")
+        self.assertEqual(response.status_code, 403)
+        response = self._post({"hotel_id": "H1", "changes": []}, token="contraseña")
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_of_another_pms(self):
+        PMS.objects.create(name="Other PMS", pms_key="other", webhook_token="other")
+        response = self._post({"hotel_id": "H1", "changes": []}, token="other")
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_hotel(self):
+        response = self._post(
+            {
+                "hotel_id": "H2",
+                "changes": [{"type": "reservation", "date": "2030-01-01"}],
+            }
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["code"], 601)
+
+    @patch("pms.tasks.apply_pms_changes.delay")
+    def test_changes_are_coalesced(self, mock_delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post(
+                {
+                    "hotel_id": "H1",
+                    "changes": [
+                        {
+                            "type": "availability",
+                            "date": "2030-01-01",
+                            "end_date": "2030-01-02",
+                            "room_type": "RT1",
+                            "availability": 3,
+                        },
+                        {
+                            "type": "availability",
+                            "date": "2030-01-01",
+                            "room_type": "RT1",
+                            "availability": 1,
+                        },
+                        {"type": "reservation", "date": "2030-01-02"},
+                    ],
+                }
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["queued_dates"], 2)
+        first = PmsPendingChange.objects.get(date=date(2030, 1, 1))
+        self.assertEqual(first.room_types, {"RT1": {"availability": 1}})
+        self.assertFalse(first.reservations_changed)
+        self.assertTrue(
+            PmsPendingChange.objects.get(date=date(2030, 1, 2)).reservations_changed
+        )
+        mock_delay.assert_called_once_with(self.property.id)
+
+    def test_missing_room_type(self):
+        response = self._post(
+            {
+                "hotel_id": "H1",
+                "changes": [{"type": "rates", "date": "2030-01-01", "rates": []}],
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], 602)
+
+    def test_apply_pending_upserts_availability(self):
+        Availability.objects.create(
+            property=self.property,
+            room_type=self.room_type,
+            date=date(2030, 1, 1),
+            availability=5,
+            rates=json.dumps([{"rate_id": 1}]),
+        )
+        PmsPendingChange.objects.create(
+            property=self.property,
+            date=date(2030, 1, 1),
+            room_types={"RT1": {"availability": 2}},
+        )
+        PmsPendingChange.objects.create(
+            property=self.property,
+            date=date(2030, 1, 2),
+            room_types={"RT1": {"rates": [{"rate_id": 2}]}},
+            reservations_changed=True,
+        )
+        helper = MagicMock()
+        helper.download_reservations.return_value = []
+
+        applied = PmsChangeService.apply_pending(self.property, helper)
+
+        self.assertEqual(applied, 2)
+        availability = Availability.objects.get(date=date(2030, 1, 1))
+        self.assertEqual(availability.availability, 2)
+        self.assertEqual(json.loads(availability.rates), [{"rate_id": 1}])
+        # Rates without a known availability cannot create a new row
+        self.assertFalse(Availability.objects.filter(date=date(2030, 1, 2)).exists())
+        helper.download_reservations.assert_called_once_with(
+            self.property, checkin=date(2030, 1, 2), checkout=date(2030, 1, 2)
+        )
+        self.assertFalse(PmsPendingChange.objects.exists())
+
+    def test_reservation_changes_are_kept_without_helper(self):
+        PmsPendingChange.objects.create(
+            property=self.property,
+            date=date(2030, 1, 1),
+            room_types={"RT1": {"availability": 2}},
+        )
+        PmsPendingChange.objects.create(
+            property=self.property, date=date(2030, 1, 2), reservations_changed=True
+        )
+
+        PmsChangeService.apply_pending(self.property, helper=None)
+
+        self.assertEqual(
+            list(PmsPendingChange.objects.values_list("date", flat=True)),
+            [date(2030, 1, 2)],
+        )
+
+
+@override_settings(
+    PMS_SYNC_TIERS=[
+        {"name": "near", "start_days": 0, "end_days": 14, "interval_minutes": 5},
+        {"name": "far", "start_days": 14, "end_days": 90, "interval_minutes": 60},
+    ]
+)
+class PmsSyncSchedulerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="owner4", password="pass")
+        self.pms = PMS.objects.create(name="Sched PMS", pms_key="fnsrooms")
+        self.property = Property.objects.create(
+            owner=self.user,
+            name="Sched Property",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+            pms=self.pms,
+        )
+        self.pms_data = PmsDataProperty.objects.create(
+            property=self.property,
+            base_url="http://pms",
+            email="pms@example.com",
+            phone_number="600000000",
+            pms_token="token",
+            pms_hotel_identifier="H1",
+            pms_username="user",
+            pms_password="pass",
+        )
+
+    def test_missing_sync_fields(self):
+        self.assertEqual(self.pms_data.missing_sync_fields(), [])
+        self.pms_data.pms_token = ""
+        self.assertEqual(self.pms_data.missing_sync_fields(), ["pms_token"])
+
+    def test_claim_due_windows_once_per_interval(self):
+        now = timezone.now()
+        claimed = PmsSyncScheduler.claim_due_windows(now)
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(PmsSyncScheduler.claim_due_windows(now), [])
+
+        later = now + timedelta(minutes=6)
+        claimed = PmsSyncScheduler.claim_due_windows(later)
+        self.assertEqual(
+            list(
+                PmsSyncWindow.objects.filter(id__in=claimed).values_list(
+                    "tier", flat=True
+                )
+            ),
+            ["near"],
+        )
+
+    def test_incomplete_properties_are_skipped(self):
+        self.pms_data.pms_password = None
+        self.pms_data.save()
+        self.assertEqual(PmsSyncScheduler.claim_due_windows(), [])
+
+    @patch("pms.services.SyncService.sync_rates_and_availability")
+    def test_sync_window_chunks_by_month(self, mock_sync):
+        window = PmsSyncWindow.objects.create(property=self.property, tier="far")
+        PmsSyncScheduler.sync_window(window, helper=MagicMock())
+
+        start, end = PmsSyncScheduler.tier_range(PmsSyncScheduler.tiers()["far"])
+        calls = [c.kwargs for c in mock_sync.call_args_list]
+        self.assertEqual(calls[0]["checkin"], start)
+        self.assertEqual(calls[-1]["checkout"], end)
+        for call in calls:
+            self.assertEqual(call["checkin"].month, call["checkout"].month)
+        window.refresh_from_db()
+        self.assertIsNotNone(window.last_synced_at)
+
+
+class PmsSyncRunTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="owner5", password="pass")
+        self.property = Property.objects.create(
+            owner=self.user,
+            name="Run Property",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+        )
+        PmsDataProperty.objects.create(property=self.property)
+        RoomType.objects.create(
+            property=self.property, name="Double", external_id="RT9"
+        )
+        self.helper = MagicMock()
+        self.helper.download_rates_and_availability.return_value = [
+            {"room_type": "RT9", "date": "2030-01-01", "availability": 2, "rates": []},
+            {"room_type": "RT9", "date": "2030-01-02", "availability": 1, "rates": []},
+            {"room_type": "UNKNOWN", "date": "2030-01-01", "availability": 1},
+        ]
+
+    def test_run_records_counts(self):
+        SyncService.sync_rates_and_availability(self.property, self.helper)
+        run = PmsSyncRun.objects.get()
+        self.assertEqual(run.data_type, PmsSyncRun.RATES_AND_AVAILABILITY)
+        self.assertEqual(run.fetched, 3)
+        self.assertEqual(run.created, 2)
+        self.assertEqual(run.skipped, 1)
+        self.assertTrue(run.success)
+
+        SyncService.sync_rates_and_availability(self.property, self.helper)
+        run = PmsSyncRun.objects.first()
+        self.assertEqual(run.created, 0)
+        self.assertEqual(run.skipped, 3)
+
+    def test_run_records_error_class(self):
+        self.helper.download_rates_and_availability.side_effect = KeyError("boom")
+        with self.assertRaises(KeyError):
+            SyncService.sync_rates_and_availability(self.property, self.helper)
+        run = PmsSyncRun.objects.get()
+        self.assertFalse(run.success)
+        self.assertEqual(run.error_class, "KeyError")
+
+    def test_metrics_endpoint_requires_staff(self):
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(
+            "/api/pms/sync-runs/metrics/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_endpoint(self):
+        SyncService.sync_rates_and_availability(self.property, self.helper)
+        self.user.is_staff = True
+        self.user.save()
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(
+            "/api/pms/sync-runs/metrics/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["by_data_type"]
+        self.assertEqual(data[0]["data_type"], PmsSyncRun.RATES_AND_AVAILABILITY)
+        self.assertEqual(data[0]["runs"], 1)
+        self.assertEqual(data[0]["total_created"], 2)
+
+
+class PmsSyncJobTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="owner6", password="pass", is_staff=True, is_superuser=True
+        )
+        self.pms = PMS.objects.create(name="Job PMS", pms_key="fnsrooms")
+        self.property = Property.objects.create(
+            owner=self.user,
+            name="Job Property",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+            pms=self.pms,
+        )
+        PmsDataProperty.objects.create(
+            property=self.property,
+            **{field: "x" for field in PmsDataProperty.SYNC_REQUIRED_FIELDS},
+        )
+        RoomType.objects.create(
+            property=self.property, name="Double", external_id="RT9"
+        )
+        self.helper = MagicMock()
+        self.helper.download_rates_and_availability.return_value = [
+            {"room_type": "RT9", "date": "2030-01-01", "availability": 2, "rates": []},
+        ]
+
+    def _job(self):
+        (job,) = PmsSyncJobService.enqueue([self.property], self.user)
+        return job
+
+    @patch.object(SyncService, "sync_reservations", return_value=False)
+    @patch.object(SyncService, "sync_rooms", return_value=True)
+    @patch.object(SyncService, "sync_property_detail", return_value=True)
+    def test_job_reports_each_stage(self, *mocks):
+        job = PmsSyncJobService.run(self._job(), self.helper)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PmsSyncJob.SUCCEEDED)
+        self.assertEqual(job.stages[PmsSyncRun.ROOMS]["status"], "done")
+        self.assertEqual(job.stages[PmsSyncRun.RESERVATIONS]["status"], "empty")
+        availability = job.stages[PmsSyncRun.RATES_AND_AVAILABILITY]
+        self.assertEqual((availability["fetched"], availability["created"]), (1, 1))
+        self.property.pms_data.refresh_from_db()
+        self.assertFalse(self.property.pms_data.first_sync)
+
+    @patch.object(SyncService, "sync_rooms", side_effect=KeyError("boom"))
+    @patch.object(SyncService, "sync_property_detail", return_value=True)
+    def test_job_stops_on_error(self, *mocks):
+        job = PmsSyncJobService.run(self._job(), self.helper)
+
+        self.assertEqual(job.status, PmsSyncJob.FAILED)
+        self.assertEqual(job.stages[PmsSyncRun.ROOMS]["status"], "failed")
+        self.assertEqual(job.stages[PmsSyncRun.RESERVATIONS], {"status": "pending"})
+        self.assertIn("KeyError", job.error)
+
+    @patch("pms.tasks.run_pms_sync_job.delay")
+    def test_admin_button_enqueues_job(self, mock_delay):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(
+                f"/admin/properties/property/{self.property.id}/sync-pms/"
+            )
+
+        job = PmsSyncJob.objects.get()
+        mock_delay.assert_called_once_with(job.id)
+        self.assertRedirects(
+            response,
+            f"/admin/properties/property/sync-jobs/?ids={job.id}",
+            fetch_redirect_response=False,
+        )
+        response = self.client.get(
+            "/admin/properties/property/sync-jobs/",
+            {"ids": str(job.id), "format": "json"},
+        )
+        self.assertEqual(response.json()["jobs"][0]["status"], PmsSyncJob.QUEUED)
+
+
+class FnsSimulatorTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="owner6", password="pass")
+        self.pms = PMS.objects.create(
+            name="Sim PMS", pms_key="fnsrooms", pms_external_id="1"
+        )
+        self.property = Property.objects.create(
+            owner=self.user,
+            name="Sim Property",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+            pms=self.pms,
+        )
+        self.pms_data = PmsDataProperty.objects.create(
+            property=self.property,
+            pms_token="token",
+            pms_hotel_identifier="H1",
+            pms_username="user",
+            pms_password="pass",
+        )
+        for external_id in ("1", "2"):
+            RoomType.objects.create(
+                property=self.property,
+                name=f"Sim {external_id}",
+                external_id=external_id,
+            )
+
+    def _start(self, **config):
+        simulator = FnsSimulator(SimulatorConfig(room_types=2, **config))
+        server = serve(simulator)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        self.pms_data.base_url = f"http://{host}:{port}"
+        self.pms_data.save()
+        return simulator
+
+    def _sync(self):
+        from pms.utils.helpers.FnsPropertyHelper import FnsPropertyHelper
+
+        return SyncService.sync_rates_and_availability(
+            self.property,
+            FnsPropertyHelper(self.property),
+            checkin=date(2030, 1, 1),
+            checkout=date(2030, 1, 5),
+        )
+
+    def test_sync_rates_from_simulator(self):
+        simulator = self._start(seed=7)
+        self.assertTrue(self._sync())
+        self.assertEqual(
+            Availability.objects.filter(property=self.property).count(), 10
+        )
+        self.assertEqual(simulator.requests[0][0], "/getRates.php")
+        self.assertEqual(simulator.requests[0][1]["start_date"], "2030-01-01")
+        self.assertEqual(simulator.request_counts["/getRates.php"], 1)
+
+        run = PmsSyncRun.objects.get()
+        self.assertEqual(run.http_requests, 1)
+        self.assertEqual(run.created, 10)
+
+    def test_payloads_are_deterministic(self):
+        simulator = FnsSimulator(SimulatorConfig(seed=3))
+        params = {"start_date": "2030-01-01", "end_date": "2030-01-03"}
+        rng = simulator._rng("/getRates.php", params)
+        first = simulator.rates(rng, params)
+        second = simulator.rates(simulator._rng("/getRates.php", params), params)
+        self.assertEqual(first, second)
+
+    def test_rate_limited_sync_fails_gracefully(self):
+        self._start(rate_limit_rate=1)
+        self.assertFalse(self._sync())
+        self.assertFalse(Availability.objects.filter(property=self.property).exists())
+        self.assertFalse(PmsSyncRun.objects.get().success)
+
+    def test_failed_window_sync_keeps_last_synced_at(self):
+        from pms.utils.helpers.FnsPropertyHelper import FnsPropertyHelper
+
+        self._start(seed=7, error_rate=1)
+        synced_at = timezone.now() - timedelta(days=1)
+        window = PmsSyncWindow.objects.create(
+            property=self.property,
+            tier="far",
+            last_synced_at=synced_at,
+            next_sync_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertFalse(
+            PmsSyncScheduler.sync_window(window, FnsPropertyHelper(self.property))
+        )
+
+        window.refresh_from_db()
+        self.assertEqual(window.last_synced_at, synced_at)
+        self.assertIn("Sin datos", window.last_error)
+        self.assertLessEqual(window.next_sync_at, timezone.now() + timedelta(minutes=5))
+        self.assertFalse(PmsSyncRun.objects.get().success)
+
+
+class FnsParserTest(SimpleTestCase):
+    def test_parsers_on_fixture_corpus(self):
+        payloads = fns_corpus.corpus("small")
+
+        rooms = fns_corpus.parse("room_list", payloads["room_list"])
+        self.assertEqual(sorted(rooms), [1, 2, 3])
+        self.assertEqual(rooms[2][0]["external_room_type_name"], "Suite & Terraza")
+
+        details = fns_corpus.parse("property_details", payloads["property_details"])
+        self.assertEqual(details["pms_property_city"], "Salamanca")
+        self.assertEqual(details["pms_property_category"], "hotel")
+
+        reservations = fns_corpus.parse("reservations", payloads["reservations"])
+        self.assertIsNone(reservations[0]["modification_date"])
+        self.assertEqual(reservations[1]["guest_email"], "marc@example.com")
+        self.assertEqual(reservations[1]["rooms"][0]["external_id"], "201")
+
+        availability = fns_corpus.parse("availability", payloads["availability"])
+        self.assertEqual(availability["total"], {"2030-01-01": 3, "2030-01-02": 1})
+
+        rates = fns_corpus.parse(
+            "rates_and_availability", payloads["rates_and_availability"]
+        )
+        # Days without rates are skipped
+        self.assertEqual(len(rates), 3)
+        self.assertEqual(rates[0]["rates"][1]["prices"][1]["price"], 85.95)
+        self.assertEqual(rates[2]["rates"][0]["restrictions"], {})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            xml_backend.get_backend("sax")
+
+    @skipUnless(xml_backend.LXML in xml_backend.available_backends(), "lxml")
+    def test_backends_produce_identical_output(self):
+        for size in ("small", "month"):
+            payloads = fns_corpus.corpus(size)
+            for parser in fns_corpus.PARSERS:
+                if parser == "reservations":
+                    continue
+                results = []
+                for backend in xml_backend.available_backends():
+                    with override_settings(PMS_XML_BACKEND=backend):
+                        results.append(fns_corpus.parse(parser, payloads[parser]))
+                self.assertEqual(results[0], results[1], f"{parser} ({size})")
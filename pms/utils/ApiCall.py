@@ -4,6 +4,7 @@ from requests import HTTPError, Session
 
 from .AbstractConnectionManager import AbstractConnectionManager
 from .errors import PmsAccessDenied, PmsBadRequest, PmsNotFound, PmsUnauthorized
+from .instrumentation import record_http, stage
 
 
 class ApiCall(AbstractConnectionManager):
@@ -40,6 +41,11 @@ class ApiCall(AbstractConnectionManager):
             self._session.headers.update(authorization)
 
     def _action(self, req, **kwargs):
+        record_http(len(req.content or b""))
+        with stage("parse"):
+            return self._handle_response(req, **kwargs)
+
+    def _handle_response(self, req, **kwargs):
         content_type = req.headers.get("Content-Type")
         try:
             if "application/json" in content_type:
@@ -104,7 +110,8 @@ class ApiCall(AbstractConnectionManager):
             params = {}
 
         print(f"Action: Get and url: {self._api_prefix + url}")
-        req = self._session.get(self._api_prefix + url, params=params)
+        with stage("download"):
+            req = self._session.get(self._api_prefix + url, params=params)
 
         return self._action(req, **kwargs)
 
@@ -118,7 +125,8 @@ class ApiCall(AbstractConnectionManager):
         # kwargs.pop('use_api_v1', None)
         # todo arreglar para cuando se intente enviar precios y el token haya expirado
         # TODO mantener la logica, que haga re-login y siga con lo que le toca.
-        req = self._session.post(self._api_prefix + url, data=data, **kwargs)
+        with stage("download"):
+            req = self._session.post(self._api_prefix + url, data=data, **kwargs)
         return self._action(req, **kwargs)
 
     def _put(self, url, data=None, **kwargs):
@@ -127,10 +135,12 @@ class ApiCall(AbstractConnectionManager):
             data = {}
 
         print(f"Action: Put and url: {self._api_prefix + url}")
-        req = self._session.put(self._api_prefix + url, data=data)
+        with stage("download"):
+            req = self._session.put(self._api_prefix + url, data=data)
         return self._action(req, **kwargs)
 
     def _delete(self, url, **kwargs):
         """Wrapper around request.delete() to use the API prefix. Returns a JSON response."""
-        req = self._session.delete(self._api_prefix + url)
+        with stage("download"):
+            req = self._session.delete(self._api_prefix + url)
         return self._action(req, **kwargs)
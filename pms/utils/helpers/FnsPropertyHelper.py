@@ -1,15 +1,19 @@
 import calendar
 import json
 import time
-import xml.etree.ElementTree as ET
 from collections import defaultdict
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Union
 
+from django.conf import settings
+
 from pms.models import PMSDataResponse
+from pms.utils import xml_backend
 from pms.utils.AuthApi import AuthApi
 from pms.utils.helpers.base import BasePropertyHelper
+from pms.utils.instrumentation import record_error, timed_stage
 from properties.models import Property
+from utils import split_in_months
 
 
 class FnsPropertyHelper(BasePropertyHelper):
@@ -61,6 +65,7 @@ class FnsPropertyHelper(BasePropertyHelper):
                 api_call._get(url="/getRoomList.php", params=params)
             )
         except Exception as e:
+            record_error(e)
             print(f"Error downloading getRoomList: {e}")
             return {}
 
@@ -123,6 +128,7 @@ class FnsPropertyHelper(BasePropertyHelper):
             )
             return all_reservations
         except Exception as e:
+            record_error(e)
             print(f"Error downloading getReservations: {e}")
             return {}
 
@@ -152,6 +158,7 @@ class FnsPropertyHelper(BasePropertyHelper):
             )
             return self._parse_property_details(response)
         except Exception as e:
+            record_error(e)
             print(f"Error downloading getPropertyDetails: {e}")
             return {}
 
@@ -181,6 +188,7 @@ class FnsPropertyHelper(BasePropertyHelper):
             )
             return availability
         except Exception as e:
+            record_error(e)
             print(f"Error downloading getAvailability: {e}")
             return {}
 
@@ -222,18 +230,15 @@ class FnsPropertyHelper(BasePropertyHelper):
                     start_date, end_date, api_call, prop
                 )
             else:
-                for month in range(1, today.month + 1):
-                    if start_date is None:
-                        start_date = date(today.year, month, 1)
-
-                    first_day = date(today.year, month, 1)
-                    last_day = date(
-                        today.year, month, calendar.monthrange(today.year, month)[1]
-                    )
+                # Sin fechas, descargamos el horizonte futuro mes a mes
+                start_date = today
+                end_date = today + timedelta(
+                    days=settings.PMS_SYNC_DEFAULT_HORIZON_DAYS
+                )
+                for first_day, last_day in split_in_months(start_date, end_date):
                     monthly_rates = self._get_rates_and_availability_for_range(
                         first_day, last_day, api_call, prop
                     )
-                    end_date = last_day
                     all_rates.extend(monthly_rates)
                     time.sleep(2)
 
@@ -247,13 +252,18 @@ class FnsPropertyHelper(BasePropertyHelper):
             )
             return all_rates
         except Exception as e:
+            record_error(e)
             print(f"Error downloading getRates: {e}")
             return {}
 
     # PARSE METHODS
-    def _parse_room_list(self, xml_string: str):
+    # Pure functions of the payload, so they can be benchmarked and tested
+    # without a property or an API client.
+    @staticmethod
+    @timed_stage("parse")
+    def _parse_room_list(xml_string: str):
         # Parseamos el XML
-        root = ET.fromstring(xml_string)
+        root = xml_backend.fromstring(xml_string)
 
         # Extraemos los datos
         rooms = defaultdict(list)
@@ -269,8 +279,10 @@ class FnsPropertyHelper(BasePropertyHelper):
 
         return dict(rooms)
 
-    def _parse_property_details(self, xml_string: str) -> Dict[str, str]:
-        root = ET.fromstring(xml_string)
+    @staticmethod
+    @timed_stage("parse")
+    def _parse_property_details(xml_string: str) -> Dict[str, str]:
+        root = xml_backend.fromstring(xml_string)
 
         property = root.find(".//property")
         if property is None:
@@ -332,8 +344,10 @@ class FnsPropertyHelper(BasePropertyHelper):
         )
         return self._parse_rates_and_availability(response)
 
+    @staticmethod
+    @timed_stage("parse")
     def _parse_reservations(
-        self, response, start_date: datetime, end_date: datetime, prop: Property
+        response, start_date: datetime, end_date: datetime, prop: Property
     ) -> List[Dict[str, Union[str, Dict]]]:
         reservations = []
 
@@ -451,12 +465,14 @@ class FnsPropertyHelper(BasePropertyHelper):
 
         return reservations
 
-    def _parse_availability(self, xml_string_availability):
+    @staticmethod
+    @timed_stage("parse")
+    def _parse_availability(xml_string_availability):
         # Parse the XML
         try:
             # TODO revisar los caracteres especiales
             xml_string = xml_string_availability.replace("&", " ")
-            root = ET.fromstring(xml_string)
+            root = xml_backend.fromstring(xml_string)
 
             result = {}
 
@@ -481,11 +497,14 @@ class FnsPropertyHelper(BasePropertyHelper):
             result["total"] = result.pop("0")
             return result
         except Exception as e:
+            record_error(e)
             print(f"Error parsing availability XML: {e}")
             return {}
 
-    def _parse_rates_and_availability(self, xml_string: str):
-        root = ET.fromstring(xml_string)
+    @staticmethod
+    @timed_stage("parse")
+    def _parse_rates_and_availability(xml_string: str):
+        root = xml_backend.fromstring(xml_string)
         if root is None:
             print("No data found in the XML response.")
             return []
@@ -502,10 +521,10 @@ class FnsPropertyHelper(BasePropertyHelper):
             }
 
             rates = day.find("rates")
-            if not rates:
+            if rates is None or len(rates) == 0:
                 continue
 
-            for rate in day.find("rates").findall("rate"):
+            for rate in rates.findall("rate"):
                 rate_id_text = rate.findtext("rate_id")
                 rate_data = {
                     "rate_id": int(rate_id_text) if rate_id_text is not None else None,
@@ -0,0 +1,159 @@
+"""Per-stage timing of PMS sync runs.
+
+A run is opened with :func:`sync_run` (or the :func:`instrumented_sync`
+decorator) and stored in a context variable, so the HTTP client, the XML
+parsers and ``SyncService`` can add timings and counters without passing the
+recorder around. Outside a run every helper is a no-op.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from utils.metrics import record_sync_run
+
+STAGES = ("download", "parse", "diff", "write")
+COUNTERS = ("fetched", "created", "updated", "skipped")
+
+_current_run: ContextVar[Optional["SyncRunRecorder"]] = ContextVar(
+    "pms_sync_run", default=None
+)
+
+
+class SyncRunRecorder:
+    """Accumulates the timings and counters of a single sync run."""
+
+    def __init__(self, prop, data_type: str):
+        self.property = prop
+        self.data_type = data_type
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.counts = {counter: 0 for counter in COUNTERS}
+        self.payload_bytes = 0
+        self.http_requests = 0
+        self.error_class = ""
+        self.success = True
+        self._started = time.perf_counter()
+        self.duration_seconds = 0.0
+
+    def add_stage(self, stage: str, seconds: float):
+        self.stage_seconds[stage] += seconds
+
+    def finish(self):
+        self.duration_seconds = time.perf_counter() - self._started
+
+    def save(self):
+        from pms.models import PmsSyncRun
+
+        return PmsSyncRun.objects.create(
+            property=self.property,
+            data_type=self.data_type,
+            duration_ms=round(self.duration_seconds * 1000),
+            download_ms=round(self.stage_seconds["download"] * 1000),
+            parse_ms=round(self.stage_seconds["parse"] * 1000),
+            diff_ms=round(self.stage_seconds["diff"] * 1000),
+            write_ms=round(self.stage_seconds["write"] * 1000),
+            http_requests=self.http_requests,
+            payload_bytes=self.payload_bytes,
+            success=self.success,
+            error_class=self.error_class,
+            **self.counts,
+        )
+
+
+def current_run() -> Optional[SyncRunRecorder]:
+    return _current_run.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Add the time spent inside the block to ``name`` of the current run."""
+    run = _current_run.get()
+    if run is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add_stage(name, time.perf_counter() - started)
+
+
+def timed_stage(name: str):
+    """Decorator version of :func:`stage`."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(**counters):
+    run = _current_run.get()
+    if run is not None:
+        for key, value in counters.items():
+            run.counts[key] += value
+
+
+def record_http(payload_bytes: int):
+    run = _current_run.get()
+    if run is not None:
+        run.http_requests += 1
+        run.payload_bytes += payload_bytes
+
+
+def record_error(exc: BaseException):
+    """Mark the current run as failed, keeping the first error class."""
+    run = _current_run.get()
+    if run is not None:
+        run.success = False
+        if not run.error_class:
+            run.error_class = type(exc).__name__
+
+
+@contextmanager
+def sync_run(prop, data_type: str):
+    """Record a sync run of ``data_type`` for ``prop``.
+
+    Nested runs are folded into the outer one so a run always maps to one
+    top-level sync call.
+    """
+    if _current_run.get() is not None:
+        yield _current_run.get()
+        return
+
+    run = SyncRunRecorder(prop, data_type)
+    token = _current_run.set(run)
+    try:
+        yield run
+    except Exception as e:
+        record_error(e)
+        raise
+    finally:
+        _current_run.reset(token)
+        run.finish()
+        record_sync_run(run)
+        try:
+            run.save()
+        except Exception as e:
+            print(f"Error guardando la ejecución de sincronización: {e}")
+
+
+def instrumented_sync(data_type: str):
+    """Wrap a ``SyncService`` classmethod taking ``prop`` in a sync run."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(cls, prop, *args, **kwargs):
+            with sync_run(prop, data_type):
+                return func(cls, prop, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,57 @@
+"""XML parsing backend for PMS payloads.
+
+The FNS parsers only use the ElementTree API (``find``, ``findall``,
+``findtext``, iteration, ``tag`` and ``text``), which lxml implements as
+well. ``PMS_XML_BACKEND`` selects the implementation; lxml is optional and
+the standard library is used when it is not installed.
+"""
+
+import xml.etree.ElementTree as ET
+
+from django.conf import settings
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - optional dependency
+    lxml_etree = None
+
+STDLIB = "stdlib"
+LXML = "lxml"
+_warned_missing_lxml = False
+
+
+def available_backends():
+    return [STDLIB, LXML] if lxml_etree is not None else [STDLIB]
+
+
+def _stdlib_fromstring(xml_string):
+    return ET.fromstring(xml_string)
+
+
+def _lxml_fromstring(xml_string):
+    parser = lxml_etree.XMLParser(
+        resolve_entities=False, remove_comments=True, huge_tree=True
+    )
+    # lxml rejects str input that carries an encoding declaration
+    if isinstance(xml_string, str):
+        xml_string = xml_string.encode("utf-8")
+    return lxml_etree.fromstring(xml_string, parser)
+
+
+def get_backend(name: str = None):
+    """Return the ``fromstring`` function of ``name`` (default: the setting)."""
+    global _warned_missing_lxml
+    name = name or getattr(settings, "PMS_XML_BACKEND", STDLIB)
+    if name == LXML:
+        if lxml_etree is not None:
+            return _lxml_fromstring
+        if not _warned_missing_lxml:
+            _warned_missing_lxml = True
+            print("lxml no está instalado, se usa el parser XML estándar")
+    elif name != STDLIB:
+        raise ValueError(f"Unknown XML backend: {name}")
+    return _stdlib_fromstring
+
+
+def fromstring(xml_string):
+    return get_backend()(xml_string)
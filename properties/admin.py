@@ -1,12 +1,14 @@
 from django.contrib import admin, messages
 from django.contrib.gis.admin import GISModelAdmin
-from django.core.paginator import Paginator
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.template.response import TemplateResponse
 from django.urls import path, reverse
 from django.utils.html import format_html
 
-from pms.utils.property_helper_factory import PMSHelperFactory
+from analytics.services import RollupService
+from pms.models import PmsSyncJob
+from pms.services import PmsSyncJobService
+from properties.admin_utils.forms import DashboardFilterForm
 from properties.admin_utils.inlines import (
     CommunicationMethodInline,
     PMSDataInline,
@@ -15,9 +17,14 @@ from properties.admin_utils.inlines import (
     RoomTypeInline,
     TermsAndConditionsInline,
 )
-from properties.models import CommunicationMethod, Property, RoomType, Service
-
-from .sync_service import SyncService
+from properties.models import (
+    CommunicationMethod,
+    InventoryHold,
+    Property,
+    RoomType,
+    Service,
+)
+from utils.paginator import EstimatedCountPaginator
 
 
 @admin.register(Property)
@@ -40,8 +47,8 @@ class PropertyAdmin(GISModelAdmin):
         "location",
     )
     readonly_fields = ("owner",)
+    actions = ["sync_selected_with_pms"]
     # readonly_fields = ["recent_reservations"]
-    pms_helper = PMSHelperFactory()
     # readonly_fields = ["reservations_table"]
 
     fieldsets = (
@@ -116,6 +123,11 @@ class PropertyAdmin(GISModelAdmin):
                 self.admin_site.admin_view(self.sync_with_pms),
                 name="sync_property_with_pms",
             ),
+            path(
+                "sync-jobs/",
+                self.admin_site.admin_view(self.sync_jobs_view),
+                name="properties_sync_jobs",
+            ),
             path(
                 "dashboard/",
                 self.admin_site.admin_view(self.dashboard_view),
@@ -130,139 +142,68 @@ class PropertyAdmin(GISModelAdmin):
             self.message_user(request, "Propiedad no encontrada.", level=messages.ERROR)
             return HttpResponseRedirect(request.META.get("HTTP_REFERER"))
 
-        if not prop.pms:
-            self.message_user(
-                request,
-                "La propiedad no tiene un PMS asociado.",
-                level=messages.ERROR,
-            )
+        problem = PmsSyncJobService.sync_problem(prop)
+        if problem:
+            self.message_user(request, problem, level=messages.ERROR)
             return HttpResponseRedirect(
                 reverse("admin:properties_property_change", args=[prop.pk])
             )
 
-        if not prop.pms_data:
-            self.message_user(
-                request,
-                "La propiedad no tiene datos de PMS asociados.",
-                level=messages.ERROR,
-            )
-            return HttpResponseRedirect(
-                reverse("admin:properties_property_change", args=[prop.pk])
-            )
+        jobs = PmsSyncJobService.enqueue([prop], request.user)
+        return self._sync_jobs_redirect(jobs)
 
-        # Verificamos que los campos necesarios estén completos
-        necesary_fields = [
-            "pms_token",
-            "pms_hotel_identifier",
-            "pms_username",
-            "pms_password",
-            "email",
-            "phone_number",
-            "base_url",
-        ]
-        for field in necesary_fields:
-            if not getattr(prop.pms_data, field):
+    @admin.action(description="Sincronizar con PMS")
+    def sync_selected_with_pms(self, request, queryset):
+        syncable = []
+        for prop in queryset.select_related("pms", "pms_data"):
+            problem = PmsSyncJobService.sync_problem(prop)
+            if problem:
                 self.message_user(
-                    request,
-                    f"Falta el campo {field} para sincronizar con pms {prop.pms.name}.",
-                    level=messages.ERROR,
-                )
-                return HttpResponseRedirect(
-                    reverse("admin:properties_property_change", args=[prop.pk])
+                    request, f"{prop.name}: {problem}", level=messages.WARNING
                 )
-
-        success = self.perform_pms_sync(request, prop)
-
-        if success:
-            self.message_user(
-                request,
-                f"Sincronización con PMS  {prop.pms.name}. exitosa",
-                level=messages.SUCCESS,
-            )
-        else:
-            self.message_user(
-                request,
-                f"Fallo al sincronizar con el PMS {prop.pms.name}.",
-                level=messages.ERROR,
-            )
-
+            else:
+                syncable.append(prop)
+        if not syncable:
+            return None
+        jobs = PmsSyncJobService.enqueue(syncable, request.user)
+        return self._sync_jobs_redirect(jobs)
+
+    @staticmethod
+    def _sync_jobs_redirect(jobs):
+        ids = ",".join(str(job.id) for job in jobs)
         return HttpResponseRedirect(
-            reverse("admin:properties_property_change", args=[prop.pk])
+            f"{reverse('admin:properties_sync_jobs')}?ids={ids}"
         )
 
-    def perform_pms_sync(self, request, prop: Property):
-        # Tu lógica real de sincronización acá
-        helper = self.pms_helper.get_helper(prop)
-        sync_detail = SyncService.sync_property_detail(prop, helper)
-        if sync_detail:
-            self.message_user(
-                request,
-                f"Datos de la propiedad {prop.name} actualizados correctamente.",
-                level=messages.SUCCESS,
-            )
-        else:
-            self.message_user(
-                None,
-                f"No se encontraron detalles para la propiedad {prop.name}.",
-                level=messages.ERROR,
-            )
-            return False
-
-        sync_rooms = SyncService.sync_rooms(prop, helper)
-        if sync_rooms:
-            self.message_user(
-                request,
-                f"Habitaciones de la propiedad {prop.name} actualizadas correctamente.",
-                level=messages.SUCCESS,
-            )
-        else:
-            self.message_user(
-                request,
-                f"No se encontraron habitaciones para la propiedad {prop.name}.",
-                level=messages.ERROR,
-            )
-
-        sync_reservations = SyncService.sync_reservations(prop, helper, request.user)
-        if sync_reservations:
-            self.message_user(
-                request,
-                f"Reservas de la propiedad {prop.name} actualizadas correctamente.",
-                level=messages.SUCCESS,
-            )
-        else:
-            self.message_user(
-                request,
-                f"No se encontraron reservas para la propiedad {prop.name}.",
-                level=messages.ERROR,
-            )
-
-        sync_availability = SyncService.sync_rates_and_availability(prop, helper)
-        if sync_availability:
-            self.message_user(
-                request,
-                f"Disponibilidad y tarifas de la propiedad {prop.name} actualizadas correctamente.",
-                level=messages.SUCCESS,
-            )
-        else:
-            self.message_user(
-                request,
-                f"No se encontraron datos de disponibilidad y tarifas para la propiedad {prop.name}.",
-                level=messages.ERROR,
-            )
-            return False
-
-        if prop.pms_data.first_sync:
-            prop.pms_data.first_sync = False
-            prop.pms_data.save()
+    def sync_jobs_view(self, request):
+        """Progress of the PMS sync jobs in ``?ids=``; JSON for polling."""
+        ids = [int(i) for i in request.GET.get("ids", "").split(",") if i.isdigit()]
+        jobs = PmsSyncJob.objects.select_related("property").filter(
+            id__in=ids, property__in=self.get_queryset(request)
+        )
+        progress = [PmsSyncJobService.progress(job) for job in jobs.order_by("id")]
+        if request.GET.get("format") == "json":
+            return JsonResponse({"jobs": progress})
 
-        return True
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Sincronización con PMS",
+            "jobs": progress,
+            "stages": [stage for stage, _ in PmsSyncJobService.STAGES],
+            "poll_url": f"{request.path}?ids={','.join(map(str, ids))}&format=json",
+        }
+        return TemplateResponse(
+            request, "admin/properties/property/sync_jobs.html", context
+        )
 
     def change_view(self, request, object_id, form_url="", extra_context=None):
         extra_context = extra_context or {}
         prop = self.get_object(request, object_id)
         if prop:
-            reservations = prop.reservations.all().order_by("-created_at")
-            page_obj = Paginator(reservations, 10).get_page(request.GET.get("page", 1))
+            reservations = prop.reservations.order_by("-created_at", "-id")
+            page_obj = EstimatedCountPaginator(reservations, 10).get_page(
+                request.GET.get("page", 1)
+            )
 
             extra_context.update(
                 {
@@ -282,57 +223,38 @@ class PropertyAdmin(GISModelAdmin):
             request, object_id, form_url, extra_context=extra_context
         )
 
-    def dashboard_view(self, request):
-        from django.db.models import Sum
-
-        from reservations.models import ReservationRoom
+    DASHBOARD_COLORS = [
+        "#ff6384",
+        "#36a2eb",
+        "#cc65fe",
+        "#ffce56",
+        "#2ecc71",
+        "#e67e22",
+        "#1abc9c",
+        "#e74c3c",
+    ]
 
-        data = (
-            ReservationRoom.objects.filter(reservation__property__owner=request.user)
-            .values(
-                "reservation__property__name",
-                "room_type__name",
+    def dashboard_view(self, request):
+        # Always bound: empty fields fall back to the current year
+        form = DashboardFilterForm(request.GET, owner=request.user)
+        chart = {"labels": [], "datasets": []}
+        if form.is_valid():
+            chart = RollupService.revenue_by_room_type(
+                request.user,
+                form.cleaned_data["start"],
+                form.cleaned_data["end"],
+                [p.id for p in form.cleaned_data["properties"]],
             )
-            .annotate(total=Sum("price"))
-        )
 
-        properties = sorted({d["reservation__property__name"] for d in data})
-        room_types = sorted({d["room_type__name"] for d in data})
-
-        datasets = []
-        colors = [
-            "#ff6384",
-            "#36a2eb",
-            "#cc65fe",
-            "#ffce56",
-            "#2ecc71",
-            "#e67e22",
-            "#1abc9c",
-            "#e74c3c",
+        datasets = [
+            {**dataset, "color": self.DASHBOARD_COLORS[i % len(self.DASHBOARD_COLORS)]}
+            for i, dataset in enumerate(chart["datasets"])
         ]
-        for i, rt in enumerate(room_types):
-            values = []
-            for prop in properties:
-                val = 0
-                for entry in data:
-                    if (
-                        entry["reservation__property__name"] == prop
-                        and entry["room_type__name"] == rt
-                    ):
-                        val = entry["total"] or 0
-                        break
-                values.append(val)
-            datasets.append(
-                {
-                    "label": rt or "N/A",
-                    "data": values,
-                    "color": colors[i % len(colors)],
-                }
-            )
-
         context = {
+            **self.admin_site.each_context(request),
             "title": "Dashboard",
-            "labels": properties,
+            "form": form,
+            "labels": chart["labels"],
             "datasets": datasets,
         }
         return TemplateResponse(
@@ -380,3 +302,20 @@ class RoomTypeAdmin(admin.ModelAdmin):
         if request.user.is_staff:
             return qs.filter(room_types__property__owner=request.user)
         return qs.none()
+
+
+@admin.register(InventoryHold)
+class InventoryHoldAdmin(admin.ModelAdmin):
+    list_display = (
+        "reservation_id",
+        "room_type",
+        "date",
+        "quantity",
+        "status",
+        "oversold",
+        "expires_at",
+    )
+    list_filter = ("status", "oversold")
+    list_select_related = ("room_type",)
+    raw_id_fields = ("reservation", "room_type")
+    date_hierarchy = "date"
@@ -0,0 +1,34 @@
+from datetime import date
+
+from django import forms
+
+from properties.models import Property
+
+
+class DashboardFilterForm(forms.Form):
+    """Date range (end excluded) and properties shown by the dashboard."""
+
+    start = forms.DateField(
+        label="Desde", required=False, widget=forms.DateInput(attrs={"type": "date"})
+    )
+    end = forms.DateField(
+        label="Hasta", required=False, widget=forms.DateInput(attrs={"type": "date"})
+    )
+    properties = forms.ModelMultipleChoiceField(
+        label="Propiedades", queryset=Property.objects.none(), required=False
+    )
+
+    def __init__(self, *args, owner=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["properties"].queryset = Property.objects.filter(
+            owner=owner
+        ).order_by("name")
+
+    def clean(self):
+        cleaned = super().clean()
+        today = date.today()
+        cleaned["start"] = cleaned.get("start") or today.replace(month=1, day=1)
+        cleaned["end"] = cleaned.get("end") or date(today.year + 1, 1, 1)
+        if cleaned["start"] >= cleaned["end"]:
+            raise forms.ValidationError("La fecha de inicio debe ser anterior al fin.")
+        return cleaned
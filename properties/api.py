@@ -1,8 +1,10 @@
 from typing import List, Optional
 
+from django.conf import settings
 from ninja import File, Form, Query, Router
+from ninja.decorators import decorate_view
 from ninja.files import UploadedFile
-from ninja.throttling import UserRateThrottle
+from ninja.pagination import paginate
 
 from utils import (
     APIError,
@@ -12,6 +14,9 @@ from utils import (
     SuccessSchema,
 )
 from utils.auth_bearer import AuthBearer
+from utils.db_router import replica_reads
+from utils.pagination import CursorPagination
+from utils.throttling import GCRAThrottle
 
 from .models import Property, RoomType
 from .schemas import (
@@ -34,45 +39,63 @@ from .services import PropertyService
 
 router = Router(tags=["properties"])
 
+# Async views check their throttle themselves (see GCRAThrottle.acheck)
+properties_throttle = GCRAThrottle("10/m", scope="properties", key="api_key_ip")
+availability_throttle = GCRAThrottle("30/m", scope="availability", key="api_key_ip")
 
-@router.get(
-    "/",
-    response={200: List[PropertyOut], 400: str},
-    throttle=[UserRateThrottle("10/m")],
-)
-def available_properties(
+
+@router.get("/", response={200: List[PropertyOut], 400: str})
+@decorate_view(replica_reads)
+@paginate(CursorPagination)
+async def available_properties(
     request,
     zona: Optional[int] = Query(None),
 ):
+    await properties_throttle.acheck(request)
+    # The listing queryset prefetches everything PropertyOut reads, so the
+    # page can be serialized without further queries
     return PropertyService.available_properties(zona)
 
 
 @router.post(
     "/availability/",
     response={200: AvailabilityResponse, 404: ErrorSchema},
-    # throttle=[UserRateThrottle("10/m")],
 )
-def get_availability(request, data: AvailabilityRequest):
-    return PropertyService.get_availability(data)
+@decorate_view(replica_reads)
+async def get_availability(request, data: AvailabilityRequest):
+    await availability_throttle.acheck(request)
+    # Searches that have to sync with the PMS cost more than cached reads
+    return await PropertyService.aget_availability(
+        data,
+        on_pms_sync=lambda: availability_throttle.acharge(
+            request, settings.THROTTLE_PMS_SYNC_COST
+        ),
+    )
 
 
 @router.get("/name/{property_name}", response=PropertyOut)
+@decorate_view(replica_reads)
 def get_property_by_name(request, property_name: str):
     return PropertyService.get_property_by_name(property_name)
 
 
 @router.get("/{property_id}/rooms", response=List[RoomTypeOut])
+@decorate_view(replica_reads)
+@paginate(CursorPagination)
 def get_property_rooms(request, property_id: int):
     try:
         _property = Property.objects.get(id=property_id)
-        return _property.room_types.all()
+        return _property.room_types.prefetch_related("images", "services")
     except Property.DoesNotExist:
         raise APIError("Property not found", PropertyErrorCode.PROPERTY_NOT_FOUND, 404)
 
 
 @router.get(
-    "/rooms/{room_type_id}", response=RoomTypeOut, throttle=[UserRateThrottle("10/m")]
+    "/rooms/{room_type_id}",
+    response=RoomTypeOut,
+    throttle=[GCRAThrottle("10/m", scope="room_type", key="api_key_ip")],
 )
+@decorate_view(replica_reads)
 def get_room_type(request, room_type_id: int):
     try:
         room_type = RoomType.objects.get(id=room_type_id)
@@ -82,6 +105,8 @@ def get_room_type(request, room_type_id: int):
 
 
 @router.get("/rooms", response=List[RoomTypeOut])
+@decorate_view(replica_reads)
+@paginate(CursorPagination)
 def get_rooms(
     request,
     zone_id: Optional[int] = Query(),
@@ -99,12 +124,16 @@ def get_rooms(
                 400,
             )
 
-        return RoomType.objects.filter(property__in=properties)
+        return RoomType.objects.filter(property__in=properties).prefetch_related(
+            "images", "services"
+        )
     except Property.DoesNotExist:
         raise APIError("Property not found", PropertyErrorCode.PROPERTY_NOT_FOUND, 404)
 
 
 @router.get("/services", response=List[ServiceOut])
+@decorate_view(replica_reads)
+@paginate(CursorPagination)
 def list_services(request):
     return PropertyService.list_services()
 
@@ -113,10 +142,11 @@ def list_services(request):
 
 
 @router.get("/my/", response=List[PropertyOut], auth=AuthBearer())
+@paginate(CursorPagination)
 def my_properties(request):
     if not request.user.is_staff:
         raise APIError("Access denied", SecurityErrorCode.ACCESS_DENIED, 403)
-    return Property.objects.filter(owner=request.user)
+    return PropertyService.listing_queryset(Property.objects.filter(owner=request.user))
 
 
 @router.post("/my/", response=PropertyOut, auth=AuthBearer())
@@ -294,7 +324,12 @@ def sync_property_with_pms(request, property_id: int):
     return PropertyService.sync_property_with_pms(request.user, property_id)
 
 
-@router.get("/{property_id}", response=PropertyOut, throttle=[UserRateThrottle("1/m")])
+@router.get(
+    "/{property_id}",
+    response=PropertyOut,
+    throttle=[GCRAThrottle("1/m", scope="property", key="api_key_ip")],
+)
+@decorate_view(replica_reads)
 def get_property(request, property_id: int):
     try:
         _property = Property.objects.get(id=property_id)
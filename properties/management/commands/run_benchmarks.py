@@ -0,0 +1,77 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from benchmarks import runner
+from benchmarks.cases import CASES
+
+
+class Command(BaseCommand):
+    help = "Run the performance benchmarks and compare them with the baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--warmup", type=int, default=1)
+        parser.add_argument(
+            "--only",
+            nargs="*",
+            default=None,
+            help="Run only the cases whose name starts with these prefixes.",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--baseline", default=str(runner.BASELINE_PATH))
+        parser.add_argument("--tolerance", type=float, default=0.2)
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store these results as the new baseline.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with status 1 when a case regresses.",
+        )
+        parser.add_argument("--list", action="store_true", help="List the cases.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name in CASES:
+                self.stdout.write(name)
+            return
+
+        report = runner.run(
+            CASES,
+            repeat=options["repeat"],
+            warmup=options["warmup"],
+            only=options["only"],
+        )
+        report["comparison"] = runner.compare(
+            report["results"],
+            runner.load_baseline(options["baseline"]),
+            tolerance=options["tolerance"],
+        )
+        output = json.dumps(report, indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["update_baseline"]:
+            with open(options["baseline"], "w") as f:
+                json.dump(
+                    {"meta": report["meta"], "results": report["results"]}, f, indent=2
+                )
+            self.stderr.write(f"Baseline actualizado en {options['baseline']}")
+
+        regressions = [
+            name
+            for name, item in report["comparison"].items()
+            if item["status"] == "regression"
+        ]
+        for name in regressions:
+            self.stderr.write(self.style.ERROR(f"Regresión en {name}"))
+        if regressions and options["fail_on_regression"]:
+            sys.exit(1)
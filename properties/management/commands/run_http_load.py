@@ -0,0 +1,48 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from benchmarks.http_load import run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a concurrent HTTP load against a running server, e.g. to compare "
+        "the WSGI and ASGI deployments"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--method", default="GET")
+        parser.add_argument("--body", default=None, help="JSON request body.")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--token", default=None, help="JWT for AuthBearer.")
+        parser.add_argument("--label", default=None, help="Stored in the report.")
+        parser.add_argument("--output", help="Append the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        headers = {
+            "X-APP-KEY": settings.PUBLIC_API_KEY,
+            "Content-Type": "application/json",
+        }
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+
+        report = run_load(
+            options["url"],
+            method=options["method"].upper(),
+            body=options["body"],
+            headers=headers,
+            concurrency=options["concurrency"],
+            total_requests=options["requests"],
+            timeout=options["timeout"],
+        )
+        report["label"] = options["label"]
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "a") as f:
+                f.write(json.dumps(report) + "\n")
+        self.stdout.write(output)
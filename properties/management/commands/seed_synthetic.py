@@ -0,0 +1,431 @@
+import json
+import math
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point, Polygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from analytics.services import RollupService
+from properties.models import (
+    Availability,
+    Property,
+    PropertyImage,
+    PropertyService,
+    Room,
+    RoomType,
+    Service,
+)
+from reservations.models import Reservation, ReservationRoom
+from vouchers.models import DiscountCoupon, Voucher
+from vouchers.services import PromoCodeService
+from zones.models import Zone
+
+ROOM_TYPE_NAMES = [
+    ("Individual", 1),
+    ("Doble", 2),
+    ("Triple", 3),
+    ("Familiar", 4),
+    ("Suite", 2),
+    ("Junior Suite", 3),
+]
+SERVICES = [
+    ("wifi", "Wifi"),
+    ("parking", "Parking"),
+    ("pool", "Piscina"),
+    ("breakfast", "Desayuno"),
+    ("gym", "Gimnasio"),
+    ("pets", "Admite mascotas"),
+]
+CHANNELS = ["web", "booking", "expedia", "phone"]
+STATUSES = [
+    Reservation.CONFIRMED,
+    Reservation.CONFIRMED,
+    Reservation.OK,
+    Reservation.PENDING,
+    Reservation.CANCELLED,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic, production-sized dataset for load tests and "
+        "benchmarks. Availability rows are loaded with COPY on PostgreSQL. "
+        "Use --reset to regenerate the dataset of a seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--zones", type=int, default=10)
+        parser.add_argument("--properties", type=int, default=1000)
+        parser.add_argument("--room-types", type=int, default=3)
+        parser.add_argument("--rooms-per-type", type=int, default=4)
+        parser.add_argument("--images", type=int, default=3)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument(
+            "--start-date",
+            type=date.fromisoformat,
+            default=None,
+            help="First availability date (YYYY-MM-DD). Defaults to today.",
+        )
+        parser.add_argument("--reservations", type=int, default=5000)
+        parser.add_argument("--vouchers", type=int, default=500)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create for availability instead of COPY.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete the data previously generated with the same seed first.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.seed = options["seed"]
+        self.batch_size = options["batch_size"]
+        self.start_date = options["start_date"] or date.today()
+        started = time.perf_counter()
+
+        if options["reset"]:
+            self._reset()
+        elif self._existing().exists() or self._existing_codes():
+            raise CommandError(
+                f"Ya hay datos sintéticos con la semilla {self.seed}; "
+                "usá --reset para regenerarlos."
+            )
+
+        with transaction.atomic():
+            owner = self._owner()
+            services = self._services()
+            zones = self._zones(options["zones"])
+            properties = self._properties(owner, zones, options["properties"])
+            self._property_services(properties, services)
+            self._images(properties, options["images"])
+            room_types = self._room_types(properties, options["room_types"])
+            self._rooms(room_types, options["rooms_per_type"])
+
+        self._log(f"{len(room_types)} tipos de habitación", started)
+        rows = self._availability(
+            room_types, options["days"], use_copy=not options["no_copy"]
+        )
+        self._log(f"{rows} filas de disponibilidad", started)
+
+        with transaction.atomic():
+            self._reservations(room_types, options["reservations"], options["days"])
+            self._vouchers(owner, options["vouchers"])
+        self._log("reservas y bonos", started)
+
+        # COPY and bulk_create skip the signals that keep the rollups current
+        RollupService.refresh_all(property_ids=[prop.id for prop in properties])
+        self._log("resúmenes diarios", started)
+        self.stdout.write(self.style.SUCCESS("Datos sintéticos creados."))
+
+    def _existing(self):
+        return Property.objects.filter(name__startswith=f"Hotel sintético {self.seed}-")
+
+    def _existing_codes(self):
+        return (
+            Voucher.objects.filter(code__startswith=f"SV{self.seed}X").exists()
+            or DiscountCoupon.objects.filter(
+                code__startswith=f"SC{self.seed}X"
+            ).exists()
+        )
+
+    def _reset(self):
+        # Reservations, rooms, availability and rollups go with the properties
+        with transaction.atomic():
+            self._existing().delete()
+            Zone.objects.filter(
+                name__startswith=f"Zona sintética {self.seed}-"
+            ).delete()
+            Voucher.objects.filter(code__startswith=f"SV{self.seed}X").delete()
+            DiscountCoupon.objects.filter(code__startswith=f"SC{self.seed}X").delete()
+
+    def _log(self, message, started):
+        self.stdout.write(f"[{time.perf_counter() - started:.1f}s] {message}")
+
+    def _owner(self):
+        User = get_user_model()
+        owner, _ = User.objects.get_or_create(
+            username=f"synthetic-{self.seed}",
+            defaults={"email": f"synthetic-{self.seed}@example.com"},
+        )
+        return owner
+
+    def _services(self):
+        services = []
+        for code, name in SERVICES:
+            service, _ = Service.objects.get_or_create(
+                code=code, defaults={"name": name}
+            )
+            services.append(service)
+        return services
+
+    def _zones(self, count):
+        zones = []
+        for i in range(count):
+            # Spain-ish bounding box, ~20km squares
+            lon = self.rng.uniform(-8.0, 2.5)
+            lat = self.rng.uniform(37.0, 43.0)
+            size = self.rng.uniform(0.08, 0.25)
+            area = Polygon.from_bbox((lon, lat, lon + size, lat + size))
+            area.srid = 4326
+            zones.append(
+                Zone(
+                    name=f"Zona sintética {self.seed}-{i}",
+                    description="Zona generada para pruebas de carga",
+                    area=area,
+                )
+            )
+        return Zone.objects.bulk_create(zones, batch_size=self.batch_size)
+
+    def _properties(self, owner, zones, count):
+        properties = []
+        for i in range(count):
+            zone = zones[i % len(zones)] if zones else None
+            if zone is not None:
+                min_lon, min_lat, max_lon, max_lat = zone.area.extent
+            else:
+                min_lon, min_lat, max_lon, max_lat = (-8.0, 37.0, 2.5, 43.0)
+            location = Point(
+                self.rng.uniform(min_lon, max_lon),
+                self.rng.uniform(min_lat, max_lat),
+                srid=4326,
+            )
+            properties.append(
+                Property(
+                    owner=owner,
+                    name=f"Hotel sintético {self.seed}-{i}",
+                    description="Propiedad generada para pruebas de carga",
+                    address=f"Calle {self.rng.randint(1, 500)}, {i}",
+                    location=location,
+                    zone=zone,
+                    cover_image=f"properties/cover_image/synthetic-{i}.jpg",
+                )
+            )
+        return Property.objects.bulk_create(properties, batch_size=self.batch_size)
+
+    def _property_services(self, properties, services):
+        PropertyService.objects.bulk_create(
+            [
+                PropertyService(property=prop, service=service)
+                for prop in properties
+                for service in self.rng.sample(
+                    services, self.rng.randint(1, len(services))
+                )
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _images(self, properties, count):
+        PropertyImage.objects.bulk_create(
+            [
+                PropertyImage(
+                    property=prop,
+                    image=f"properties/gallery/synthetic-{prop.id}-{i}.jpg",
+                    caption=f"Imagen {i + 1}",
+                )
+                for prop in properties
+                for i in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _room_types(self, properties, count):
+        room_types = []
+        for prop in properties:
+            for i, (name, pax) in enumerate(
+                self.rng.sample(ROOM_TYPE_NAMES, min(count, len(ROOM_TYPE_NAMES)))
+            ):
+                room_type = RoomType(
+                    property=prop,
+                    name=name,
+                    external_id=f"SYN{prop.id}-{i}",
+                )
+                # Not persisted: used to build rooms and rates below
+                room_type.pax = pax
+                room_type.base_price = round(self.rng.uniform(45, 220), 2)
+                room_type.capacity = 0
+                room_types.append(room_type)
+        return RoomType.objects.bulk_create(room_types, batch_size=self.batch_size)
+
+    def _rooms(self, room_types, per_type):
+        rooms = []
+        for room_type in room_types:
+            room_type.capacity = per_type
+            for i in range(per_type):
+                rooms.append(
+                    Room(
+                        property_id=room_type.property_id,
+                        type=room_type,
+                        name=f"{room_type.name} {room_type.id}-{i + 1}",
+                        pax=room_type.pax,
+                        external_id=f"{room_type.external_id}-{i}",
+                        external_room_type_id=room_type.external_id,
+                        external_room_type_name=room_type.name,
+                    )
+                )
+        Room.objects.bulk_create(rooms, batch_size=self.batch_size)
+
+    def _rates(self, room_type, day):
+        season = 1 + 0.25 * math.sin(
+            2 * math.pi * (day.timetuple().tm_yday - 100) / 365
+        )
+        weekend = 1.2 if day.weekday() in (4, 5) else 1
+        noise = self.rng.uniform(0.95, 1.05)
+        base = room_type.base_price * season * weekend * noise
+        flexible = [
+            {"occupancy": pax, "price": round(base * (1 + 0.15 * (pax - 1)), 2)}
+            for pax in range(1, room_type.pax + 1)
+        ]
+        non_refundable = [
+            {"occupancy": p["occupancy"], "price": round(p["price"] * 0.9, 2)}
+            for p in flexible
+        ]
+        min_stay = 2 if weekend > 1 else 1
+        return [
+            {"rate_id": 1, "prices": flexible, "restrictions": {"min_stay": min_stay}},
+            {
+                "rate_id": 2,
+                "prices": non_refundable,
+                "restrictions": {"min_stay": min_stay},
+            },
+        ]
+
+    def _availability_rows(self, room_types, days):
+        for room_type in room_types:
+            for offset in range(days):
+                day = self.start_date + timedelta(days=offset)
+                yield (
+                    room_type.property_id,
+                    room_type.id,
+                    day,
+                    self.rng.randint(0, room_type.capacity),
+                    # Rates are stored as a JSON-encoded string, like SyncService
+                    json.dumps(self._rates(room_type, day)),
+                )
+
+    def _availability(self, room_types, days, use_copy=True):
+        rows = self._availability_rows(room_types, days)
+        if use_copy and connection.vendor == "postgresql":
+            return self._copy_availability(rows)
+
+        total = 0
+        batch = []
+        for property_id, room_type_id, day, available, rates in rows:
+            batch.append(
+                Availability(
+                    property_id=property_id,
+                    room_type_id=room_type_id,
+                    date=day,
+                    availability=available,
+                    rates=rates,
+                )
+            )
+            if len(batch) >= self.batch_size:
+                Availability.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        if batch:
+            Availability.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        return total
+
+    def _copy_availability(self, rows):
+        table = Availability._meta.db_table
+        total = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            with cursor.cursor.copy(
+                f"COPY {table} (property_id, room_type_id, date, availability, rates) "
+                "FROM STDIN"
+            ) as copy:
+                for property_id, room_type_id, day, available, rates in rows:
+                    # ``rates`` is already a JSON string; encode it again so the
+                    # jsonb column holds that string, as the ORM would store it
+                    copy.write_row(
+                        (property_id, room_type_id, day, available, json.dumps(rates))
+                    )
+                    total += 1
+        return total
+
+    def _reservations(self, room_types, count, days):
+        reservations = []
+        reserved_types = []
+        for i in range(count):
+            room_type = self.rng.choice(room_types)
+            nights = self.rng.randint(1, 7)
+            check_in = self.start_date + timedelta(
+                days=self.rng.randint(0, max(days - nights, 0))
+            )
+            guests = self.rng.randint(1, room_type.pax)
+            price = round(room_type.base_price * nights * (1 + 0.15 * (guests - 1)), 2)
+            reservations.append(
+                Reservation(
+                    property_id=room_type.property_id,
+                    status=self.rng.choice(STATUSES),
+                    check_in=check_in,
+                    check_out=check_in + timedelta(days=nights),
+                    pax_count=guests,
+                    total_price=price,
+                    original_price=price,
+                    channel=self.rng.choice(CHANNELS),
+                    guest_name=f"Huésped {self.seed}-{i}",
+                    guest_email=f"guest{self.seed}-{i}@example.com",
+                )
+            )
+            reserved_types.append((room_type, guests, price))
+
+        reservations = Reservation.objects.bulk_create(
+            reservations, batch_size=self.batch_size
+        )
+        ReservationRoom.objects.bulk_create(
+            [
+                ReservationRoom(
+                    reservation=reservation,
+                    room_type=room_type,
+                    price=price,
+                    guests=guests,
+                    rate_id=1,
+                    stay=reservation.stay_range(),
+                )
+                for reservation, (room_type, guests, price) in zip(
+                    reservations, reserved_types
+                )
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _vouchers(self, owner, count):
+        vouchers = []
+        coupons = []
+        for i in range(count):
+            amount = self.rng.choice([25, 50, 100, 150, 200])
+            vouchers.append(
+                Voucher(
+                    code=f"SV{self.seed}X{i:06d}",
+                    amount=amount,
+                    remaining_amount=self.rng.choice([amount, amount / 2, 0]),
+                    created_by=owner,
+                )
+            )
+            coupons.append(
+                DiscountCoupon(
+                    code=f"SC{self.seed}X{i:06d}",
+                    name=f"Cupón {i}",
+                    discount_percent=self.rng.choice([5, 10, 15, 20]),
+                    created_by=owner,
+                )
+            )
+        vouchers = Voucher.objects.bulk_create(vouchers, batch_size=self.batch_size)
+        coupons = DiscountCoupon.objects.bulk_create(
+            coupons, batch_size=self.batch_size
+        )
+        PromoCodeService.register_created(
+            vouchers + coupons, batch_size=self.batch_size
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0015_room_services'),
+        ('reservations', '0012_reservationroom_rate_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Noche')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Cantidad')),
+                ('status', models.CharField(choices=[('active', 'Activa'), ('confirmed', 'Confirmada'), ('released', 'Liberada')], default='active', max_length=10, verbose_name='Estado')),
+                ('expires_at', models.DateTimeField(verbose_name='Expira el')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_holds', to='reservations.reservation', verbose_name='Reserva')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_holds', to='properties.roomtype', verbose_name='Tipo de Habitación')),
+            ],
+            options={
+                'verbose_name': 'Bloqueo de inventario',
+                'verbose_name_plural': 'Bloqueos de inventario',
+                'db_table': 'inventory_holds',
+                'indexes': [models.Index(condition=models.Q(('status', 'active')), fields=['room_type', 'date', 'expires_at'], name='inventory_hold_active_idx'), models.Index(condition=models.Q(('status', 'active')), fields=['expires_at'], name='inventory_hold_expiry_idx')],
+            },
+        ),
+    ]
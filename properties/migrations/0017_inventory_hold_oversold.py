@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0016_inventory_hold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inventoryhold",
+            name="oversold",
+            field=models.BooleanField(default=False, verbose_name="Sobreventa"),
+        ),
+    ]
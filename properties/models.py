@@ -1,12 +1,21 @@
+import logging
+from datetime import timedelta
 from typing import Optional
 from uuid import uuid4
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db import models as geomodels
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from storages.backends.s3boto3 import S3Boto3Storage
 
+from utils.error_codes import ReservationError, ReservationErrorCode
+
 UserModel = get_user_model()
+inventory_logger = logging.getLogger("inventory")
 
 
 class Service(models.Model):
@@ -407,9 +416,41 @@ class PmsDataProperty(models.Model):
         verbose_name = "Datos PMS"
         verbose_name_plural = "Datos PMS"
 
+    SYNC_REQUIRED_FIELDS = (
+        "pms_token",
+        "pms_hotel_identifier",
+        "pms_username",
+        "pms_password",
+        "email",
+        "phone_number",
+        "base_url",
+    )
+
     def __str__(self):
         return f"PMS Data for {self.property.name}"
 
+    def missing_sync_fields(self):
+        """Return the fields that must be filled before syncing with the PMS."""
+        return [
+            field for field in self.SYNC_REQUIRED_FIELDS if not getattr(self, field)
+        ]
+
+
+class AvailabilityQuerySet(models.QuerySet):
+    def with_holds(self):
+        """Annotate ``held`` (active holds) and ``bookable`` (availability - held)."""
+        held = (
+            InventoryHold.objects.active()
+            .filter(room_type=OuterRef("room_type"), date=OuterRef("date"))
+            .values("room_type")
+            .annotate(total=Sum("quantity"))
+            .values("total")
+        )
+        return self.annotate(
+            held=Coalesce(Subquery(held, output_field=models.IntegerField()), 0),
+            bookable=F("availability") - F("held"),
+        )
+
 
 class Availability(models.Model):
     property = models.ForeignKey(
@@ -425,6 +466,8 @@ class Availability(models.Model):
     availability = models.IntegerField()
     rates = models.JSONField(null=True, blank=True, default=None)
 
+    objects = AvailabilityQuerySet.as_manager()
+
     class Meta:
         db_table = "availability"
         verbose_name = "Disponibilidad"
@@ -447,3 +490,195 @@ class Availability(models.Model):
         if room_type_id:
             qs = qs.filter(room_type_id=room_type_id)
         return qs
+
+
+class InventoryHoldQuerySet(models.QuerySet):
+    def active(self):
+        """Holds still taking inventory (not expired, confirmed or released)."""
+        return self.filter(status=InventoryHold.ACTIVE, expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(status=InventoryHold.ACTIVE, expires_at__lte=timezone.now())
+
+    def release(self) -> int:
+        """Give the inventory of the unconfirmed holds back."""
+        return self.filter(status=InventoryHold.ACTIVE).update(
+            status=InventoryHold.RELEASED
+        )
+
+    def confirm(self) -> int:
+        """Turn the unconfirmed holds into sold inventory.
+
+        ``Availability`` is decremented once per (room type, night) and the
+        holds stop counting. Expired or released holds are confirmed too (the
+        guest has paid for them) but only fit in what is still bookable: the
+        rest are flagged ``oversold`` and ``availability`` never goes below 0.
+        """
+        with transaction.atomic():
+            holds = list(
+                self.exclude(status=InventoryHold.CONFIRMED)
+                .select_for_update()
+                .order_by("pk")
+            )
+            if not holds:
+                return 0
+            now = timezone.now()
+            nights = {}
+            for hold in holds:
+                nights.setdefault((hold.room_type_id, hold.date), []).append(hold)
+
+            oversold = []
+            for (room_type_id, night), night_holds in sorted(nights.items()):
+                availability = Availability.objects.filter(
+                    room_type_id=room_type_id, date=night
+                )
+                # Lock first, then count the holds in a fresh statement
+                locked = list(
+                    availability.select_for_update().values_list("pk", flat=True)
+                )
+                row = (
+                    Availability.objects.filter(pk__in=locked)
+                    .with_holds()
+                    .values("pk", "availability", "bookable")
+                    .first()
+                )
+                if row is None:
+                    continue
+                # Active holds are already set aside; the others need a free room
+                free = max(row["bookable"], 0)
+                for hold in night_holds:
+                    if hold.status == InventoryHold.ACTIVE and hold.expires_at > now:
+                        continue
+                    if hold.quantity <= free:
+                        free -= hold.quantity
+                    else:
+                        oversold.append(hold)
+                quantity = sum(hold.quantity for hold in night_holds)
+                Availability.objects.filter(pk=row["pk"]).update(
+                    availability=F("availability")
+                    - min(quantity, max(row["availability"], 0))
+                )
+
+            InventoryHold.objects.filter(pk__in=[hold.pk for hold in holds]).update(
+                status=InventoryHold.CONFIRMED
+            )
+            if oversold:
+                InventoryHold.objects.filter(
+                    pk__in=[hold.pk for hold in oversold]
+                ).update(oversold=True)
+                for hold in oversold:
+                    inventory_logger.warning(
+                        "Sobreventa: reserva %s, tipo de habitación %s, noche %s",
+                        hold.reservation_id,
+                        hold.room_type_id,
+                        hold.date,
+                    )
+        return len(holds)
+
+
+class InventoryHold(models.Model):
+    """One room of a room type held for a pending reservation on one night.
+
+    Active holds are subtracted from ``Availability`` when searching and
+    booking, so the PMS counts are never touched until the payment is
+    confirmed. Unpaid holds expire after ``INVENTORY_HOLD_TTL`` seconds.
+    """
+
+    ACTIVE = "active"
+    CONFIRMED = "confirmed"
+    RELEASED = "released"
+    STATUS_CHOICES = [
+        (ACTIVE, "Activa"),
+        (CONFIRMED, "Confirmada"),
+        (RELEASED, "Liberada"),
+    ]
+
+    reservation = models.ForeignKey(
+        "reservations.Reservation",
+        related_name="inventory_holds",
+        on_delete=models.CASCADE,
+        verbose_name="Reserva",
+    )
+    room_type = models.ForeignKey(
+        RoomType,
+        related_name="inventory_holds",
+        on_delete=models.CASCADE,
+        verbose_name="Tipo de Habitación",
+    )
+    date = models.DateField(verbose_name="Noche")
+    quantity = models.PositiveIntegerField(default=1, verbose_name="Cantidad")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=ACTIVE, verbose_name="Estado"
+    )
+    expires_at = models.DateTimeField(verbose_name="Expira el")
+    # Paid after expiring, when the night had already been sold again
+    oversold = models.BooleanField(default=False, verbose_name="Sobreventa")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = InventoryHoldQuerySet.as_manager()
+
+    class Meta:
+        db_table = "inventory_holds"
+        verbose_name = "Bloqueo de inventario"
+        verbose_name_plural = "Bloqueos de inventario"
+        indexes = [
+            # Only active holds are read by searches and the expiry sweep
+            models.Index(
+                fields=["room_type", "date", "expires_at"],
+                condition=Q(status="active"),
+                name="inventory_hold_active_idx",
+            ),
+            models.Index(
+                fields=["expires_at"],
+                condition=Q(status="active"),
+                name="inventory_hold_expiry_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type} {self.date} ({self.status})"
+
+    @classmethod
+    def place(cls, reservation, property_id, room_type_id, check_in, check_out):
+        """Hold one room of ``room_type_id`` for every night of the stay.
+
+        Raises ``ReservationError`` when a night is missing or has no
+        bookable room left.
+        """
+        availability = Availability.objects.filter(
+            property_id=property_id,
+            room_type_id=room_type_id,
+            date__gte=check_in,
+            date__lt=check_out,
+        )
+        # Serializes bookings of the same nights. The holds are counted in a
+        # second statement so they include those committed while waiting.
+        locked = list(
+            availability.select_for_update()
+            .order_by("date")
+            .values_list("pk", flat=True)
+        )
+        bookable = dict(
+            Availability.objects.filter(pk__in=locked)
+            .with_holds()
+            .values_list("date", "bookable")
+        )
+        night = check_in
+        while night < check_out:
+            if bookable.get(night, 0) < 1:
+                raise ReservationError(
+                    f"No availability for room type {room_type_id} on {night}.",
+                    ReservationErrorCode.NO_AVAILABILITY,
+                )
+            night += timedelta(days=1)
+
+        expires_at = timezone.now() + timedelta(seconds=settings.INVENTORY_HOLD_TTL)
+        return cls.objects.bulk_create(
+            cls(
+                reservation=reservation,
+                room_type_id=room_type_id,
+                date=night,
+                expires_at=expires_at,
+            )
+            for night in sorted(bookable)
+        )
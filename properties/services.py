@@ -1,10 +1,15 @@
 # New service file for property related operations
+import asyncio
 import json
 from collections import defaultdict
 from datetime import timedelta
 from typing import List, Optional
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.gis.geos import Point
+from django.db import connections
+from django.db.models import QuerySet
 from django.utils.text import slugify
 
 from pms.models import PMS
@@ -38,12 +43,35 @@ from .sync_service import SyncService
 class PropertyService:
     """Service layer for property operations."""
 
+    #: Relations read by ``PropertyOut``; loading them up front keeps a
+    #: listing at a fixed number of queries.
+    LISTING_SELECT_RELATED = ("zone", "terms_and_conditions")
+    LISTING_PREFETCH_RELATED = (
+        "gallery",
+        "communication_methods",
+        "services",
+        "room_types__images",
+        "room_types__services",
+    )
+
+    @classmethod
+    def listing_queryset(cls, queryset=None):
+        if queryset is None:
+            queryset = Property.objects.all()
+        return queryset.select_related(*cls.LISTING_SELECT_RELATED).prefetch_related(
+            *cls.LISTING_PREFETCH_RELATED
+        )
+
     @staticmethod
-    def available_properties(zona: Optional[int]) -> List[Property]:
+    def _active_properties(zona: Optional[int]):
         propiedades = Property.objects.filter(active=True)
         if zona:
             propiedades = propiedades.filter(zone_id=zona)
-        return list(propiedades)
+        return propiedades
+
+    @classmethod
+    def available_properties(cls, zona: Optional[int]) -> QuerySet:
+        return cls.listing_queryset(cls._active_properties(zona))
 
     @staticmethod
     def get_property_by_name(name: str) -> Property:
@@ -58,7 +86,7 @@ class PropertyService:
         )
 
     @staticmethod
-    def get_availability(data: AvailabilityRequest) -> AvailabilityResponse:
+    def _validate_stay(data: AvailabilityRequest):
         if not data.check_in:
             raise APIError(
                 "Invalid check-in date", PropertyErrorCode.INVALID_CHECKIN_DATE, 403
@@ -71,6 +99,49 @@ class PropertyService:
                 403,
             )
 
+    @staticmethod
+    def _stay_dates(data: AvailabilityRequest):
+        return [
+            data.check_in + timedelta(days=i)
+            for i in range((data.check_out - data.check_in).days)
+        ]
+
+    @staticmethod
+    def _existing_availability(data: AvailabilityRequest, property_obj):
+        return (
+            Availability.existing_for(
+                data.check_in, data.check_out, property_obj, data.room_type
+            )
+            .with_holds()
+            .select_related("room_type")
+        )
+
+    @staticmethod
+    def _sync_from_pms(prop: Property, data: AvailabilityRequest):
+        helper = PMSHelperFactory().get_helper(prop)
+        SyncService.sync_rates_and_availability(
+            prop, helper, checkin=data.check_in, checkout=data.check_out
+        )
+
+    @classmethod
+    def _sync_from_pms_in_thread(cls, prop: Property, data: AvailabilityRequest):
+        # Runs in a pool thread: close its connection instead of leaking it
+        try:
+            cls._sync_from_pms(prop, data)
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def get_availability(
+        cls, data: AvailabilityRequest, on_pms_sync=None
+    ) -> AvailabilityResponse:
+        """Availability and prices for the stay in ``data``.
+
+        Dates missing locally are synced from the PMS first; ``on_pms_sync``
+        is called when that happens (used to charge the rate limit).
+        """
+        cls._validate_stay(data)
+
         property_obj = None
         if data.property_id:
             property_obj = Property.objects.filter(
@@ -81,34 +152,84 @@ class PropertyService:
                     "Property not found", PropertyErrorCode.PROPERTY_NOT_FOUND, 404
                 )
 
-        date_range = [
-            data.check_in + timedelta(days=i)
-            for i in range((data.check_out - data.check_in).days)
-        ]
-
-        existing_data = Availability.existing_for(
-            data.check_in, data.check_out, property_obj, data.room_type
-        )
-        existing_dates = {a.date for a in existing_data}
-        missing_dates = set(date_range) - existing_dates
+        date_range = cls._stay_dates(data)
+        existing_data = list(cls._existing_availability(data, property_obj))
+        missing_dates = set(date_range) - {a.date for a in existing_data}
 
         if not existing_data or missing_dates:
+            if on_pms_sync is not None:
+                on_pms_sync()
             if property_obj:
-                helper = PMSHelperFactory().get_helper(property_obj)
-                SyncService.sync_rates_and_availability(
-                    property_obj, helper, checkin=data.check_in, checkout=data.check_out
-                )
+                cls._sync_from_pms(property_obj, data)
             else:
                 for prop in Property.objects.filter(active=True):
-                    helper = PMSHelperFactory().get_helper(prop)
-                    SyncService.sync_rates_and_availability(
-                        prop, helper, checkin=data.check_in, checkout=data.check_out
-                    )
+                    cls._sync_from_pms(prop, data)
 
-            existing_data = Availability.existing_for(
-                data.check_in, data.check_out, property_obj, room_type_id=data.room_type
-            )
+            existing_data = list(cls._existing_availability(data, property_obj))
+
+        return cls._availability_response(data, existing_data, date_range)
+
+    @classmethod
+    async def aget_availability(
+        cls, data: AvailabilityRequest, on_pms_sync=None
+    ) -> AvailabilityResponse:
+        """Async :meth:`get_availability`.
+
+        Local data is read with the async ORM. The PMS clients are blocking,
+        so refreshes run in threads, concurrently for every property (at most
+        ``PMS_SYNC_CONCURRENCY`` at a time) when no property is given.
+        ``on_pms_sync`` is a coroutine function here, so it cannot block the
+        event loop.
+        """
+        cls._validate_stay(data)
+
+        property_obj = None
+        if data.property_id:
+            property_obj = await Property.objects.filter(
+                id=data.property_id, active=True
+            ).afirst()
+            if not property_obj:
+                raise APIError(
+                    "Property not found", PropertyErrorCode.PROPERTY_NOT_FOUND, 404
+                )
+
+        date_range = cls._stay_dates(data)
+        existing_data = [
+            a async for a in cls._existing_availability(data, property_obj)
+        ]
+        missing_dates = set(date_range) - {a.date for a in existing_data}
+
+        if not existing_data or missing_dates:
+            if on_pms_sync is not None:
+                await on_pms_sync()
+            if property_obj:
+                await sync_to_async(cls._sync_from_pms)(property_obj, data)
+            else:
+                semaphore = asyncio.Semaphore(settings.PMS_SYNC_CONCURRENCY)
+
+                async def sync_one(prop):
+                    async with semaphore:
+                        await sync_to_async(
+                            cls._sync_from_pms_in_thread, thread_sensitive=False
+                        )(prop, data)
+
+                await asyncio.gather(
+                    *[
+                        sync_one(prop)
+                        async for prop in Property.objects.filter(active=True)
+                    ]
+                )
+
+            existing_data = [
+                a async for a in cls._existing_availability(data, property_obj)
+            ]
+
+        return cls._availability_response(data, existing_data, date_range)
 
+    @staticmethod
+    def _availability_response(
+        data: AvailabilityRequest, existing_data, date_range
+    ) -> AvailabilityResponse:
         grouped_by_room_type = defaultdict(list)
         for availability in existing_data:
             grouped_by_room_type[availability.room_type.name].append(availability)
@@ -119,7 +240,7 @@ class PropertyService:
         for room_type_name, availabilities in grouped_by_room_type.items():
             availability_by_date = {a.date: a for a in availabilities}
             if not all(
-                d in availability_by_date and availability_by_date[d].availability > 0
+                d in availability_by_date and availability_by_date[d].bookable > 0
                 for d in date_range
             ):
                 continue
@@ -143,7 +264,7 @@ class PropertyService:
                         date=availability.date,
                         room_type=room_type_name,
                         room_type_id=availability.room_type_id,
-                        availability=availability.availability,
+                        availability=availability.bookable,
                         rates=parsed_rates,
                         property_id=availability.property_id,
                     )
@@ -377,8 +498,8 @@ class PropertyService:
         return SuccessSchema(message="Image deleted")
 
     @staticmethod
-    def list_services() -> List[Service]:
-        return list(Service.objects.all())
+    def list_services() -> QuerySet:
+        return Service.objects.all()
 
     @staticmethod
     def list_property_services(user, property_id: int) -> List[Service]:
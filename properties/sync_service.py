@@ -1,9 +1,11 @@
 # app/availability/services.py
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.contrib.gis.geos import Point
 
+from analytics.services import RollupService
+from pms.utils.instrumentation import count, instrumented_sync, stage, timed_stage
 from reservations.models import Reservation, ReservationRoom
 from utils import extract_pax
 
@@ -12,6 +14,7 @@ from .models import Availability, Property, Room, RoomType
 
 class SyncService:
     @classmethod
+    @instrumented_sync("rates_and_availability")
     def sync_rates_and_availability(
         cls, prop: Property, helper, checkin=None, checkout=None
     ):
@@ -25,64 +28,132 @@ class SyncService:
         if not rates_and_availability:
             return False
 
+        cls.upsert_rates_and_availability(prop, rates_and_availability)
+        return True
+
+    @classmethod
+    def upsert_rates_and_availability(cls, prop: Property, rates_and_availability):
+        """Write PMS rate/availability entries into ``Availability``.
+
+        Entries pushed by the PMS may carry only ``availability`` or only
+        ``rates``; the missing value is kept from the stored row.
+        """
+        count(fetched=len(rates_and_availability))
+        availabilities_to_create, availabilities_to_update = cls._diff_availability(
+            prop, rates_and_availability
+        )
+
+        with stage("write"):
+            if availabilities_to_update:
+                Availability.objects.bulk_update(
+                    availabilities_to_update, ["rates", "availability"]
+                )
+
+            if availabilities_to_create:
+                Availability.objects.bulk_create(
+                    availabilities_to_create,
+                    update_conflicts=True,
+                    unique_fields=["property", "room_type", "date"],
+                    update_fields=["rates", "availability"],
+                )
+        count(
+            created=len(availabilities_to_create),
+            updated=len(availabilities_to_update),
+        )
+        written = [a.date for a in availabilities_to_create + availabilities_to_update]
+        if written:
+            RollupService.schedule_refresh(
+                prop.id, min(written), max(written) + timedelta(days=1)
+            )
+
+        return len(availabilities_to_create) + len(availabilities_to_update)
+
+    @classmethod
+    @timed_stage("diff")
+    def _diff_availability(cls, prop: Property, rates_and_availability):
+        """Split PMS entries into new and changed ``Availability`` rows.
+
+        The property's room types and the stored rows for the dates in the
+        payload are loaded once up front.
+        """
         availabilities_to_create = []
         availabilities_to_update = []
 
+        room_types = {}
+        for room_type in RoomType.objects.filter(property=prop).order_by("id"):
+            room_types.setdefault(room_type.external_id, room_type)
+
+        dates = {
+            rate_data["date"]: datetime.strptime(rate_data["date"], "%Y-%m-%d").date()
+            for rate_data in rates_and_availability
+        }
+        existing = {}
+        if dates:
+            existing = {
+                (a.room_type_id, a.date): a
+                for a in Availability.objects.filter(
+                    property=prop,
+                    date__gte=min(dates.values()),
+                    date__lte=max(dates.values()),
+                )
+            }
+        changed = set()
+
         for rate_data in rates_and_availability:
-            room_type = RoomType.objects.filter(
-                external_id=rate_data["room_type"]
-            ).first()
+            room_type = room_types.get(rate_data["room_type"])
             if not room_type:
                 print(f"Room type not found: {rate_data['room_type']}")
+                count(skipped=1)
                 continue
 
-            date_obj = datetime.strptime(rate_data["date"], "%Y-%m-%d").date()
-
-            availability = Availability.objects.filter(
-                property=prop,
-                room_type=room_type,
-                date=date_obj,
-            ).first()
+            date_obj = dates[rate_data["date"]]
+            key = (room_type.id, date_obj)
+            availability = existing.get(key)
 
-            rates_json = json.dumps(rate_data["rates"])
-            availability_count = rate_data["availability"]
+            if "rates" in rate_data:
+                rates_json = json.dumps(rate_data["rates"])
+            else:
+                rates_json = availability.rates if availability else None
+            if "availability" in rate_data:
+                availability_count = rate_data["availability"]
+            elif availability:
+                availability_count = availability.availability
+            else:
+                print(
+                    f"No availability for new entry {rate_data['room_type']} "
+                    f"{rate_data['date']}"
+                )
+                count(skipped=1)
+                continue
 
             if availability:
                 if (
                     availability.rates == rates_json
                     and availability.availability == availability_count
                 ):
+                    count(skipped=1)
                     continue
                 availability.rates = rates_json
                 availability.availability = availability_count
-                availabilities_to_update.append(availability)
+                if availability.pk and key not in changed:
+                    availabilities_to_update.append(availability)
+                changed.add(key)
             else:
-                availabilities_to_create.append(
-                    Availability(
-                        property=prop,
-                        room_type=room_type,
-                        date=date_obj,
-                        rates=rates_json,
-                        availability=availability_count,
-                    )
+                availability = Availability(
+                    property=prop,
+                    room_type=room_type,
+                    date=date_obj,
+                    rates=rates_json,
+                    availability=availability_count,
                 )
+                existing[key] = availability
+                changed.add(key)
+                availabilities_to_create.append(availability)
 
-        if availabilities_to_update:
-            Availability.objects.bulk_update(
-                availabilities_to_update, ["rates", "availability"]
-            )
-
-        if availabilities_to_create:
-            Availability.objects.bulk_create(
-                availabilities_to_create,
-                update_conflicts=True,
-                unique_fields=["property", "room_type", "date"],
-                update_fields=["rates", "availability"],
-            )
-
-        return True
+        return availabilities_to_create, availabilities_to_update
 
     @classmethod
+    @instrumented_sync("property_detail")
     def sync_property_detail(cls, prop: Property, helper):
         if prop.pms_data is None:
             print(f"No PMS data for property: {prop.name}")
@@ -92,6 +163,7 @@ class SyncService:
         if not property_detail:
             return False
 
+        count(fetched=1)
         pms_data = prop.pms_data
 
         pms_data.pms_property_id = property_detail.get(
@@ -127,7 +199,9 @@ class SyncService:
         pms_data.pms_property_category = property_detail.get(
             "pms_property_category", pms_data.pms_property_category
         )
-        pms_data.save()
+        with stage("write"):
+            pms_data.save()
+        count(updated=1)
 
         if (
             pms_data.pms_property_latitude is not None
@@ -142,6 +216,7 @@ class SyncService:
         return True
 
     @classmethod
+    @instrumented_sync("rooms")
     def sync_rooms(cls, prop: Property, helper):
         if prop.pms_data is None:
             print(f"No PMS data for property: {prop.name}")
@@ -151,128 +226,148 @@ class SyncService:
         if not rooms_grouped_by_type:
             return False
 
-        # Aquí podrías guardar las habitaciones en la base de datos si es necesario
-        for room_type_id in rooms_grouped_by_type:
-            for room in rooms_grouped_by_type[room_type_id]:
-                # Asegúrate de que room tenga los campos necesarios
-                # if "taquilla" in room["external_room_type_name"].lower():
-                #     continue
-                room_type = RoomType.objects.filter(
-                    property=prop,
-                    external_id=room["external_room_type_id"],
-                    name=room["external_room_type_name"],
-                ).first()
-
-                if not room_type:
-                    room_type = RoomType.objects.create(
+        with stage("write"):
+            # Aquí podrías guardar las habitaciones en la base de datos si es necesario
+            for room_type_id in rooms_grouped_by_type:
+                for room in rooms_grouped_by_type[room_type_id]:
+                    # Asegúrate de que room tenga los campos necesarios
+                    # if "taquilla" in room["external_room_type_name"].lower():
+                    #     continue
+                    room_type = RoomType.objects.filter(
                         property=prop,
                         external_id=room["external_room_type_id"],
                         name=room["external_room_type_name"],
-                    )
+                    ).first()
 
-                pax = extract_pax(room["external_room_type_name"])
-                Room.objects.update_or_create(
-                    property=prop,
-                    name=room["name"],
-                    type=room_type,
-                    external_id=room.get("external_id", ""),
-                    external_room_type_id=room.get("external_room_type_id", ""),
-                    external_room_type_name=room.get("external_room_type_name", ""),
-                    pax=pax,
-                    defaults={
-                        "description": room.get("description", ""),
-                    },
-                )
+                    if not room_type:
+                        room_type = RoomType.objects.create(
+                            property=prop,
+                            external_id=room["external_room_type_id"],
+                            name=room["external_room_type_name"],
+                        )
+
+                    pax = extract_pax(room["external_room_type_name"])
+                    _, created = Room.objects.update_or_create(
+                        property=prop,
+                        name=room["name"],
+                        type=room_type,
+                        external_id=room.get("external_id", ""),
+                        external_room_type_id=room.get("external_room_type_id", ""),
+                        external_room_type_name=room.get("external_room_type_name", ""),
+                        pax=pax,
+                        defaults={
+                            "description": room.get("description", ""),
+                        },
+                    )
+                    count(fetched=1, created=int(created), updated=int(not created))
         return True
 
     @classmethod
-    def sync_reservations(cls, prop: Property, helper, user=None):
+    @instrumented_sync("reservations")
+    def sync_reservations(
+        cls, prop: Property, helper, user=None, checkin=None, checkout=None
+    ):
         if prop.pms_data is None:
             print(f"No PMS data for property: {prop.name}")
             return False
-        reservations_data = helper.download_reservations(prop)
+        reservations_data = helper.download_reservations(
+            prop, checkin=checkin, checkout=checkout
+        )
         if not reservations_data:
             return False
 
         reservations_to_create = []
         reservations_rooms_to_create = []
-        for reservation_data in reservations_data:
-
-            already_exist = Reservation.objects.filter(
-                user=user if user else None,
-                check_in=datetime.strptime(
-                    reservation_data["check_in"], "%Y-%m-%d"
-                ).date(),
-                check_out=datetime.strptime(
-                    reservation_data["check_out"], "%Y-%m-%d"
-                ).date(),
-                property_id=prop.id,
-            ).exists()
-            if already_exist:
-                print(f"Reservation already exists for: {reservation_data}")
-                continue
-
-            occupancy = 0
-            if isinstance(reservation_data["rooms"], list):
-                for room in reservation_data["rooms"]:
-                    occupancy += int(room.get("occupancy", 0))
-            else:
-                occupancy = int(reservation_data["rooms"]["occupancy"])
-
-            reservation = Reservation(
-                property=prop,
-                user=user,
-                check_in=datetime.strptime(
-                    reservation_data["check_in"], "%Y-%m-%d"
-                ).date(),
-                check_out=datetime.strptime(
-                    reservation_data["check_out"], "%Y-%m-%d"
-                ).date(),
-                pax_count=occupancy,
-                total_price=reservation_data["total_price"],
-                paid_online=reservation_data.get("paid_online", None),
-                pay_on_arrival=reservation_data.get("pay_on_arrival", None),
-                channel=reservation_data.get("channel", None),
-                guest_name=reservation_data.get("guest_name", None),
-                guest_corporate=reservation_data.get("guest_corporate", None),
-                guest_email=reservation_data.get("guest_email", None),
-                guest_phone=reservation_data.get("guest_phone", None),
-                guest_address=reservation_data.get("guest_address", None),
-                guest_city=reservation_data.get("guest_city", None),
-                guest_region=reservation_data.get("guest_region", None),
-                guest_country=reservation_data.get("guest_country", None),
-                guest_country_iso=reservation_data.get("guest_country_iso", None),
-                guest_cp=reservation_data.get("guest_cp", None),
-                guest_remarks=reservation_data.get("guest_remarks", None),
-                cancellation_date=reservation_data.get("cancellation_date", None),
-                modification_date=reservation_data.get("modification_date", None),
-                status=reservation_data.get("status", Reservation.PENDING),
-            )
-            reservations_to_create.append(reservation)
-
-            if rooms := reservation_data["rooms"]:
-                for room in rooms:
-
-                    if not (
-                        room_type := RoomType.objects.filter(
-                            external_id=room["room_type_id"]
-                        ).first()
-                    ):
-                        print(f"Room type not found: {room['room_type_id']}")
-                        continue
-
-                    reservation_room = ReservationRoom(
-                        reservation=reservation,
-                        room_type=room_type,
-                        price=reservation_data.get("total_price", 0),
-                        guests=room.get("occupancy", 1),
-                    )
-                    reservations_rooms_to_create.append(reservation_room)
+        count(fetched=len(reservations_data))
+        with stage("diff"):
+            for reservation_data in reservations_data:
+
+                already_exist = Reservation.objects.filter(
+                    user=user if user else None,
+                    check_in=datetime.strptime(
+                        reservation_data["check_in"], "%Y-%m-%d"
+                    ).date(),
+                    check_out=datetime.strptime(
+                        reservation_data["check_out"], "%Y-%m-%d"
+                    ).date(),
+                    property_id=prop.id,
+                ).exists()
+                if already_exist:
+                    print(f"Reservation already exists for: {reservation_data}")
+                    count(skipped=1)
+                    continue
 
-        if reservations_to_create:
-            Reservation.objects.bulk_create(reservations_to_create)
+                occupancy = 0
+                if isinstance(reservation_data["rooms"], list):
+                    for room in reservation_data["rooms"]:
+                        occupancy += int(room.get("occupancy", 0))
+                else:
+                    occupancy = int(reservation_data["rooms"]["occupancy"])
 
-        if reservations_rooms_to_create:
-            ReservationRoom.objects.bulk_create(reservations_rooms_to_create)
+                reservation = Reservation(
+                    property=prop,
+                    user=user,
+                    check_in=datetime.strptime(
+                        reservation_data["check_in"], "%Y-%m-%d"
+                    ).date(),
+                    check_out=datetime.strptime(
+                        reservation_data["check_out"], "%Y-%m-%d"
+                    ).date(),
+                    pax_count=occupancy,
+                    total_price=reservation_data["total_price"],
+                    paid_online=reservation_data.get("paid_online", None),
+                    pay_on_arrival=reservation_data.get("pay_on_arrival", None),
+                    channel=reservation_data.get("channel", None),
+                    guest_name=reservation_data.get("guest_name", None),
+                    guest_corporate=reservation_data.get("guest_corporate", None),
+                    guest_email=reservation_data.get("guest_email", None),
+                    guest_phone=reservation_data.get("guest_phone", None),
+                    guest_address=reservation_data.get("guest_address", None),
+                    guest_city=reservation_data.get("guest_city", None),
+                    guest_region=reservation_data.get("guest_region", None),
+                    guest_country=reservation_data.get("guest_country", None),
+                    guest_country_iso=reservation_data.get("guest_country_iso", None),
+                    guest_cp=reservation_data.get("guest_cp", None),
+                    guest_remarks=reservation_data.get("guest_remarks", None),
+                    cancellation_date=reservation_data.get("cancellation_date", None),
+                    modification_date=reservation_data.get("modification_date", None),
+                    status=reservation_data.get("status", Reservation.PENDING),
+                )
+                reservations_to_create.append(reservation)
+
+                if rooms := reservation_data["rooms"]:
+                    for room in rooms:
+
+                        if not (
+                            room_type := RoomType.objects.filter(
+                                external_id=room["room_type_id"]
+                            ).first()
+                        ):
+                            print(f"Room type not found: {room['room_type_id']}")
+                            continue
+
+                        reservation_room = ReservationRoom(
+                            reservation=reservation,
+                            room_type=room_type,
+                            price=reservation_data.get("total_price", 0),
+                            guests=room.get("occupancy", 1),
+                            stay=reservation.stay_range(),
+                        )
+                        reservations_rooms_to_create.append(reservation_room)
+
+        with stage("write"):
+            if reservations_to_create:
+                Reservation.objects.bulk_create(reservations_to_create)
+
+            if reservations_rooms_to_create:
+                ReservationRoom.objects.bulk_create(reservations_rooms_to_create)
+            if reservations_to_create:
+                # bulk_create skips the signals that keep the rollups current
+                RollupService.schedule_refresh(
+                    prop.id,
+                    min(r.check_in for r in reservations_to_create),
+                    max(r.check_out for r in reservations_to_create),
+                )
+        count(created=len(reservations_to_create))
 
         return True
@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from .models import InventoryHold
+
+
+@shared_task
+def release_expired_holds():
+    """Give back the inventory of pending reservations that were never paid."""
+    released = InventoryHold.objects.expired().release()
+    if released:
+        print(f"Bloqueos de inventario liberados: {released}")
+    return released
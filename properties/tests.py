@@ -1,16 +1,24 @@
 import json
 from datetime import date
+from io import StringIO
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.utils import timezone
 from django.utils.text import slugify
 from rest_framework_simplejwt.tokens import AccessToken
 
+from analytics.models import DailyRollup
 from pms.models import PMS
-from reservations.models import Reservation
+from reservations.models import Reservation, ReservationRoom
+from vouchers.models import DiscountCoupon, PromoCode, Voucher
+from vouchers.services import PromoCodeService
 from zones.models import Zone
 
-from .models import Availability, PmsDataProperty, Property
+from .models import Availability, InventoryHold, PmsDataProperty, Property
 from .models import PropertyService as PropertyServiceModel
 from .models import Room
 from .models import RoomService as RoomServiceModel
@@ -108,10 +116,18 @@ class PropertyAPITest(TestCase):
     def test_list_my_properties(self):
         response = self.client.get("/api/properties/my/")
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = response.json()["items"]
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["id"], self.property.id)
 
+    def test_public_listing(self):
+        response = self.client.get(
+            "/api/properties/", HTTP_X_APP_KEY=settings.PUBLIC_API_KEY
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["items"]
+        self.assertEqual([p["name"] for p in data], [self.property.name])
+
     def test_create_property(self):
         payload = {
             "name": "New Prop",
@@ -323,7 +339,7 @@ class PropertyAPITest(TestCase):
         Service.objects.create(code="ac", name="A/C", description="Cool")
         response = self.client.get("/api/properties/services")
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = response.json()["items"]
         codes = {s["code"] for s in data}
         self.assertIn("wifi", codes)
         self.assertIn("ac", codes)
@@ -372,6 +388,64 @@ class AvailabilityServiceTest(TestCase):
         key = f"{self.room_type.name}-guests:2"
         self.assertIn("rate_id", res.total_price_per_room_type[key][0])
 
+    async def test_async_matches_sync(self):
+        req = AvailabilityRequest(
+            property_id=self.property.id,
+            check_in=date(2025, 1, 1),
+            check_out=date(2025, 1, 3),
+            guests=2,
+        )
+        expected = await sync_to_async(PropertyService.get_availability)(req)
+        res = await PropertyService.aget_availability(req)
+        self.assertEqual(res.model_dump(), expected.model_dump())
+
+
+class InventoryHoldTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(username="holds", password="pass")
+        self.property = Property.objects.create(
+            owner=user,
+            name="Holds",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+        )
+        self.room_type = RoomType.objects.create(property=self.property, name="Suite")
+        self.night = date(2030, 1, 1)
+        self.availability = Availability.objects.create(
+            property=self.property,
+            room_type=self.room_type,
+            date=self.night,
+            availability=1,
+        )
+
+    def _hold(self):
+        reservation = Reservation.objects.create(
+            property=self.property, check_in=self.night, check_out=date(2030, 1, 2)
+        )
+        InventoryHold.place(
+            reservation,
+            self.property.id,
+            self.room_type.id,
+            reservation.check_in,
+            reservation.check_out,
+        )
+        return reservation.inventory_holds.all()
+
+    def test_late_payment_of_a_resold_night_is_flagged(self):
+        expired = self._hold()
+        expired.update(expires_at=timezone.now())
+        resold = self._hold()
+        self.assertEqual(resold.confirm(), 1)
+
+        with self.assertLogs("inventory", level="WARNING"):
+            self.assertEqual(expired.confirm(), 1)
+
+        self.availability.refresh_from_db()
+        self.assertEqual(self.availability.availability, 0)
+        self.assertTrue(expired.get().oversold)
+        self.assertFalse(resold.get().oversold)
+
 
 class SyncPropertyDetailTest(TestCase):
     def setUp(self):
@@ -399,3 +473,105 @@ class SyncPropertyDetailTest(TestCase):
         self.property.refresh_from_db()
         self.assertAlmostEqual(self.property.location.y, 10.0)
         self.assertAlmostEqual(self.property.location.x, 20.0)
+
+    def test_rates_use_room_types_of_the_property(self):
+        other = Property.objects.create(
+            owner=self.user,
+            name="OtherProp",
+            description="Desc",
+            address="Addr",
+            location="POINT(0 0)",
+        )
+        RoomType.objects.create(property=other, name="Other", external_id="7")
+        room_type = RoomType.objects.create(
+            property=self.property, name="Double", external_id="7"
+        )
+        Availability.objects.create(
+            property=self.property,
+            room_type=room_type,
+            date=date(2030, 1, 1),
+            availability=1,
+            rates="[]",
+        )
+
+        written = SyncService.upsert_rates_and_availability(
+            self.property,
+            [
+                {"room_type": "7", "date": "2030-01-01", "availability": 3},
+                {"room_type": "7", "date": "2030-01-02", "availability": 2},
+                {"room_type": "7", "date": "2030-01-02", "rates": [{"id": 1}]},
+            ],
+        )
+
+        self.assertEqual(written, 2)
+        rows = Availability.objects.filter(room_type=room_type).order_by("date")
+        self.assertEqual([a.availability for a in rows], [3, 2])
+        self.assertEqual(json.loads(rows[1].rates), [{"id": 1}])
+        self.assertFalse(Availability.objects.filter(property=other).exists())
+
+
+class SeedSyntheticCommandTest(TestCase):
+    def _seed(self, seed, **options):
+        call_command(
+            "seed_synthetic",
+            seed=seed,
+            **options,
+            zones=2,
+            properties=4,
+            room_types=2,
+            rooms_per_type=2,
+            images=1,
+            days=10,
+            start_date=date(2030, 1, 1),
+            reservations=5,
+            vouchers=3,
+            stdout=StringIO(),
+        )
+
+    def test_counts(self):
+        self._seed(1)
+        self.assertEqual(Zone.objects.count(), 2)
+        self.assertEqual(Property.objects.count(), 4)
+        self.assertEqual(RoomType.objects.count(), 8)
+        self.assertEqual(Room.objects.count(), 16)
+        self.assertEqual(Availability.objects.count(), 80)
+        self.assertEqual(Reservation.objects.count(), 5)
+        rates = json.loads(Availability.objects.first().rates)
+        self.assertEqual(rates[0]["rate_id"], 1)
+        self.assertTrue(rates[0]["prices"])
+        # bulk inserts still reach the code registry and the rollups
+        self.assertEqual(PromoCode.objects.count(), 6)
+        self.assertIsNotNone(PromoCodeService.lookup("sv1x000000"))
+        self.assertTrue(DailyRollup.objects.exists())
+        self.assertFalse(
+            ReservationRoom.objects.filter(stay__isnull=True)
+            .exclude(reservation__status__in=Reservation.RELEASED_STATUSES)
+            .exists()
+        )
+
+    def test_rerun_needs_reset(self):
+        self._seed(3)
+        with self.assertRaises(CommandError):
+            self._seed(3)
+        self._seed(3, reset=True)
+        self.assertEqual(Property.objects.count(), 4)
+        self.assertEqual(Voucher.objects.count(), 3)
+
+    def _availability_snapshot(self):
+        return list(
+            Availability.objects.order_by(
+                "property__name", "room_type__name", "date"
+            ).values_list(
+                "property__name", "room_type__name", "date", "availability", "rates"
+            )
+        )
+
+    def test_deterministic_by_seed(self):
+        self._seed(7)
+        first = self._availability_snapshot()
+        Property.objects.all().delete()
+        Zone.objects.all().delete()
+        Voucher.objects.all().delete()
+        DiscountCoupon.objects.all().delete()
+        self._seed(7)
+        self.assertEqual(first, self._availability_snapshot())
@@ -1,5 +1,4 @@
 import json
-from datetime import timedelta
 from decimal import Decimal
 from typing import List
 
@@ -7,18 +6,23 @@ from django.db import transaction
 from django.utils.timezone import now
 from django.views.decorators.csrf import csrf_exempt
 from ninja import Router
+from ninja.pagination import paginate
 
+from analytics.services import RollupService
 from pms.utils.property_helper_factory import PMSHelperFactory
-from properties.models import Availability, Property
+from properties.models import InventoryHold, Property
 from properties.sync_service import SyncService
 from utils import ErrorSchema, SuccessSchema
+from utils.db_router import use_primary
 from utils.email_service import EmailService
 from utils.error_codes import APIError, ReservationError, ReservationErrorCode
+from utils.pagination import CursorPagination
 from utils.redsys import RedsysService
-from vouchers.models import DiscountCoupon, Voucher
+from vouchers.services import PromoCodeService
 
 from .models import PaymentNotificationLog, Reservation, ReservationRoom
 from .schemas import ReservationBatchSchema, ReservationClientOut, ReservationOut
+from .tasks import send_payment_confirmation_emails
 
 rs = RedsysService()
 router = Router(tags=["reservations"])
@@ -29,33 +33,26 @@ def create_reservation(request, payload: ReservationBatchSchema):
     group_payment_order = rs.generate_numeric_order()
 
     try:
-        with transaction.atomic():
+        # Availability checks must never see a lagging replica
+        with use_primary(), transaction.atomic():
             reservations = payload.reservations
             code = payload.code
             voucher = None
             coupon = None
             if code:
-                try:
-                    voucher = Voucher.objects.select_for_update().get(
-                        code=code, active=True
-                    )
-                except Voucher.DoesNotExist:
-                    try:
-                        coupon = DiscountCoupon.objects.select_for_update().get(
-                            code=code, active=True
-                        )
-                    except DiscountCoupon.DoesNotExist:
-                        pass
+                # The voucher is not locked: its balance is decremented
+                # conditionally at the end of the transaction
+                voucher, coupon = PromoCodeService.resolve(code)
             created_reservations = []
             reservation_rooms_data = []
             descriptions = []
+            voucher_allocations = []
 
             for data in reservations:
                 check_in = data.check_in
                 check_out = data.check_out
                 room_type_id = data.room_type_id
                 property_id = data.property_id
-                current_date = check_in
 
                 if check_in >= check_out:
                     raise APIError(
@@ -77,30 +74,6 @@ def create_reservation(request, payload: ReservationBatchSchema):
                         property, helper, checkin=check_in, checkout=check_out
                     )
 
-                while current_date < check_out:
-                    availability = Availability.objects.select_for_update().get(
-                        date=current_date,
-                        room_type_id=room_type_id,
-                        property_id=property_id,
-                    )
-                    if availability.availability < 1:
-                        raise APIError(
-                            f"No availability for room type {room_type_id} on {current_date}.",
-                            ReservationErrorCode.NO_AVAILABILITY,
-                        )
-                    current_date += timedelta(days=1)
-
-                current_date = check_in
-                while current_date < check_out:
-                    availability = Availability.objects.select_for_update().get(
-                        date=current_date,
-                        room_type_id=room_type_id,
-                        property_id=property_id,
-                    )
-                    availability.availability -= 1
-                    availability.save()
-                    current_date += timedelta(days=1)
-
                 reservation = Reservation.objects.create(
                     property_id=property_id,
                     check_in=check_in,
@@ -124,6 +97,10 @@ def create_reservation(request, payload: ReservationBatchSchema):
                     channel=data.channel,
                     payment_order=group_payment_order,  # <- todas comparten el mismo
                 )
+                # The inventory is only held until the payment is confirmed
+                InventoryHold.place(
+                    reservation, property_id, room_type_id, check_in, check_out
+                )
 
                 created_reservations.append(reservation)
                 reservation_rooms_data.append(
@@ -166,7 +143,8 @@ def create_reservation(request, payload: ReservationBatchSchema):
                         if amount > remaining_voucher:
                             amount = remaining_voucher
                     if amount > 0:
-                        reservation.apply_voucher(voucher, amount)
+                        reservation.apply_voucher_discount(amount)
+                        voucher_allocations.append((reservation, amount))
                         if reservation.total_price <= 0:
                             reservation.status = Reservation.CONFIRMED
                             reservation.payment_status = "paid"
@@ -201,8 +179,26 @@ def create_reservation(request, payload: ReservationBatchSchema):
             else:
                 response_data = {"success": True, "redsys_args": None}
 
+            if voucher_allocations:
+                try:
+                    voucher.redeem_many(voucher_allocations)
+                except ValueError as exc:
+                    # Another booking spent the balance after it was read
+                    raise ReservationError(
+                        "Voucher balance is no longer sufficient",
+                        ReservationErrorCode.VOUCHER_EXHAUSTED,
+                    ) from exc
+
+            # Fully paid with the voucher: nothing left to wait for
+            InventoryHold.objects.filter(
+                reservation__in=created_reservations,
+                reservation__status=Reservation.CONFIRMED,
+            ).confirm()
+
         return response_data
 
+    except APIError:
+        raise
     except Exception as e:
         raise APIError(
             f"An error occurred while creating the reservation(s): {str(e)}",
@@ -232,7 +228,7 @@ def redsys_notification(request):
             merchant_parameters, signature_received
         )
 
-        PaymentNotificationLog.objects.create(
+        notification_log = PaymentNotificationLog.objects.create(
             raw_parameters=merchant_parameters,
             signature=signature_received,
             order_id=order_id,
@@ -247,37 +243,38 @@ def redsys_notification(request):
             )
 
         reservations = Reservation.objects.filter(payment_order=order_id)
-        if not reservations.exists():
-            raise APIError(
-                f"No reservations found for payment_order: {order_id}",
-                ReservationErrorCode.NOT_FOUND,
+        with transaction.atomic():
+            # Locking the unpaid rows makes concurrent retries wait here and
+            # then find nothing left to confirm
+            confirmed_ids = list(
+                reservations.exclude(payment_status="paid")
+                .select_for_update()
+                .values_list("id", flat=True)
+            )
+            if not confirmed_ids:
+                if not reservations.exists():
+                    raise APIError(
+                        f"No reservations found for payment_order: {order_id}",
+                        ReservationErrorCode.NOT_FOUND,
+                    )
+                notification_log.message = "Duplicate notification"
+                notification_log.save(update_fields=["message"])
+                return SuccessSchema(success=True, message="ok")
+
+            Reservation.objects.filter(id__in=confirmed_ids).update(
+                payment_response=decoded,
+                payment_date=now(),
+                payment_status="paid",
+                status=Reservation.CONFIRMED,
+            )
+            InventoryHold.objects.filter(reservation_id__in=confirmed_ids).confirm()
+            RollupService.schedule_refresh_for(
+                Reservation.objects.filter(id__in=confirmed_ids)
             )
-
-        for reservation in reservations:
-            reservation.payment_response = decoded
-            reservation.payment_date = now()
-            reservation.payment_status = "paid"
-            reservation.status = Reservation.CONFIRMED
-            reservation.save()
-
-            if reservation.guest_email:
-                EmailService.send_email(
-                    subject="Reserva confirmada",
-                    to_email=reservation.guest_email,
-                    template_name="emails/reservation_confirmation_guest.html",
-                    context={"reservation": reservation},
-                )
-
-            owner_email = getattr(reservation.property.owner, "email", None)
-            if owner_email:
-                EmailService.send_email(
-                    subject="Nueva reserva confirmada",
-                    to_email=owner_email,
-                    template_name="emails/reservation_confirmation_owner.html",
-                    context={"reservation": reservation},
-                )
-
             # Notificar al PMS si lo deseas aquí
+            transaction.on_commit(
+                lambda: send_payment_confirmation_emails.delay(confirmed_ids)
+            )
 
         return SuccessSchema(
             success=True,
@@ -299,9 +296,13 @@ def redsys_notification(request):
 
 
 @router.get("/my", response=List[ReservationClientOut])
+@paginate(CursorPagination, ordering=("-created_at", "-id"))
 def my_reservations(request):
-    reservations = Reservation.objects.filter(user=request.user).order_by("-created_at")
-    return reservations
+    return (
+        Reservation.objects.filter(user=request.user)
+        .select_related("property", "discount_coupon")
+        .prefetch_related("reservations__room_type")
+    )
 
 
 @router.post(
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:53
+
+import logging
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+# Rooms of cancelled or refunded reservations keep a null stay
+BACKFILL_STAY = """
+UPDATE reservation_rooms rr
+SET stay = daterange(r.check_in, r.check_out)
+FROM reservations r
+WHERE r.id = rr.reservation_id
+  AND r.check_in < r.check_out
+  AND r.status NOT IN ('cancelled', 'pending_refund', 'refunded')
+"""
+
+
+def release_overlapping_stays(apps, schema_editor):
+    """Keep one stay per room and night before the constraint is added.
+
+    Rooms booked twice for the same nights keep the stay of the reservation
+    created first; the later ones get a null stay (like a cancelled
+    reservation) and are logged so they can be rebooked by hand.
+    """
+    ReservationRoom = apps.get_model("reservations", "ReservationRoom")
+    logger = logging.getLogger("inventory")
+
+    kept = {}
+    released = []
+    rows = (
+        ReservationRoom.objects.filter(room__isnull=False, stay__isnull=False)
+        .order_by("reservation__created_at", "reservation_id", "id")
+        .values_list("id", "reservation_id", "room_id", "stay")
+    )
+    for row_id, reservation_id, room_id, stay in rows.iterator():
+        stays = kept.setdefault(room_id, [])
+        clash = next(
+            (
+                other
+                for other in stays
+                if stay.lower < other[1].upper and other[1].lower < stay.upper
+            ),
+            None,
+        )
+        if clash is None:
+            stays.append((reservation_id, stay))
+            continue
+        released.append(row_id)
+        logger.warning(
+            "Reserva %s: la habitación %s ya está ocupada por la reserva %s "
+            "entre %s y %s; se libera su estancia",
+            reservation_id,
+            room_id,
+            clash[0],
+            stay.lower,
+            stay.upper,
+        )
+
+    if released:
+        ReservationRoom.objects.filter(id__in=released).update(stay=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0016_inventory_hold'),
+        ('reservations', '0012_reservationroom_rate_id'),
+    ]
+
+    operations = [
+        # GiST support for the equality on room_id
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='reservationroom',
+            name='stay',
+            field=django.contrib.postgres.fields.ranges.DateRangeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_STAY, migrations.RunSQL.noop),
+        migrations.RunPython(release_overlapping_stays, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reservationroom',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('room__isnull', False), ('stay__isnull', False)), expressions=[('room', '='), ('stay', '&&')], name='reservation_room_no_overlap'),
+        ),
+    ]
@@ -1,7 +1,17 @@
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from psycopg.errors import ExclusionViolation
+from psycopg.types.range import DateRange
 
-from properties.models import Room, RoomType
+from properties.models import InventoryHold, Room, RoomType
 from utils.error_codes import ReservationError, ReservationErrorCode
 
 
@@ -16,17 +26,31 @@ class ReservationRoom(models.Model):
     price = models.FloatField(null=True, blank=True)
     guests = models.IntegerField(default=1, verbose_name="Cantidad de huéspedes")
     rate_id = models.IntegerField(null=True, blank=True, verbose_name="ID de tarifa")
+    # Nights [check_in, check_out) of the reservation; null once cancelled so
+    # the room can be booked again
+    stay = DateRangeField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = "reservation_rooms"
         verbose_name = "Habitación reservada"
         verbose_name_plural = "Habitaciones reservadas"
+        constraints = [
+            ExclusionConstraint(
+                name="reservation_room_no_overlap",
+                expressions=[
+                    ("room", RangeOperators.EQUAL),
+                    ("stay", RangeOperators.OVERLAPS),
+                ],
+                condition=Q(room__isnull=False, stay__isnull=False),
+            ),
+        ]
 
     def clean(self):
+        stay = self.reservation.stay_range()
+        if not (self.room_id and stay):
+            return
         overlapping = ReservationRoom.objects.filter(
-            room=self.room,
-            reservation__check_in__lt=self.reservation.check_out,
-            reservation__check_out__gt=self.reservation.check_in,
+            room=self.room, stay__overlap=stay
         ).exclude(reservation=self.reservation)
 
         if overlapping.exists():
@@ -34,6 +58,133 @@ class ReservationRoom(models.Model):
                 "La habitación ya está reservada en ese rango de fechas."
             )
 
+    def save(self, *args, **kwargs):
+        self.stay = self.reservation.stay_range()
+        with room_overlap_as_error():
+            super().save(*args, **kwargs)
+
+
+@contextmanager
+def room_overlap_as_error():
+    """Turn a ``reservation_room_no_overlap`` violation into a ``ReservationError``."""
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        if not isinstance(exc.__cause__, ExclusionViolation):
+            raise
+        raise ReservationError(
+            "Room already booked for those dates",
+            ReservationErrorCode.ROOM_ALREADY_BOOKED,
+        ) from exc
+
+
+class TransitionResult(NamedTuple):
+    """Outcome of a set-based status transition."""
+
+    #: Ids of the reservations that changed status
+    updated: List[int]
+    #: Reservation id -> reason it was left untouched
+    rejected: Dict[int, str]
+
+
+class ReservationQuerySet(models.QuerySet):
+    def with_room_summary(self):
+        """Annotate ``room_names`` and ``room_type_names`` (comma separated).
+
+        Read by ``__str__`` and ``get_room_types`` instead of a query per
+        reservation.
+        """
+        return self.annotate(
+            room_names=StringAgg(
+                "reservations__room__name",
+                ", ",
+                distinct=True,
+                order_by="reservations__room__name",
+                default="",
+            ),
+            room_type_names=StringAgg(
+                "reservations__room_type__name",
+                ", ",
+                distinct=True,
+                order_by="reservations__room_type__name",
+                default="",
+            ),
+        )
+
+    def _locked_ids(self, condition):
+        """Lock and return the ids of the rows of this queryset matching ``condition``.
+
+        Works on annotated querysets (such as the admin's) by locking the
+        base rows selected through a subquery.
+        """
+        rows = self.model.objects.filter(pk__in=self.values("pk"))
+        return list(
+            rows.filter(condition)
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def _rejected(self, updated, reason):
+        rows = self.model.objects.filter(pk__in=self.values("pk")).exclude(
+            pk__in=updated
+        )
+        return {pk: reason(status) for pk, status in rows.values_list("pk", "status")}
+
+    def cancel(self) -> TransitionResult:
+        """Set-based :meth:`Reservation.cancel`.
+
+        Moves every cancellable reservation to pending refund in one
+        ``UPDATE`` and queues the guest and owner notifications in a single
+        task once the transaction commits.
+        """
+        from analytics.services import RollupService
+
+        from .tasks import send_cancellation_emails
+
+        cancelled = [Reservation.CANCELLED, Reservation.PENDING_REFUND]
+        cancellable = ~Q(status__in=cancelled + [Reservation.OK]) & (
+            Q(check_in__isnull=True) | Q(check_in__gt=timezone.localdate())
+        )
+        with transaction.atomic():
+            updated = self._locked_ids(cancellable)
+            if updated:
+                self.model.objects.filter(pk__in=updated).update(
+                    status=Reservation.PENDING_REFUND,
+                    cancellation_date=timezone.now(),
+                )
+                InventoryHold.objects.filter(reservation_id__in=updated).release()
+                ReservationRoom.objects.filter(reservation_id__in=updated).update(
+                    stay=None
+                )
+                RollupService.schedule_refresh_for(
+                    self.model.objects.filter(pk__in=updated)
+                )
+                transaction.on_commit(lambda: send_cancellation_emails.delay(updated))
+            rejected = self._rejected(
+                updated,
+                lambda status: (
+                    "Reservation already cancelled"
+                    if status in cancelled
+                    else "Reservation cannot be cancelled after being used"
+                ),
+            )
+        return TransitionResult(updated, rejected)
+
+    def mark_refunded(self) -> TransitionResult:
+        """Set-based :meth:`Reservation.mark_refunded`."""
+        with transaction.atomic():
+            updated = self._locked_ids(Q(status=Reservation.PENDING_REFUND))
+            if updated:
+                self.model.objects.filter(pk__in=updated).update(
+                    status=Reservation.REFUNDED
+                )
+            rejected = self._rejected(
+                updated, lambda status: "Reservation is not pending refund"
+            )
+        return TransitionResult(updated, rejected)
+
 
 class Reservation(models.Model):
     PENDING = "pending"
@@ -174,16 +325,46 @@ class Reservation(models.Model):
     )
     payment_date = models.DateTimeField(null=True, blank=True)
 
+    objects = ReservationQuerySet.as_manager()
+
+    #: Statuses that no longer occupy their rooms
+    RELEASED_STATUSES = (CANCELLED, PENDING_REFUND, REFUNDED)
+
     class Meta:
         db_table = "reservations"
         verbose_name = "Reserva"
         verbose_name_plural = "Reservas"
 
+    def save(self, *args, **kwargs):
+        # A new reservation has no rooms yet; they take the stay when saved
+        update_fields = kwargs.get("update_fields")
+        sync_rooms = not self._state.adding and (
+            update_fields is None
+            or {"check_in", "check_out", "status"} & set(update_fields)
+        )
+        with room_overlap_as_error():
+            super().save(*args, **kwargs)
+            if sync_rooms:
+                self.reservations.update(stay=self.stay_range())
+
+    def stay_range(self):
+        """Nights booked by the reservation, or None if it holds no room."""
+        if self.status in self.RELEASED_STATUSES or not (
+            self.check_in and self.check_out and self.check_in < self.check_out
+        ):
+            return None
+        return DateRange(self.check_in, self.check_out)
+
     def __str__(self):
-        rooms = ", ".join([room.name for room in self.rooms.all()])
+        rooms = getattr(self, "room_names", None)
+        if rooms is None:
+            rooms = ", ".join([room.name for room in self.rooms.all()])
         return f"Reserva en {rooms} del {self.check_in} al {self.check_out}"
 
     def get_room_types(self):
+        room_types = getattr(self, "room_type_names", None)
+        if room_types is not None:
+            return room_types
         room_types = self.reservations.select_related("room_type").all()
         return ", ".join(set(rr.room_type.name for rr in room_types if rr.room_type))
 
@@ -205,17 +386,23 @@ class Reservation(models.Model):
             )
 
     def apply_voucher(self, voucher, amount):
+        voucher.redeem(amount, reservation=self)
+        self.apply_voucher_discount(amount)
+
+    def apply_voucher_discount(self, amount):
+        """Discount ``amount`` from the price without redeeming the voucher.
+
+        The caller redeems it later (``Voucher.redeem_many``) in the same
+        transaction.
+        """
         if self.original_price is None:
             self.original_price = self.total_price
-        voucher.redeem(amount, reservation=self)
         self.total_price = float(self.total_price) - float(amount)
         self.discount_amount = float(self.discount_amount) + float(amount)
         self.save(update_fields=["total_price", "discount_amount", "original_price"])
 
     def cancel(self):
         """Mark the reservation as pending refund if cancellation is allowed."""
-        from django.utils import timezone
-
         if self.status in [Reservation.CANCELLED, Reservation.PENDING_REFUND]:
             raise ReservationError(
                 "Reservation already cancelled",
@@ -234,6 +421,7 @@ class Reservation(models.Model):
         self.status = Reservation.PENDING_REFUND
         self.cancellation_date = timezone.now()
         self.save()
+        self.inventory_holds.release()
 
     def mark_refunded(self):
         """Mark the reservation as refunded once the money has been returned."""
@@ -42,3 +42,57 @@ def send_seven_day_reminders():
 def send_one_day_reminders():
     """Send reminders one day before check-in."""
     return send_check_in_reminder(1)
+
+
+@shared_task
+def send_payment_confirmation_emails(reservation_ids):
+    """Notify guests and owners of reservations whose payment was confirmed."""
+    reservations = (
+        Reservation.objects.filter(id__in=reservation_ids)
+        .select_related("property__owner")
+        .with_room_summary()
+    )
+    for reservation in reservations:
+        if reservation.guest_email:
+            EmailService.send_email(
+                subject="Reserva confirmada",
+                to_email=reservation.guest_email,
+                template_name="emails/reservation_confirmation_guest.html",
+                context={"reservation": reservation},
+            )
+
+        owner_email = getattr(reservation.property.owner, "email", None)
+        if owner_email:
+            EmailService.send_email(
+                subject="Nueva reserva confirmada",
+                to_email=owner_email,
+                template_name="emails/reservation_confirmation_owner.html",
+                context={"reservation": reservation},
+            )
+    return len(reservations)
+
+
+@shared_task
+def send_cancellation_emails(reservation_ids):
+    """Notify guests and owners of reservations moved to pending refund."""
+    reservations = Reservation.objects.filter(id__in=reservation_ids).select_related(
+        "property__owner"
+    )
+    for reservation in reservations:
+        if reservation.guest_email:
+            EmailService.send_email(
+                subject="Cancelación en proceso",
+                to_email=reservation.guest_email,
+                template_name="emails/reservation_cancellation_processing.html",
+                context={"reservation": reservation},
+            )
+
+        owner_email = getattr(reservation.property.owner, "email", None)
+        if owner_email:
+            EmailService.send_email(
+                subject="Reserva pendiente de devolución",
+                to_email=owner_email,
+                template_name="emails/reservation_cancellation_owner_notice.html",
+                context={"reservation": reservation},
+            )
+    return len(reservations)
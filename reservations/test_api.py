@@ -8,8 +8,10 @@ from django.test import Client, TestCase
 from django.utils import timezone
 from rest_framework_simplejwt.tokens import AccessToken
 
-from properties.models import Availability, Property, RoomType
+from properties.models import Availability, InventoryHold, Property, RoomType
+from properties.tasks import release_expired_holds
 from reservations.models import Reservation, ReservationRoom
+from utils.error_codes import ReservationErrorCode
 from vouchers.models import DiscountCoupon, Voucher
 
 User = get_user_model()
@@ -108,6 +110,12 @@ class ReservationAPITest(TestCase):
         self.assertEqual(float(voucher.remaining_amount), 20)
         self.assertEqual(reservation.voucher_redemptions.count(), 1)
         mock_pay.assert_not_called()
+        # Paid in full: the hold is confirmed right away
+        availability = Availability.objects.get(
+            property=self.property, room_type=self.room_type, date=self.check_in
+        )
+        self.assertEqual(availability.availability, 1)
+        self.assertFalse(InventoryHold.objects.active().exists())
 
     @patch("reservations.api.SyncService.sync_rates_and_availability")
     @patch("utils.redsys.RedsysService.generate_numeric_order", return_value="0002")
@@ -185,7 +193,9 @@ class ReservationAPITest(TestCase):
         mock_pay.assert_called_once()
         list_response = self.client.get("/api/reservations/my")
         self.assertEqual(list_response.status_code, 200)
-        self.assertEqual(list_response.json()[0]["discount_coupon_code"], coupon.code)
+        self.assertEqual(
+            list_response.json()["items"][0]["discount_coupon_code"], coupon.code
+        )
 
     @patch("reservations.api.SyncService.sync_rates_and_availability")
     @patch("utils.redsys.RedsysService.generate_numeric_order", return_value="0004")
@@ -292,3 +302,71 @@ class ReservationAPITest(TestCase):
             property=self.property, room_type=self.room_type, date=self.check_in
         )
         self.assertEqual(availability.availability, 2)
+
+    @patch("reservations.api.SyncService.sync_rates_and_availability")
+    @patch("utils.redsys.RedsysService.generate_numeric_order", return_value="0008")
+    def test_voucher_spent_by_concurrent_checkout(self, mock_order, mock_sync):
+        voucher = Voucher.objects.create(
+            code="RACE",
+            amount=100,
+            remaining_amount=100,
+            created_by=self.user,
+        )
+        # This checkout read the balance before the other one committed
+        stale = Voucher.objects.get(pk=voucher.pk)
+        voucher.redeem(70)
+        payload = self._payload(80)
+        payload["code"] = voucher.code
+        with patch(
+            "reservations.api.PromoCodeService.resolve", return_value=(stale, None)
+        ):
+            response = self.client.post(
+                "/api/reservations/",
+                data=json.dumps(payload),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["code"], ReservationErrorCode.VOUCHER_EXHAUSTED
+        )
+        self.assertEqual(Reservation.objects.count(), 0)
+        self.assertFalse(InventoryHold.objects.exists())
+        voucher.refresh_from_db()
+        self.assertEqual(float(voucher.remaining_amount), 30)
+        self.assertEqual(voucher.redemptions.count(), 1)
+
+    @patch("reservations.api.SyncService.sync_rates_and_availability")
+    @patch("utils.redsys.RedsysService.generate_numeric_order", return_value="0007")
+    @patch("utils.redsys.RedsysService.prepare_payment_for_group", return_value={})
+    def test_pending_reservations_hold_inventory(self, mock_pay, mock_order, mock_sync):
+        def book(count):
+            return self.client.post(
+                "/api/reservations/",
+                data=json.dumps(self._multi_payload([50] * count)),
+                content_type="application/json",
+            )
+
+        self.assertEqual(book(2).status_code, 200)
+        availability = Availability.objects.get(
+            property=self.property, room_type=self.room_type, date=self.check_in
+        )
+        self.assertEqual(availability.availability, 2)
+        self.assertEqual(InventoryHold.objects.active().count(), 2)
+
+        response = book(1)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], 101)
+
+        # Unpaid holds expire and give the rooms back
+        InventoryHold.objects.update(expires_at=timezone.now())
+        self.assertEqual(release_expired_holds(), 2)
+        self.assertEqual(book(1).status_code, 200)
+
+        # Payment turns the hold into sold inventory
+        reservation = Reservation.objects.latest("id")
+        self.assertEqual(
+            InventoryHold.objects.filter(reservation=reservation).confirm(), 1
+        )
+        availability.refresh_from_db()
+        self.assertEqual(availability.availability, 1)
+        self.assertFalse(InventoryHold.objects.active().exists())
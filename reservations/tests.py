@@ -1,4 +1,5 @@
 from datetime import date
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core import mail
@@ -7,10 +8,11 @@ from django.test import TestCase
 from django.utils import timezone
 
 from properties.models import Property, Room, RoomType
-from reservations.tasks import send_check_in_reminder
-from utils.error_codes import ReservationError
+from reservations.api import rs
+from reservations.tasks import send_check_in_reminder, send_payment_confirmation_emails
+from utils.error_codes import ReservationError, ReservationErrorCode
 
-from .models import Reservation, ReservationRoom
+from .models import PaymentNotificationLog, Reservation, ReservationRoom
 
 User = get_user_model()
 
@@ -44,6 +46,22 @@ class ReservationModelTest(TestCase):
         expected = f"Reserva en {self.room.name} del 2025-01-01 al 2025-01-02"
         self.assertEqual(str(reservation), expected)
 
+    def test_room_summary_annotation(self):
+        reservation = Reservation.objects.create(
+            property=self.property,
+            check_in=date(2025, 1, 1),
+            check_out=date(2025, 1, 2),
+        )
+        ReservationRoom.objects.create(
+            reservation=reservation, room=self.room, room_type=self.room_type
+        )
+        reservation = Reservation.objects.with_room_summary().get(id=reservation.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                str(reservation), "Reserva en Room 1 del 2025-01-01 al 2025-01-02"
+            )
+            self.assertEqual(reservation.get_room_types(), "Deluxe")
+
     def test_overlapping_reservation_room(self):
         reservation1 = Reservation.objects.create(
             property=self.property,
@@ -67,6 +85,38 @@ class ReservationModelTest(TestCase):
         with self.assertRaises(ValidationError):
             rr.clean()
 
+    def test_room_overlap_is_rejected_by_the_database(self):
+        first = Reservation.objects.create(
+            property=self.property,
+            check_in=date(2030, 1, 1),
+            check_out=date(2030, 1, 3),
+        )
+        ReservationRoom.objects.create(reservation=first, room=self.room)
+        second = Reservation.objects.create(
+            property=self.property,
+            check_in=date(2030, 1, 2),
+            check_out=date(2030, 1, 4),
+        )
+
+        with self.assertRaises(ReservationError) as ctx:
+            ReservationRoom.objects.create(reservation=second, room=self.room)
+        self.assertEqual(ctx.exception.code, ReservationErrorCode.ROOM_ALREADY_BOOKED)
+
+        # Back-to-back stays do not overlap
+        second.check_in = date(2030, 1, 3)
+        second.save()
+        ReservationRoom.objects.create(reservation=second, room=self.room)
+
+        # Moving into booked nights is rejected too
+        second.check_in = date(2030, 1, 2)
+        with self.assertRaises(ReservationError):
+            second.save()
+
+        # A cancelled reservation frees its room
+        first.cancel()
+        second.save()
+        self.assertIsNone(first.reservations.get().stay)
+
 
 class ReservationReminderTaskTest(TestCase):
     def setUp(self):
@@ -146,6 +196,41 @@ class ReservationCancellationTest(TestCase):
         with self.assertRaises(ReservationError):
             self.reservation.mark_refunded()
 
+    @patch("analytics.tasks.refresh_daily_rollups.delay")
+    @patch("reservations.tasks.send_cancellation_emails.delay")
+    def test_bulk_cancel_and_refund(self, mock_emails, mock_refresh):
+        used = Reservation.objects.create(
+            property=self.property,
+            check_in=timezone.localdate() - timezone.timedelta(days=2),
+            check_out=timezone.localdate() - timezone.timedelta(days=1),
+            status=Reservation.OK,
+        )
+        queryset = Reservation.objects.filter(property=self.property)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = queryset.with_room_summary().cancel()
+        self.assertEqual(result.updated, [self.reservation.id])
+        self.assertEqual(
+            result.rejected,
+            {used.id: "Reservation cannot be cancelled after being used"},
+        )
+        mock_emails.assert_called_once_with([self.reservation.id])
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.status, Reservation.PENDING_REFUND)
+        self.assertIsNotNone(self.reservation.cancellation_date)
+
+        result = queryset.cancel()
+        self.assertEqual(result.updated, [])
+        self.assertEqual(
+            result.rejected[self.reservation.id], "Reservation already cancelled"
+        )
+
+        result = queryset.mark_refunded()
+        self.assertEqual(result.updated, [self.reservation.id])
+        self.assertEqual(list(result.rejected), [used.id])
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.status, Reservation.REFUNDED)
+
 
 class ReservationConfirmationEmailTest(TestCase):
     def setUp(self):
@@ -169,18 +254,41 @@ class ReservationConfirmationEmailTest(TestCase):
         self.reservation.payment_order = "123456"
         self.reservation.save()
 
-    # def test_emails_sent_on_payment_notification(self):
-    #     mail.outbox = []
-    #
-    #     request = HttpRequest()
-    #     request.method = "POST"
-    #     request.POST = QueryDict(mutable=True)
-    #     request.POST.update({
-    #         "Ds_MerchantParameters": "mp",
-    #         "Ds_Signature": "sig"
-    #     })
-    #
-    #     with patch.object(rs, "process_notification", return_value=({}, "123456")):
-    #         redsys_notification(request)
-    #
-    #     self.assertEqual(len(mail.outbox), 2)
+    def _notify(self):
+        with (
+            patch.object(
+                rs,
+                "process_notification",
+                return_value=({"Ds_Order": "123456"}, "123456"),
+            ),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            return self.client.post(
+                "/api/reservations/redsys/notify/",
+                {"Ds_MerchantParameters": "mp", "Ds_Signature": "sig"},
+            )
+
+    @patch("analytics.tasks.refresh_daily_rollups.delay")
+    @patch(
+        "reservations.tasks.send_payment_confirmation_emails.delay",
+        side_effect=send_payment_confirmation_emails,
+    )
+    def test_payment_notification_is_idempotent(self, mock_delay, mock_refresh):
+        mail.outbox = []
+
+        self.assertEqual(self._notify().status_code, 200)
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.status, Reservation.CONFIRMED)
+        self.assertEqual(self.reservation.payment_status, "paid")
+        self.assertEqual(len(mail.outbox), 2)
+
+        # Redsys retries are acknowledged without confirming or mailing again
+        self.assertEqual(self._notify().status_code, 200)
+        self.assertEqual(mock_delay.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            PaymentNotificationLog.objects.filter(order_id="123456")
+            .values_list("message", flat=True)
+            .first(),
+            "Duplicate notification",
+        )
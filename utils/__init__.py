@@ -1,7 +1,10 @@
-from .d_date import get_ddate_id, get_ddate_text
+from .d_date import get_ddate_id, get_ddate_text, split_in_months
 from .error_codes import (
+    AnalyticsErrorCode,
     APIError,
     CustomerErrorCode,
+    PaginationErrorCode,
+    PmsErrorCode,
     PropertyErrorCode,
     ReservationError,
     ReservationErrorCode,
@@ -19,6 +22,7 @@ __all__ = [
     "generate_presigned_url",
     "get_ddate_id",
     "get_ddate_text",
+    "split_in_months",
     "ErrorSchema",
     "SuccessSchema",
     "APIError",
@@ -28,4 +32,7 @@ __all__ = [
     "CustomerErrorCode",
     "SecurityErrorCode",
     "ZoneErrorCode",
+    "PmsErrorCode",
+    "PaginationErrorCode",
+    "AnalyticsErrorCode",
 ]
@@ -1,11 +1,96 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
 from ninja.security import HttpBearer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from utils.metrics import record_cache
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached user now and again once the transaction commits.
+
+    The second delete discards a copy cached by a request that read the row
+    before the change was committed.
+    """
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _cached_user_data(user) -> dict:
+    """Cacheable copy of ``user``: its fields without the password hash."""
+    fields = {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields
+        if field.attname != "password"
+    }
+    return {"fields": fields, "password_md5": get_md5_hash_password(user.password)}
+
+
+def _user_from_cache(data):
+    # The password is left deferred: it is only loaded if something reads it
+    fields = data["fields"]
+    return get_user_model().from_db("default", list(fields), list(fields.values()))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that keeps the resolved user in the cache.
+
+    Users are cached by id for ``AUTH_USER_CACHE_TTL`` seconds and dropped
+    when they are saved or deleted (see ``customers.signals``), so
+    deactivations and password changes apply on the next request. The cache
+    holds the user's fields and the md5 of its password hash (what
+    ``CHECK_REVOKE_TOKEN`` compares), never the hash itself.
+    """
+
+    def get_user(self, validated_token):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        if not ttl:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        key = user_cache_key(user_id)
+        data = cache.get(key)
+        record_cache("auth_user", data is not None)
+        if data is None:
+            user = super().get_user(validated_token)
+            cache.set(key, _cached_user_data(user), ttl)
+            return user
+
+        # Same checks as JWTAuthentication.get_user, without the query
+        user = _user_from_cache(data)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+            != data["password_md5"]
+        ):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+        return user
+
+
+# Stateless, so a single instance is shared by every request
+jwt_authenticator = CachedJWTAuthentication()
 
 
 class AuthBearer(HttpBearer):
     def authenticate(self, request, token):
-        from rest_framework_simplejwt.authentication import JWTAuthentication
-
-        jwt_authenticator = JWTAuthentication()
         validated_token = jwt_authenticator.get_validated_token(token)
         user = jwt_authenticator.get_user(validated_token)
         request.user = user
@@ -1,6 +1,6 @@
 from datetime import date, datetime, timedelta
 from functools import lru_cache
-from typing import Union
+from typing import List, Tuple, Union
 
 BASE_DATE = date(2022, 9, 12)
 
@@ -66,3 +66,24 @@ def _cached_get_ddate_text(ddate_id: int) -> str:
     :return: String representando la fecha en formato 'YYYY-MM-DD'.
     """
     return (BASE_DATE + timedelta(days=ddate_id - 1)).isoformat()
+
+
+def split_in_months(start: date, end: date) -> List[Tuple[date, date]]:
+    """
+    Divide el rango [start, end] en tramos que no cruzan de un mes a otro.
+
+    :param start: Primer día del rango.
+    :param end: Último día del rango (incluido).
+    :return: Lista de tuplas (primer día, último día) por cada mes.
+    """
+    ranges = []
+    current = start
+    while current <= end:
+        if current.month == 12:
+            next_month = date(current.year + 1, 1, 1)
+        else:
+            next_month = date(current.year, current.month + 1, 1)
+        last_day = min(end, next_month - timedelta(days=1))
+        ranges.append((current, last_day))
+        current = next_month
+    return ranges
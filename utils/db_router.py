@@ -0,0 +1,98 @@
+"""Read-replica routing.
+
+Reads go to the primary unless the code runs under :func:`replica_reads`
+(public read routes), which sends them to one replica from
+``DATABASE_REPLICAS`` for the whole request, serialization included. Once
+anything is written, or inside a transaction, the request is pinned to the
+primary so it always reads its own writes and locked rows.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class _RoutingState:
+    def __init__(self, alias):
+        self.alias = alias
+        self.pinned = alias == DEFAULT_DB_ALIAS
+
+
+# Mutable state shared with the sync_to_async threads of the same request, so
+# a write made in any of them pins the rest of the request.
+_routing: ContextVar = ContextVar("db_routing", default=None)
+
+
+def _replica_state():
+    replicas = settings.DATABASE_REPLICAS
+    return _RoutingState(random.choice(replicas) if replicas else DEFAULT_DB_ALIAS)
+
+
+def replica_reads(func):
+    """Let ``func`` (a ninja operation's ``run``) read from a replica.
+
+    Apply it with ``@decorate_view(replica_reads)``.
+    """
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            token = _routing.set(_replica_state())
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _routing.reset(token)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _routing.set(_replica_state())
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _routing.reset(token)
+
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside this block, even under ``replica_reads``."""
+    token = _routing.set(_RoutingState(DEFAULT_DB_ALIAS))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+def pin_to_primary():
+    """Send the remaining reads of the current request to the primary."""
+    state = _routing.get()
+    if state is not None:
+        state.pinned = True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -24,6 +24,8 @@ class ReservationErrorCode(IntEnum):
     PAYMENT_FAILED = 103
     NOT_FOUND = 104
     CANCEL_NOT_ALLOWED = 105
+    ROOM_ALREADY_BOOKED = 106
+    VOUCHER_EXHAUSTED = 107
 
 
 class ReservationError(APIError):
@@ -72,3 +74,23 @@ class ZoneErrorCode(IntEnum):
     ZONE_NOT_FOUND = 500
     INVALID_ZONE_ID = 501
     ZONE_AREA_TOO_LARGE = 502
+
+
+class PmsErrorCode(IntEnum):
+    """Error codes for PMS integration issues."""
+
+    PMS_NOT_FOUND = 600
+    PROPERTY_NOT_LINKED = 601
+    INVALID_NOTIFICATION = 602
+
+
+class PaginationErrorCode(IntEnum):
+    """Error codes for paginated list endpoints."""
+
+    INVALID_CURSOR = 700
+
+
+class AnalyticsErrorCode(IntEnum):
+    """Error codes for the owner analytics endpoints."""
+
+    INVALID_RANGE = 800
@@ -0,0 +1,200 @@
+"""Prometheus metrics for the API, the Celery workers and PMS syncs.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (gunicorn with several workers,
+Celery prefork) every process writes its samples to that directory and
+:func:`metrics_view` aggregates them on scrape. Without it the default
+in-process registry is used, which is enough for ``runserver`` and tests.
+"""
+
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+TASK_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by API operation",
+    ["operation", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "Database queries executed per request",
+    ["operation"],
+    buckets=QUERY_BUCKETS,
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in the database per request",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result",
+    ["cache", "result"],
+)
+THROTTLE_REJECTIONS = Counter(
+    "throttle_rejections_total",
+    "Requests rejected by a throttle",
+    ["operation"],
+)
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+)
+PMS_SYNC_STAGE_SECONDS = Histogram(
+    "pms_sync_stage_duration_seconds",
+    "Time spent per PMS sync stage",
+    ["data_type", "stage"],
+    buckets=TASK_BUCKETS,
+)
+PMS_SYNC_RUNS = Counter(
+    "pms_sync_runs_total",
+    "PMS sync runs by data type and outcome",
+    ["data_type", "success"],
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_throttle(operation: str):
+    THROTTLE_REJECTIONS.labels(operation=operation).inc()
+
+
+def record_sync_run(run):
+    """Export the stage timings of a finished ``SyncRunRecorder``."""
+    for stage, seconds in run.stage_seconds.items():
+        PMS_SYNC_STAGE_SECONDS.labels(data_type=run.data_type, stage=stage).observe(
+            seconds
+        )
+    PMS_SYNC_RUNS.labels(data_type=run.data_type, success=str(run.success)).inc()
+
+
+def operation_name(request) -> str:
+    """Name of the ninja operation (or URL name) that served ``request``."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    path_view = getattr(match.func, "__self__", None)
+    find_operation = getattr(path_view, "_find_operation", None)
+    if find_operation is not None:
+        try:
+            operation = find_operation(request)
+        except Exception:
+            operation = None
+        if operation is not None:
+            return operation.view_func.__name__
+    return match.url_name or match.view_name or "unknown"
+
+
+class QueueDepthCollector:
+    """Report the length of the Celery queues stored in Redis at scrape time."""
+
+    def _family(self):
+        return GaugeMetricFamily(
+            "celery_queue_length", "Pending messages per Celery queue", labels=["queue"]
+        )
+
+    def describe(self):
+        return [self._family()]
+
+    def collect(self):
+        gauge = self._family()
+        broker_url = settings.CELERY_BROKER_URL
+        if broker_url.startswith("redis"):
+            try:
+                import redis
+
+                client = redis.Redis.from_url(
+                    broker_url, socket_connect_timeout=1, socket_timeout=1
+                )
+                for queue in settings.CELERY_METRICS_QUEUES:
+                    gauge.add_metric([queue], client.llen(queue))
+            except Exception as e:
+                print(f"Error leyendo la cola de Celery: {e}")
+        yield gauge
+
+
+def build_registry():
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(QueueDepthCollector())
+    return registry
+
+
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    REGISTRY.register(QueueDepthCollector())
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint.
+
+    Requires ``METRICS_TOKEN`` as a bearer token; without one configured the
+    endpoint is only served with ``DEBUG`` on.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif not hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(build_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+# Celery
+_task_started = {}
+
+
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_SECONDS.labels(task=task.name, state=state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+def _worker_ready(**kwargs):
+    port = settings.CELERY_METRICS_PORT
+    if port:
+        from prometheus_client import start_http_server
+
+        start_http_server(port, registry=build_registry())
+
+
+def connect_celery_signals():
+    from celery.signals import task_postrun, task_prerun, worker_ready
+
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
+    worker_ready.connect(_worker_ready, weak=False)
@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from utils import metrics
+
+query_budget_logger = logging.getLogger("query_budget")
+
+# Query recorders of the current request. A context variable (instead of a
+# wrapper on the request thread's connection) also reaches the queries that
+# async views run in sync_to_async threads.
+_active_recorders: ContextVar[tuple] = ContextVar("query_recorders", default=())
+
+
+def _dispatch_to_recorders(execute, sql, params, many, context):
+    for recorder in _active_recorders.get():
+        execute = partial(recorder, execute)
+    return execute(sql, params, many, context)
+
+
+def _install_dispatcher(connection, **kwargs):
+    if _dispatch_to_recorders not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch_to_recorders)
+
+
+connection_created.connect(_install_dispatcher)
+
+
+@contextmanager
+def record_queries(recorder):
+    """Pass every query run in this context (and its threads) to ``recorder``."""
+    for connection in connections.all():
+        _install_dispatcher(connection)
+    token = _active_recorders.set(_active_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _active_recorders.reset(token)
+
+
+class HybridMiddleware:
+    """Base for middleware measuring ``get_response`` in sync and async stacks.
+
+    Subclasses implement ``start(request)`` returning a state object and
+    ``finish(request, response, state)``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        with record_queries(state.recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        with record_queries(state.recorder):
+            response = await self.get_response(request)
+        return self.finish(request, response, state)
+
+
+class _QueryTimer:
+    """``execute_wrapper`` that counts queries and accumulates their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class _RequestState:
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.started = time.perf_counter()
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Export latency and DB load of every request labelled by operation."""
+
+    def start(self, request):
+        return _RequestState(_QueryTimer())
+
+    def finish(self, request, response, state):
+        elapsed = time.perf_counter() - state.started
+        timer = state.recorder
+
+        operation = metrics.operation_name(request)
+        if operation == "metrics_view":
+            return response
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            operation=operation,
+            method=request.method,
+            status=str(response.status_code),
+        ).observe(elapsed)
+        metrics.DB_QUERIES_PER_REQUEST.labels(operation=operation).observe(timer.count)
+        metrics.DB_SECONDS_PER_REQUEST.labels(operation=operation).observe(
+            timer.seconds
+        )
+        return response
+
+
+_IN_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def sql_fingerprint(sql: str) -> str:
+    """Normalize ``sql`` so queries differing only in their values match."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _SPACES_RE.sub(" ", sql).strip()
+
+
+def _call_site(project_dir: str) -> str:
+    """First project frame (outside this module and installed packages)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(project_dir)
+            and filename != __file__
+            and "site-packages" not in filename
+        ):
+            relative = os.path.relpath(filename, project_dir)
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class _QueryRecorder:
+    """``execute_wrapper`` keeping the SQL and duration of each query.
+
+    Walking the stack for the call site is only done while ``tracing``: from
+    the start for sampled requests, otherwise from the query at which the
+    request becomes slow or goes over ``QUERY_BUDGET_MAX_QUERIES``.
+    """
+
+    def __init__(self, max_queries: int, tracing: bool = False):
+        self.max_queries = max_queries
+        self.tracing = tracing
+        self.project_dir = str(settings.BASE_DIR)
+        self.started = time.perf_counter()
+        self.slow_after = self.started + settings.QUERY_BUDGET_SLOW_MS / 1000
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            finished = time.perf_counter()
+            elapsed = finished - started
+            self.count += 1
+            self.seconds += elapsed
+            if not self.tracing and (
+                self.count > settings.QUERY_BUDGET_MAX_QUERIES
+                or finished >= self.slow_after
+            ):
+                self.tracing = True
+            if len(self.queries) < self.max_queries:
+                site = _call_site(self.project_dir) if self.tracing else None
+                self.queries.append((sql, elapsed, site))
+
+
+class QueryBudgetMiddleware(HybridMiddleware):
+    """Log a structured summary of sampled, slow or over budget requests.
+
+    Every request is measured; only those picked by
+    ``QUERY_BUDGET_SAMPLE_RATE``, slower than ``QUERY_BUDGET_SLOW_MS`` or with
+    more than ``QUERY_BUDGET_MAX_QUERIES`` queries are logged, with their
+    repeated SQL fingerprints (likely N+1s) and slowest statements together
+    with the code that issued them (for the queries run once the request was
+    picked).
+    """
+
+    def start(self, request):
+        sampled = random.random() < settings.QUERY_BUDGET_SAMPLE_RATE
+        return _RequestState(
+            _QueryRecorder(settings.QUERY_BUDGET_MAX_RECORDED_QUERIES, sampled)
+        )
+
+    def finish(self, request, response, state):
+        elapsed_ms = (time.perf_counter() - state.started) * 1000
+        recorder = state.recorder
+
+        slow = elapsed_ms >= settings.QUERY_BUDGET_SLOW_MS
+        over_budget = recorder.count > settings.QUERY_BUDGET_MAX_QUERIES
+        if slow or over_budget or recorder.tracing:
+            query_budget_logger.info(
+                json.dumps(
+                    self.summary(request, response, recorder, elapsed_ms, slow),
+                    default=str,
+                )
+            )
+        return response
+
+    @staticmethod
+    def summary(request, response, recorder, elapsed_ms, slow):
+        by_fingerprint = defaultdict(
+            lambda: {"count": 0, "ms": 0.0, "call_sites": set()}
+        )
+        for sql, seconds, call_site in recorder.queries:
+            entry = by_fingerprint[sql_fingerprint(sql)]
+            entry["count"] += 1
+            entry["ms"] += seconds * 1000
+            if call_site:
+                entry["call_sites"].add(call_site)
+
+        duplicates = [
+            {
+                "fingerprint": fingerprint,
+                "count": entry["count"],
+                "ms": round(entry["ms"], 2),
+                "call_sites": sorted(entry["call_sites"]),
+            }
+            for fingerprint, entry in by_fingerprint.items()
+            if entry["count"] >= settings.QUERY_BUDGET_DUPLICATE_THRESHOLD
+        ]
+        duplicates.sort(key=lambda item: item["count"], reverse=True)
+
+        slowest = sorted(recorder.queries, key=lambda query: query[1], reverse=True)
+        return {
+            "event": "query_budget",
+            "route": metrics.operation_name(request),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "slow": slow,
+            "total_ms": round(elapsed_ms, 2),
+            "db_ms": round(recorder.seconds * 1000, 2),
+            "queries": recorder.count,
+            "over_budget": recorder.count > settings.QUERY_BUDGET_MAX_QUERIES,
+            "duplicates": duplicates,
+            "slowest": [
+                {"sql": sql[:500], "ms": round(seconds * 1000, 2), "call_site": site}
+                for sql, seconds, site in slowest[
+                    : settings.QUERY_BUDGET_TOP_STATEMENTS
+                ]
+            ],
+        }
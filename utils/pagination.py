@@ -0,0 +1,109 @@
+"""Keyset (cursor) pagination for ninja list endpoints.
+
+Pages are read with ``WHERE (ordering) > (last row)`` instead of ``OFFSET``,
+so deep pages cost the same as the first one and rows inserted meanwhile do
+not shift them. The cursor is the signed ordering values of the last row of
+the previous page; clients pass ``next_cursor`` back as is.
+"""
+
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from django.core import signing
+from django.db.models import Q, QuerySet
+from ninja import Field, Schema
+from ninja.conf import settings as ninja_settings
+from ninja.pagination import AsyncPaginationBase
+
+from .error_codes import APIError, PaginationErrorCode
+
+CURSOR_SALT = "utils.pagination.cursor"
+
+
+def _encode_value(value):
+    # Full precision: DjangoJSONEncoder truncates microseconds
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class CursorPagination(AsyncPaginationBase):
+    """Keyset pagination over ``ordering`` (non-null fields, ``-`` for desc).
+
+    The primary key is appended to the ordering when missing so the order is
+    total and no row is skipped or repeated between pages.
+    """
+
+    class Input(Schema):
+        cursor: Optional[str] = None
+        page_size: Optional[int] = Field(None, ge=1)
+
+    class Output(Schema):
+        items: List[Any]
+        next_cursor: Optional[str] = None
+
+    def __init__(
+        self,
+        ordering: Sequence[str] = ("id",),
+        page_size: int = ninja_settings.PAGINATION_PER_PAGE,
+        max_page_size: int = ninja_settings.PAGINATION_MAX_PER_PAGE_SIZE,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        ordering = list(ordering)
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        self.ordering = ordering
+        self.fields = [field.lstrip("-") for field in ordering]
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+
+    def _get_page_size(self, requested: Optional[int]) -> int:
+        return min(requested or self.page_size, self.max_page_size)
+
+    def _decode_cursor(self, cursor: str) -> list:
+        try:
+            values = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise APIError("Invalid cursor", PaginationErrorCode.INVALID_CURSOR)
+        return values
+
+    def _encode_cursor(self, obj) -> str:
+        values = [_encode_value(getattr(obj, field)) for field in self.fields]
+        return signing.dumps(values, salt=CURSOR_SALT, compress=True)
+
+    def _after(self, values: list) -> Q:
+        """Rows after ``values`` in ``self.ordering``."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _page_queryset(self, queryset: QuerySet, pagination: Input) -> QuerySet:
+        queryset = queryset.order_by(*self.ordering)
+        if pagination.cursor:
+            queryset = queryset.filter(
+                self._after(self._decode_cursor(pagination.cursor))
+            )
+        # One extra row tells whether there is a next page
+        return queryset[: self._get_page_size(pagination.page_size) + 1]
+
+    def _result(self, rows: list, pagination: Input) -> dict:
+        page_size = self._get_page_size(pagination.page_size)
+        items = rows[:page_size]
+        next_cursor = self._encode_cursor(items[-1]) if len(rows) > page_size else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def paginate_queryset(self, queryset: QuerySet, pagination: Input, **params):
+        rows = list(self._page_queryset(queryset, pagination))
+        return self._result(rows, pagination)
+
+    async def apaginate_queryset(self, queryset: QuerySet, pagination: Input, **params):
+        rows = [obj async for obj in self._page_queryset(queryset, pagination)]
+        return self._result(rows, pagination)
@@ -0,0 +1,39 @@
+"""Paginator for admin lists over very large tables.
+
+``COUNT(*)`` has to scan every matching row, which on millions of
+reservations costs more than rendering the page itself. Above
+``ADMIN_EXACT_COUNT_LIMIT`` rows the page count uses the PostgreSQL planner's
+estimate instead; below it counts are exact.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = self.estimated_count()
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+    def estimated_count(self):
+        """Rows the planner expects the query to return, or ``None``."""
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        if connections[queryset.db].vendor != "postgresql":
+            return None
+        try:
+            plan = json.loads(queryset.order_by().explain(format="json"))
+        except DatabaseError:
+            return None
+        if isinstance(plan, list):
+            plan = plan[0]
+        return int(plan["Plan"]["Plan Rows"])
@@ -1,15 +1,23 @@
+from functools import lru_cache
+
 import boto3
 from django.conf import settings
 
 
-def generate_presigned_url(key, expires_in=3600):
-    s3 = boto3.client(
+@lru_cache(maxsize=1)
+def get_s3_client():
+    # Creating a client is slow (it loads the service model); clients are
+    # thread-safe, so one is shared by the whole process.
+    return boto3.client(
         "s3",
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         region_name=settings.AWS_S3_REGION_NAME,
     )
-    return s3.generate_presigned_url(
+
+
+def generate_presigned_url(key, expires_in=3600):
+    return get_s3_client().generate_presigned_url(
         "get_object",
         Params={"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": key},
         ExpiresIn=expires_in,
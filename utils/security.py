@@ -1,4 +1,6 @@
 # security.py
+import hmac
+
 from django.conf import settings
 from ninja.security import APIKeyHeader
 
@@ -16,3 +18,27 @@ class PublicAPIKey(APIKeyHeader):
         if key == settings.PUBLIC_API_KEY:
             return key
         raise APIError("Access denied", SecurityErrorCode.ACCESS_DENIED, 403)
+
+
+class PmsWebhookKey(APIKeyHeader):
+    """Token sent by a PMS pushing change notifications.
+
+    Each PMS has its own ``webhook_token``, checked against the ``pms_key``
+    of the URL, so a vendor can only notify changes of its own properties.
+    """
+
+    param_name = "X-PMS-TOKEN"
+
+    def authenticate(self, request, key):
+        from pms.models import PMS
+
+        match = request.resolver_match
+        pms_key = match.kwargs.get("pms_key") if match else None
+        expected = (
+            PMS.objects.filter(pms_key=pms_key)
+            .values_list("webhook_token", flat=True)
+            .first()
+        )
+        if expected and key and hmac.compare_digest(key.encode(), expected.encode()):
+            return key
+        raise APIError("Access denied", SecurityErrorCode.ACCESS_DENIED, 403)
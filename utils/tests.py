@@ -0,0 +1,290 @@
+import json
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from ninja.errors import Throttled
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pms.models import PMS
+from utils import APIError
+from utils.auth_bearer import jwt_authenticator, user_cache_key
+from utils.db_router import ReplicaRouter, replica_reads, use_primary
+from utils.middleware import sql_fingerprint
+from utils.pagination import CursorPagination
+from utils.paginator import EstimatedCountPaginator
+from utils.throttling import GCRAThrottle, local_store
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+class MetricsEndpointTest(TestCase):
+    def _scrape(self):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-token")
+
+    def setUp(self):
+        local_store.clear()
+        PMS.objects.create(name="Metrics PMS", pms_key="fnsrooms", has_integration=True)
+
+    def test_request_metrics_by_operation(self):
+        self.client.get("/api/pms/", HTTP_X_APP_KEY="clave-larga-y-unica")
+        response = self._scrape()
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",operation="list_pms",'
+            'status="200"}',
+            body,
+        )
+        self.assertIn('http_request_db_queries_count{operation="list_pms"}', body)
+
+    def test_throttle_rejections(self):
+        url = "/api/properties/999999"
+        self.client.get(url, HTTP_X_APP_KEY="clave-larga-y-unica")
+        response = self.client.get(url, HTTP_X_APP_KEY="clave-larga-y-unica")
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 60)
+        body = self._scrape().content.decode()
+        self.assertIn('throttle_rejections_total{operation="get_property"}', body)
+
+    def test_async_view_throttle_rejections(self):
+        for _ in range(10):
+            response = self.client.get(
+                "/api/properties/", HTTP_X_APP_KEY="clave-larga-y-unica"
+            )
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            "/api/properties/", HTTP_X_APP_KEY="clave-larga-y-unica"
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 6)
+        body = self._scrape().content.decode()
+        self.assertIn(
+            'throttle_rejections_total{operation="available_properties"}', body
+        )
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer other")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self._scrape().status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_denied_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+class SqlFingerprintTest(SimpleTestCase):
+    def test_values_are_normalized(self):
+        first = sql_fingerprint(
+            'SELECT * FROM "pms" WHERE "id" IN (%s, %s) AND "name" = \'a\' LIMIT 21'
+        )
+        second = sql_fingerprint(
+            'SELECT * FROM "pms"  WHERE "id" IN (%s) AND "name" = \'b\' LIMIT 1'
+        )
+        self.assertEqual(first, second)
+
+
+@override_settings(QUERY_BUDGET_SAMPLE_RATE=1.0, QUERY_BUDGET_DUPLICATE_THRESHOLD=1)
+class QueryBudgetMiddlewareTest(TestCase):
+    def setUp(self):
+        PMS.objects.create(name="Budget PMS", pms_key="fnsrooms", has_integration=True)
+
+    def test_sampled_request_is_logged(self):
+        with self.assertLogs("query_budget", level="INFO") as logs:
+            self.client.get("/api/pms/", HTTP_X_APP_KEY="clave-larga-y-unica")
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(entry["route"], "list_pms")
+        self.assertEqual(entry["status"], 200)
+        self.assertGreaterEqual(entry["queries"], 1)
+        self.assertIn("pms/api.py", entry["duplicates"][0]["call_sites"][0])
+        self.assertTrue(entry["slowest"])
+
+    @override_settings(QUERY_BUDGET_SAMPLE_RATE=0.0, QUERY_BUDGET_SLOW_MS=60000)
+    def test_fast_unsampled_request_is_not_logged(self):
+        with self.assertNoLogs("query_budget", level="INFO"):
+            self.client.get("/api/pms/", HTTP_X_APP_KEY="clave-larga-y-unica")
+
+    @override_settings(
+        QUERY_BUDGET_SAMPLE_RATE=0.0,
+        QUERY_BUDGET_SLOW_MS=60000,
+        QUERY_BUDGET_MAX_QUERIES=0,
+    )
+    def test_over_budget_request_is_traced(self):
+        with self.assertLogs("query_budget", level="INFO") as logs:
+            self.client.get("/api/pms/", HTTP_X_APP_KEY="clave-larga-y-unica")
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertTrue(entry["over_budget"])
+        self.assertFalse(entry["slow"])
+        self.assertIn("pms/api.py", entry["slowest"][0]["call_site"])
+
+
+@override_settings(AUTH_USER_CACHE_TTL=60)
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username="cached", password="pass")
+        self.token = jwt_authenticator.get_validated_token(
+            str(AccessToken.for_user(self.user))
+        )
+
+    def test_user_is_cached(self):
+        self.assertEqual(jwt_authenticator.get_user(self.token), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(jwt_authenticator.get_user(self.token), self.user)
+        data = cache.get(user_cache_key(self.user.id))
+        self.assertNotIn("password", data["fields"])
+
+    def test_deactivation_invalidates_cache(self):
+        jwt_authenticator.get_user(self.token)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.is_active = False
+            self.user.save()
+            self.assertIsNone(cache.get(user_cache_key(self.user.id)))
+            # A request reading the row before the commit caches it again...
+            cache.set(user_cache_key(self.user.id), {"stale": True})
+        for callback in callbacks:
+            callback()
+        # ...and the delete on commit drops that copy
+        self.assertIsNone(cache.get(user_cache_key(self.user.id)))
+        with self.assertRaises(AuthenticationFailed):
+            jwt_authenticator.get_user(self.token)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        jwt_authenticator.get_user(self.token)
+        with self.assertNumQueries(1):
+            jwt_authenticator.get_user(self.token)
+
+
+@override_settings(THROTTLE_REDIS_URL="")
+class GCRAThrottleTest(SimpleTestCase):
+    def setUp(self):
+        local_store.clear()
+        self.factory = RequestFactory()
+
+    def _request(self, ip="10.0.0.1", key="app"):
+        return self.factory.get("/", REMOTE_ADDR=ip, HTTP_X_APP_KEY=key)
+
+    def test_burst_then_retry_after(self):
+        throttle = GCRAThrottle("2/m", scope="test", key="api_key_ip")
+        request = self._request()
+        self.assertTrue(throttle.allow_request(request))
+        self.assertTrue(throttle.allow_request(request))
+        self.assertFalse(throttle.allow_request(request))
+        self.assertAlmostEqual(throttle.wait(), 30, delta=1)
+        # Other clients of the same key have their own budget
+        self.assertTrue(throttle.allow_request(self._request(ip="10.0.0.2")))
+
+    def test_cost_and_charge(self):
+        throttle = GCRAThrottle("10/m", scope="cost", key="ip", cost=5)
+        request = self._request()
+        self.assertTrue(throttle.allow_request(request))
+        self.assertTrue(throttle.allow_request(request))
+        self.assertFalse(throttle.allow_request(request))
+
+        cheap = GCRAThrottle("10/m", scope="charge", key="ip")
+        self.assertTrue(cheap.allow_request(request))
+        cheap.charge(request, 9)
+        self.assertFalse(cheap.allow_request(request))
+
+    async def test_acharge(self):
+        throttle = GCRAThrottle("10/m", scope="acharge", key="ip")
+        request = self._request()
+        self.assertTrue(throttle.allow_request(request))
+        await throttle.acharge(request, 9)
+        self.assertFalse(throttle.allow_request(request))
+
+    async def test_acheck_raises_throttled(self):
+        throttle = GCRAThrottle("1/m", scope="acheck", key="ip")
+        request = self._request()
+        await throttle.acheck(request)
+        with self.assertRaises(Throttled) as raised:
+            await throttle.acheck(request)
+        self.assertAlmostEqual(raised.exception.wait, 60, delta=1)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(PMS), "default")
+
+    def test_replica_reads_until_a_write(self):
+        @replica_reads
+        def view():
+            before = self.router.db_for_read(PMS)
+            self.router.db_for_write(PMS)
+            return before, self.router.db_for_read(PMS)
+
+        self.assertEqual(view(), ("replica_1", "default"))
+
+    def test_use_primary_inside_replica_reads(self):
+        @replica_reads
+        def view():
+            with use_primary():
+                return self.router.db_for_read(PMS)
+
+        self.assertEqual(view(), "default")
+
+    def test_async_replica_reads(self):
+        @replica_reads
+        async def view():
+            return self.router.db_for_read(PMS)
+
+        self.assertEqual(async_to_sync(view)(), "replica_1")
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        for index in range(5):
+            PMS.objects.create(name=f"PMS {index % 2}", pms_key=f"pms{index}")
+
+    def _walk(self, paginator):
+        ids, cursor = [], None
+        while True:
+            page = paginator.paginate_queryset(
+                PMS.objects.all(),
+                CursorPagination.Input(cursor=cursor, page_size=2),
+            )
+            ids.extend(obj.id for obj in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_row_once(self):
+        expected = list(
+            PMS.objects.order_by("-name", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(self._walk(CursorPagination(ordering=("-name",))), expected)
+
+    def test_tampered_cursor_is_rejected(self):
+        with self.assertRaises(APIError):
+            CursorPagination().paginate_queryset(
+                PMS.objects.all(), CursorPagination.Input(cursor="not-a-cursor")
+            )
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def setUp(self):
+        for name in ("A", "B", "C"):
+            PMS.objects.create(name=name, pms_key=name.lower())
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=1000)
+    def test_small_tables_are_counted(self):
+        paginator = EstimatedCountPaginator(PMS.objects.order_by("id"), 2)
+        with patch.object(paginator, "estimated_count", return_value=5):
+            self.assertEqual(paginator.count, 3)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=1000)
+    def test_large_tables_use_the_estimate(self):
+        paginator = EstimatedCountPaginator(PMS.objects.order_by("id"), 2)
+        with patch.object(paginator, "estimated_count", return_value=5000):
+            self.assertEqual(paginator.count, 5000)
+            self.assertEqual(paginator.num_pages, 2500)
@@ -0,0 +1,200 @@
+"""Distributed GCRA rate limiting for ninja operations.
+
+Limits are shared by every worker and host through Redis
+(``THROTTLE_REDIS_URL``). Without Redis, or while it is unreachable, each
+process falls back to an in-memory limiter with the same semantics.
+
+GCRA stores a single "theoretical arrival time" (TAT) per key: every request
+pushes it forward by ``cost * period / limit`` and is rejected when that
+would put it more than ``burst`` requests ahead of now. The distance is the
+exact ``Retry-After``.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from ninja.errors import Throttled
+from ninja.throttling import BaseThrottle
+
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local increment = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local force = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+if tat < now then
+    tat = now
+end
+local new_tat = tat + increment
+local allow_at = new_tat - tolerance
+if force == 0 and now < allow_at then
+    return {0, tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1)
+return {1, '0'}
+"""
+
+#: Seconds to wait before trying Redis again after an error
+REDIS_RETRY_INTERVAL = 30
+
+
+class LocalGCRAStore:
+    """Per-process GCRA state, used when Redis is not available."""
+
+    def __init__(self):
+        self._tats = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, now, increment, tolerance, force=False):
+        with self._lock:
+            if len(self._tats) > 10000:
+                self._tats = {k: v for k, v in self._tats.items() if v > now}
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + increment
+            allow_at = new_tat - tolerance
+            if not force and now < allow_at:
+                return False, allow_at - now
+            self._tats[key] = new_tat
+            return True, 0.0
+
+    def clear(self):
+        with self._lock:
+            self._tats.clear()
+
+
+class RedisGCRAStore:
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(
+            url, socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+        self.script = self.client.register_script(GCRA_SCRIPT)
+
+    def update(self, key, now, increment, tolerance, force=False):
+        allowed, retry_after = self.script(
+            keys=[key], args=[now, increment, tolerance, int(force)]
+        )
+        return bool(allowed), float(retry_after)
+
+
+local_store = LocalGCRAStore()
+_redis_store = None
+_redis_failed_at = 0.0
+
+
+def _update(key, now, increment, tolerance, force=False):
+    global _redis_store, _redis_failed_at
+    url = settings.THROTTLE_REDIS_URL
+    if url and time.monotonic() - _redis_failed_at > REDIS_RETRY_INTERVAL:
+        try:
+            if _redis_store is None:
+                _redis_store = RedisGCRAStore(url)
+            return _redis_store.update(key, now, increment, tolerance, force)
+        except Exception as e:
+            _redis_failed_at = time.monotonic()
+            print(f"Throttling: Redis no disponible, se usa memoria local: {e}")
+    return local_store.update(key, now, increment, tolerance, force)
+
+
+class GCRAThrottle(BaseThrottle):
+    """Shared rate limit for an operation.
+
+    ``rate`` uses the ninja format (``"10/m"``). ``key`` selects who is
+    limited: ``"user"`` (user id, IP for anonymous requests), ``"ip"``,
+    ``"api_key"`` or ``"api_key_ip"`` (each client IP of each API key).
+    ``cost`` is charged per request; :meth:`charge` adds extra cost once the
+    view knows the request was expensive.
+
+    ninja calls :meth:`allow_request` synchronously, also on async
+    operations, so async views do not pass the throttle to the operation:
+    they ``await`` :meth:`acheck` first thing instead.
+    """
+
+    _PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+
+    def __init__(
+        self,
+        rate: str,
+        scope: str,
+        key: str = "user",
+        cost: float = 1,
+        burst: Optional[int] = None,
+    ):
+        limit, period = rate.split("/")
+        self.limit = int(limit)
+        self.period = self._PERIODS[period[0]]
+        self.scope = scope
+        self.key = key
+        self.cost = cost
+        self.burst = burst or self.limit
+        self._local = threading.local()
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.limit
+
+    def get_cache_key(self, request) -> str:
+        ip = self.get_ident(request)
+        if self.key == "ip":
+            ident = ip
+        elif self.key in ("api_key", "api_key_ip"):
+            api_key = request.headers.get("X-APP-KEY", "")
+            ident = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+            if self.key == "api_key_ip":
+                ident = f"{ident}:{ip}"
+        else:
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                ident = f"u{user.pk}"
+            else:
+                ident = ip
+        return f"throttle:{self.scope}:{ident}"
+
+    def allow_request(self, request) -> bool:
+        allowed, retry_after = _update(
+            self.get_cache_key(request),
+            time.time(),
+            self.emission_interval * self.cost,
+            self.emission_interval * self.burst,
+        )
+        # ninja asks for wait() right after a rejection, in the same thread
+        self._local.wait = retry_after
+        return allowed
+
+    def check(self, request):
+        """Raise ``Throttled`` (429 with ``Retry-After``) when over the limit."""
+        if not self.allow_request(request):
+            raise Throttled(wait=self.wait())
+
+    async def acheck(self, request):
+        """:meth:`check` for async views: the Redis call runs in a thread."""
+        await sync_to_async(self.check, thread_sensitive=False)(request)
+
+    def charge(self, request, cost: float):
+        """Add ``cost`` to the request's key without rejecting it."""
+        _update(
+            self.get_cache_key(request),
+            time.time(),
+            self.emission_interval * cost,
+            self.emission_interval * self.burst,
+            force=True,
+        )
+
+    async def acharge(self, request, cost: float):
+        """:meth:`charge` for async views: the Redis call runs in a thread."""
+        await sync_to_async(self.charge, thread_sensitive=False)(request, cost)
+
+    def wait(self) -> Optional[float]:
+        return getattr(self._local, "wait", None)
+
+
+def retry_after_header(wait: Optional[float]) -> Optional[str]:
+    if wait is None:
+        return None
+    return str(max(1, math.ceil(wait)))
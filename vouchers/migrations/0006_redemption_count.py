@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:45
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_redemptions(apps, schema_editor):
+    Voucher = apps.get_model("vouchers", "Voucher")
+    VoucherRedemption = apps.get_model("vouchers", "VoucherRedemption")
+    redemptions = (
+        VoucherRedemption.objects.filter(voucher=models.OuterRef("pk"))
+        .order_by()
+        .values("voucher")
+        .annotate(total=models.Count("id"))
+        .values("total")
+    )
+    Voucher.objects.update(
+        redemption_count=Coalesce(
+            models.Subquery(redemptions), 0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vouchers', '0005_alter_discountcoupon_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voucher',
+            name='redemption_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Canjes'),
+        ),
+        migrations.RunPython(count_redemptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def register_codes(apps, schema_editor):
+    Voucher = apps.get_model("vouchers", "Voucher")
+    DiscountCoupon = apps.get_model("vouchers", "DiscountCoupon")
+    PromoCode = apps.get_model("vouchers", "PromoCode")
+    PromoCode.objects.bulk_create(
+        [
+            PromoCode(code=v.code.strip().upper(), kind="voucher", voucher=v)
+            for v in Voucher.objects.all()
+        ]
+        + [
+            PromoCode(code=c.code.strip().upper(), kind="coupon", coupon=c)
+            for c in DiscountCoupon.objects.all()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vouchers', '0006_redemption_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromoCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(db_index=True, max_length=20, verbose_name='Código')),
+                ('kind', models.CharField(choices=[('voucher', 'Voucher'), ('coupon', 'Coupon')], max_length=10)),
+                ('coupon', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promo_code', to='vouchers.discountcoupon')),
+                ('voucher', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promo_code', to='vouchers.voucher')),
+            ],
+            options={
+                'verbose_name': 'Código promocional',
+                'verbose_name_plural': 'Códigos promocionales',
+                'db_table': 'promo_codes',
+            },
+        ),
+        migrations.RunPython(register_codes, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -14,6 +18,8 @@ class Voucher(models.Model):
         User, on_delete=models.PROTECT, related_name="created_vouchers"
     )
     active = models.BooleanField("Activo", default=True)
+    # Kept by redeem_many so validation does not count the ledger
+    redemption_count = models.PositiveIntegerField("Canjes", default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -26,19 +32,49 @@ class Voucher(models.Model):
         return self.code
 
     def redeem(self, amount: float, reservation=None):
-        if amount <= 0:
+        return self.redeem_many([(reservation, amount)])[0]
+
+    def redeem_many(self, allocations):
+        """Redeem ``(reservation, amount)`` pairs in one conditional ``UPDATE``.
+
+        The balance is decremented in the database only if it still covers
+        the total, so no row lock has to be held beforehand; call it as late
+        as possible in the transaction.
+        """
+        allocations = [
+            (reservation, Decimal(str(amount))) for reservation, amount in allocations
+        ]
+        if any(amount <= 0 for _, amount in allocations):
             raise ValueError("Amount must be positive")
-        if amount > self.remaining_amount:
-            raise ValueError("Insufficient amount")
-        self.remaining_amount -= amount
-        if self.remaining_amount == 0:
-            self.active = False
-        self.save()
-        VoucherRedemption.objects.create(
-            voucher=self,
-            amount=amount,
-            reservation=reservation,
-        )
+        total = sum(amount for _, amount in allocations)
+
+        with transaction.atomic():
+            updated = Voucher.objects.filter(
+                pk=self.pk, active=True, remaining_amount__gte=total
+            ).update(
+                remaining_amount=F("remaining_amount") - total,
+                redemption_count=F("redemption_count") + len(allocations),
+                active=Case(
+                    When(remaining_amount=total, then=Value(False)),
+                    default=F("active"),
+                ),
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                raise ValueError("Insufficient amount")
+            from .services import PromoCodeService
+
+            PromoCodeService.invalidate(self.code)
+            redemptions = VoucherRedemption.objects.bulk_create(
+                [
+                    VoucherRedemption(
+                        voucher=self, amount=amount, reservation=reservation
+                    )
+                    for reservation, amount in allocations
+                ]
+            )
+        self.refresh_from_db(fields=["remaining_amount", "redemption_count", "active"])
+        return redemptions
 
 
 class VoucherRedemption(models.Model):
@@ -86,3 +122,44 @@ class DiscountCoupon(models.Model):
 
     def __str__(self):
         return self.code
+
+
+class PromoCode(models.Model):
+    """Registry of every voucher and coupon code, upper-cased.
+
+    Kept in sync by ``vouchers.signals``; ``PromoCodeService.lookup`` resolves
+    a code with one indexed query (and usually none, from the cache).
+    """
+
+    VOUCHER = "voucher"
+    COUPON = "coupon"
+
+    KIND_CHOICES = [
+        (VOUCHER, "Voucher"),
+        (COUPON, "Coupon"),
+    ]
+
+    code = models.CharField("Código", max_length=20, db_index=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    voucher = models.OneToOneField(
+        Voucher,
+        on_delete=models.CASCADE,
+        related_name="promo_code",
+        null=True,
+        blank=True,
+    )
+    coupon = models.OneToOneField(
+        DiscountCoupon,
+        on_delete=models.CASCADE,
+        related_name="promo_code",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        db_table = "promo_codes"
+        verbose_name = "Código promocional"
+        verbose_name_plural = "Códigos promocionales"
+
+    def __str__(self):
+        return f"{self.code} ({self.kind})"
@@ -0,0 +1,131 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from utils.metrics import record_cache
+
+from .models import DiscountCoupon, PromoCode, Voucher
+
+
+class PromoCodeService:
+    """Resolve voucher and coupon codes through the ``PromoCode`` registry."""
+
+    @staticmethod
+    def normalize(code: str) -> str:
+        return code.strip().upper()
+
+    @classmethod
+    def _cache_key(cls, code: str) -> str:
+        return f"promo_code:{cls.normalize(code)}"
+
+    @classmethod
+    def invalidate(cls, code: str):
+        """Drop the cached lookup of ``code``.
+
+        Dropped again on commit, so a lookup made while the transaction was
+        open cannot keep the old data cached.
+        """
+        key = cls._cache_key(code)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @classmethod
+    def register(cls, obj):
+        """Create or update the registry row of a voucher or coupon."""
+        if isinstance(obj, Voucher):
+            lookup = {"voucher": obj}
+            kind = PromoCode.VOUCHER
+        else:
+            lookup = {"coupon": obj}
+            kind = PromoCode.COUPON
+        previous = PromoCode.objects.filter(**lookup).values_list("code", flat=True)
+        for code in previous:
+            cls.invalidate(code)
+        PromoCode.objects.update_or_create(
+            **lookup, defaults={"code": cls.normalize(obj.code), "kind": kind}
+        )
+        cls.invalidate(obj.code)
+
+    @classmethod
+    def register_created(cls, objs, batch_size=None):
+        """Registry rows for vouchers and coupons made with ``bulk_create``.
+
+        ``bulk_create`` skips the signals that call :meth:`register`; the
+        objects must not be registered yet.
+        """
+        entries = []
+        for obj in objs:
+            if isinstance(obj, Voucher):
+                entries.append(
+                    PromoCode(
+                        code=cls.normalize(obj.code),
+                        kind=PromoCode.VOUCHER,
+                        voucher=obj,
+                    )
+                )
+            else:
+                entries.append(
+                    PromoCode(
+                        code=cls.normalize(obj.code), kind=PromoCode.COUPON, coupon=obj
+                    )
+                )
+        PromoCode.objects.bulk_create(entries, batch_size=batch_size)
+        keys = [cls._cache_key(entry.code) for entry in entries]
+        # Forget misses cached before the codes existed
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @staticmethod
+    def _describe(entry: PromoCode) -> dict:
+        if entry.kind == PromoCode.VOUCHER:
+            voucher = entry.voucher
+            return {
+                "type": PromoCode.VOUCHER,
+                "id": voucher.id,
+                "applicable": voucher.active,
+                "redemptions": voucher.redemption_count,
+                "remaining_amount": float(voucher.remaining_amount),
+            }
+        coupon = entry.coupon
+        return {
+            "type": PromoCode.COUPON,
+            "id": coupon.id,
+            "applicable": coupon.active,
+            "name": coupon.name,
+            "discount_percent": float(coupon.discount_percent),
+        }
+
+    @classmethod
+    def lookup(cls, code: str):
+        """Validation data of ``code`` (any case), or ``None`` if unknown.
+
+        Results, misses included, are cached for ``PROMO_CODE_CACHE_TTL``
+        seconds. Active vouchers win over coupons with the same code.
+        """
+        key = cls._cache_key(code)
+        result = cache.get(key)
+        record_cache("promo_code", result is not None)
+        if result is None:
+            entries = [
+                cls._describe(entry)
+                for entry in PromoCode.objects.filter(
+                    code=cls.normalize(code)
+                ).select_related("voucher", "coupon")
+            ]
+            entries.sort(
+                key=lambda e: (not e["applicable"], e["type"] != PromoCode.VOUCHER)
+            )
+            # An empty dict caches the miss
+            result = entries[0] if entries else {}
+            cache.set(key, result, settings.PROMO_CODE_CACHE_TTL)
+        return result or None
+
+    @staticmethod
+    def resolve(code: str):
+        """The active ``(voucher, coupon)`` for ``code``; one of them is ``None``."""
+        entry = PromoCodeService.lookup(code)
+        if not entry:
+            return None, None
+        if entry["type"] == PromoCode.VOUCHER:
+            return Voucher.objects.filter(id=entry["id"], active=True).first(), None
+        return None, DiscountCoupon.objects.filter(id=entry["id"], active=True).first()
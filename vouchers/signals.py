@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import DiscountCoupon, Voucher
+from .services import PromoCodeService
+
+
+def code_saved(sender, instance, **kwargs):
+    PromoCodeService.register(instance)
+
+
+def code_deleted(sender, instance, **kwargs):
+    # The registry row goes with the cascade
+    PromoCodeService.invalidate(instance.code)
+
+
+def connect():
+    for model in (Voucher, DiscountCoupon):
+        post_save.connect(
+            code_saved, sender=model, dispatch_uid=f"promo_code_save_{model.__name__}"
+        )
+        post_delete.connect(
+            code_deleted,
+            sender=model,
+            dispatch_uid=f"promo_code_delete_{model.__name__}",
+        )
@@ -35,6 +35,17 @@ class VoucherAPITest(TestCase):
         self.assertEqual(data["name"], self.coupon.name)
         self.assertEqual(data["discount_percent"], 10.0)
 
+    def test_validate_is_case_insensitive_and_cached(self):
+        self.client.get("/api/vouchers/validate/vch")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/vouchers/validate/vch")
+        self.assertEqual(response.json()["type"], "voucher")
+
+        self.voucher.redeem(30)
+        response = self.client.get("/api/vouchers/validate/VCH")
+        self.assertEqual(response.json()["redemptions"], 1)
+        self.assertEqual(response.json()["remaining_amount"], 50.0)
+
     def test_validate_invalid(self):
         response = self.client.get("/api/vouchers/validate/NOPE")
         self.assertEqual(response.status_code, 404)
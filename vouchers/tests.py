@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
 from reservations.models import Reservation
 
@@ -31,6 +32,28 @@ class VoucherModelTest(TestCase):
         with self.assertRaises(ValueError):
             self.voucher.redeem(200)
 
+    def test_stale_instance_cannot_overdraw(self):
+        stale = Voucher.objects.get(pk=self.voucher.pk)
+        self.voucher.redeem(60)
+        with self.assertRaises(ValueError):
+            stale.redeem(60)
+
+        stale.redeem(40)
+        self.assertEqual(stale.remaining_amount, 0)
+        self.assertFalse(stale.active)
+        self.assertEqual(stale.redemption_count, 2)
+        self.assertEqual(stale.redemptions.count(), 2)
+
+    def test_validate_code_reports_redemption_count(self):
+        self.voucher.redeem(10)
+        self.voucher.redeem(10)
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(
+            "/api/vouchers/validate/TEST", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["redemptions"], 2)
+
 
 class CouponAndReservationIntegrationTest(TestCase):
     def setUp(self):
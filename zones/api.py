@@ -1,9 +1,15 @@
 from typing import List
 
+from django.db.models import Prefetch
 from ninja import Router
+from ninja.decorators import decorate_view
+from ninja.pagination import paginate
 from ninja.responses import Response
 
+from properties.services import PropertyService
 from utils import APIError, ErrorSchema, ZoneErrorCode
+from utils.db_router import replica_reads
+from utils.pagination import CursorPagination
 
 from .models import Zone
 from .schemas import ZoneOut
@@ -12,6 +18,7 @@ router = Router(tags=["zones"])
 
 
 @router.get("/{zone_id}/polygon")
+@decorate_view(replica_reads)
 def zone_polygon(request, zone_id):
     zone_search = Zone.objects.filter(id=zone_id).first()
     if not zone_search:
@@ -25,7 +32,9 @@ def zone_polygon(request, zone_id):
 
 
 @router.get("/", response={200: List[ZoneOut]})
-def zones(request):
+@decorate_view(replica_reads)
+@paginate(CursorPagination)
+async def zones(request):
     """
     This endpoint fetches all zones.
 
@@ -33,10 +42,14 @@ def zones(request):
     * 200 OK - Returns a list of zones
     * 400 Bad Request - Error fetching zones
     """
-    return Zone.objects.all()
+    return Zone.objects.prefetch_related(
+        "zone_images",
+        Prefetch("properties", queryset=PropertyService.listing_queryset()),
+    )
 
 
 @router.get("/{zone_id}/", response={200: ZoneOut, 404: ErrorSchema})
+@decorate_view(replica_reads)
 def zone(request, zone_id):
     """
     This endpoint fetches a zone by ID.